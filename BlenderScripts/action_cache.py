@@ -0,0 +1,114 @@
+import bpy
+import hashlib
+import json
+import os
+from pathlib import Path
+
+"""
+アクションキャッシュモジュール
+キーフレーム定義・fps・ボーン構成のハッシュをキーに、生成済みアクションを
+ライブラリ.blendとして保存し、次回以降はリンクして再利用する
+"""
+
+# アクションの作成方法（build_interaction・補間の設定など）を変えたときはキャッシュを無効にするため番号を上げる
+CACHE_VERSION = 1
+
+class ActionCache:
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent.parent / "BlenderAssets" / "Cache" / "Actions"
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def bone_layout(armature):
+        """ボーン構成（名前・親・レスト位置）を取得"""
+        layout = []
+        for bone in armature.data.bones:
+            layout.append([
+                bone.name,
+                bone.parent.name if bone.parent else "",
+                [round(v, 5) for v in bone.head_local],
+                [round(v, 5) for v in bone.tail_local]
+            ])
+        return sorted(layout)
+
+    @staticmethod
+    def compute_hash(definition, fps, layout):
+        """定義内容からキャッシュキーを計算"""
+        def normalize(value):
+            if isinstance(value, float):
+                return round(value, 6)
+            if isinstance(value, (list, tuple)):
+                return [normalize(v) for v in value]
+            if isinstance(value, dict):
+                return {str(k): normalize(v) for k, v in value.items()}
+            return value
+
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "definition": normalize(definition), "fps": fps, "bones": layout},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def library_path(self, content_hash):
+        """ハッシュに対応するライブラリファイル"""
+        return self.cache_dir / f"{content_hash}.blend"
+
+    def find_loaded(self, content_hash):
+        """セッション内で既に読み込み/生成済みのアクションを探す"""
+        library_path = os.path.normpath(str(self.library_path(content_hash)))
+        for action in bpy.data.actions:
+            if action.get("content_hash") != content_hash:
+                continue
+            if action.library is None:
+                return action
+            if os.path.normpath(bpy.path.abspath(action.library.filepath)) == library_path:
+                return action
+        return None
+
+    def get(self, name, content_hash):
+        """キャッシュからアクションを取得（なければNone）"""
+        action = self.find_loaded(content_hash)
+        if action:
+            self.hits += 1
+            return action
+
+        library_path = self.library_path(content_hash)
+        if not library_path.exists():
+            self.misses += 1
+            return None
+
+        # ライブラリからアクションをリンク
+        with bpy.data.libraries.load(str(library_path), link=True) as (data_from, data_to):
+            if name not in data_from.actions:
+                self.misses += 1
+                return None
+            data_to.actions = [name]
+
+        action = data_to.actions[0]
+        if action is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return action
+
+    def prepare_action(self, name):
+        """生成用のアクションを用意（同名のローカルアクションは再利用して.001を増やさない）"""
+        action = bpy.data.actions.get(name)
+        if action and action.library is None:
+            action.fcurves.clear()
+            return action
+        return bpy.data.actions.new(name=name)
+
+    def store(self, action, content_hash):
+        """生成したアクションをライブラリとして保存"""
+        action["content_hash"] = content_hash
+        bpy.data.libraries.write(str(self.library_path(content_hash)), {action}, fake_user=True)
+
+    def print_stats(self):
+        """ヒット率を表示"""
+        print(f"アクションキャッシュ: ヒット {self.hits} / ミス {self.misses}")
@@ -1,6 +1,15 @@
 import bpy
 import math
+import time
+import numpy as np
 from mathutils import Vector
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter, set_interpolation
+from shape_key_builder import ShapeKeyBuilder, head_bounds
+from blink_scheduler import BlinkScheduler
 
 """
 キャラクター表情アニメーション作成スクリプト
@@ -61,40 +70,14 @@ class ExpressionAnimationCreator:
         
     def create_shape_keys(self, mesh_obj):
         """必要なシェイプキーを作成"""
-        if not mesh_obj.data.shape_keys:
-            # ベースシェイプキー作成
-            mesh_obj.shape_key_add(name="Basis")
-            
-        shape_keys = mesh_obj.data.shape_keys
-        
-        # 必要なシェイプキーのリスト
-        required_keys = [
-            # 口
-            "smile", "mouth_open", "mouth_sad", "mouth_frown",
-            "mouth_o", "mouth_a", "mouth_i", "mouth_u", "mouth_e",
-            
-            # 目
-            "eyes_happy", "eyes_down", "eyes_wide", "eyes_sad",
-            "eyes_angry", "eyes_heart", "eyes_closed", "blink",
-            "pupils_small", "pupils_large",
-            
-            # 眉
-            "brow_happy", "brow_worried", "brow_up", "brow_sad",
-            "brow_angry", "brow_neutral",
-            
-            # その他
-            "cheek_raise", "blush", "tears", "nose_wrinkle",
-            "sparkle", "sweat"
-        ]
-        
-        # シェイプキーを作成
-        for key_name in required_keys:
-            if key_name not in shape_keys.key_blocks:
-                shape_key = mesh_obj.shape_key_add(name=key_name)
-                # デフォルトで0に設定
-                shape_key.value = 0
+        # 領域マスクから変位を一括計算（変位のないキーは作成しない）
+        # 結合済みのキャラクターでは頭部パーツの範囲を基準にする（体の範囲に引きずられないように）
+        center, size, mask = head_bounds(mesh_obj.data)
+        builder = ShapeKeyBuilder(mesh_obj, center, size, mask)
+        builder.build()
+        builder.print_report()
                 
-        return shape_keys
+        return mesh_obj.data.shape_keys
         
     def create_expression_animation(self, mesh_obj, expression_name, expression_data):
         """特定の表情アニメーションを作成"""
@@ -112,37 +95,20 @@ class ExpressionAnimationCreator:
         mesh_obj.data.shape_keys.animation_data.action = action
         
         total_frames = int(self.fps * self.expression_duration)
+        writer = KeyframeWriter(action)
         
         # 各シェイプキーをアニメート
         for shape_name, target_value in expression_data.items():
             if shape_name in shape_keys.key_blocks:
-                shape_key = shape_keys.key_blocks[shape_name]
+                writer.add_shape_key_keys(shape_name, [
+                    (1, 0),                                # 開始（ニュートラル）
+                    (15, target_value * 0.7),              # 表情への変化（イーズイン）
+                    (30, target_value),                    # 最大表情
+                    (total_frames - 15, target_value),     # 表情維持
+                    (total_frames, 0)                      # ニュートラルへ戻る
+                ])
                 
-                # キーフレーム設定
-                # 開始（ニュートラル）
-                bpy.context.scene.frame_set(1)
-                shape_key.value = 0
-                shape_key.keyframe_insert(data_path="value", frame=1)
-                
-                # 表情への変化（イーズイン）
-                bpy.context.scene.frame_set(15)
-                shape_key.value = target_value * 0.7
-                shape_key.keyframe_insert(data_path="value", frame=15)
-                
-                # 最大表情
-                bpy.context.scene.frame_set(30)
-                shape_key.value = target_value
-                shape_key.keyframe_insert(data_path="value", frame=30)
-                
-                # 表情維持
-                bpy.context.scene.frame_set(total_frames - 15)
-                shape_key.value = target_value
-                shape_key.keyframe_insert(data_path="value", frame=total_frames - 15)
-                
-                # ニュートラルへ戻る
-                bpy.context.scene.frame_set(total_frames)
-                shape_key.value = 0
-                shape_key.keyframe_insert(data_path="value", frame=total_frames)
+        writer.write()
                 
     def create_blink_animation(self, mesh_obj):
         """瞬きアニメーション"""
@@ -156,8 +122,6 @@ class ExpressionAnimationCreator:
             mesh_obj.data.shape_keys.animation_data_create()
         mesh_obj.data.shape_keys.animation_data.action = action
         
-        blink_key = shape_keys.key_blocks["blink"]
-        
         # 速い瞬き（6フレーム）
         blink_frames = [
             (1, 0),      # 開いている
@@ -165,10 +129,23 @@ class ExpressionAnimationCreator:
             (6, 0),      # 開く
         ]
         
-        for frame, value in blink_frames:
-            bpy.context.scene.frame_set(frame)
-            blink_key.value = value
-            blink_key.keyframe_insert(data_path="value", frame=frame)
+        writer = KeyframeWriter(action)
+        writer.add_shape_key_keys("blink", blink_frames)
+        writer.write()
+            
+    def create_blink_schedule(self, mesh_obj, duration=600.0, seed=0):
+        """長尺用の瞬き・微表情アニメーション（シード付き）"""
+        shape_keys = mesh_obj.data.shape_keys
+        if not shape_keys:
+            return None
+            
+        action = bpy.data.actions.new(name=f"BlinkSchedule_{seed}")
+        action.id_root = 'KEY'
+        action.use_fake_user = True
+        
+        scheduler = BlinkScheduler(seed=seed, fps=self.fps)
+        scheduler.write(shape_keys, action, int(self.fps * duration))
+        return action
             
     def create_lip_sync_animation(self, mesh_obj):
         """リップシンク用の母音アニメーション"""
@@ -183,13 +160,10 @@ class ExpressionAnimationCreator:
             if shape_name not in shape_keys.key_blocks:
                 continue
                 
+            # スロットには割り当てず保存（上書きで前の母音が外れないように）
             action = bpy.data.actions.new(name=f"LipSync_{vowel.upper()}")
-            
-            if not mesh_obj.data.shape_keys.animation_data:
-                mesh_obj.data.shape_keys.animation_data_create()
-            mesh_obj.data.shape_keys.animation_data.action = action
-            
-            shape_key = shape_keys.key_blocks[shape_name]
+            action.id_root = 'KEY'
+            action.use_fake_user = True
             
             # 口の形への変化
             lip_frames = [
@@ -200,10 +174,9 @@ class ExpressionAnimationCreator:
                 (20, 0),     # 閉じる
             ]
             
-            for frame, value in lip_frames:
-                bpy.context.scene.frame_set(frame)
-                shape_key.value = value
-                shape_key.keyframe_insert(data_path="value", frame=frame)
+            writer = KeyframeWriter(action)
+            writer.add_shape_key_keys(shape_name, lip_frames)
+            writer.write()
                 
     def create_emotion_transition(self, mesh_obj):
         """感情間のスムーズな遷移アニメーション"""
@@ -225,19 +198,86 @@ class ExpressionAnimationCreator:
             (90, 120, {})  # ニュートラルへ戻る
         ]
         
+        writer = KeyframeWriter(action)
+        
+        # 各シェイプキーの遷移開始時点の値（直前の遷移の目標値）
+        current_values = {}
+        
         for start_frame, end_frame, expression in transitions:
-            for shape_name, target_value in expression.items():
+            # 前の表情にだけ含まれるシェイプキーは0へ戻す
+            shape_names = list(current_values) + [name for name in expression if name not in current_values]
+            for shape_name in shape_names:
                 if shape_name in shape_keys.key_blocks:
-                    shape_key = shape_keys.key_blocks[shape_name]
+                    current_value = current_values.get(
+                        shape_name, shape_keys.key_blocks[shape_name].value
+                    )
+                    target_value = expression.get(shape_name, 0.0)
+                    writer.add_shape_key_keys(shape_name, [
+                        (start_frame, current_value),
+                        (end_frame, target_value)
+                    ])
+                    current_values[shape_name] = target_value
                     
-                    bpy.context.scene.frame_set(start_frame)
-                    current_value = shape_key.value
-                    shape_key.keyframe_insert(data_path="value", frame=start_frame)
+        writer.write()
                     
-                    bpy.context.scene.frame_set(end_frame)
-                    shape_key.value = target_value
-                    shape_key.keyframe_insert(data_path="value", frame=end_frame)
+    def collect_expression_set(self):
+        """遷移対象の全表情（ニュートラル・基本表情・会話・リアクション）"""
+        expression_set = {"neutral": {}}
+        expression_set.update(self.expressions)
+        expression_set.update(ExpressionPresets.create_conversation_set())
+        expression_set.update(ExpressionPresets.create_reaction_set())
+        return expression_set
+        
+    def create_transition_set(self, mesh_obj, transition_frames=15):
+        """全表情の全順序ペアについて遷移アニメーションを作成"""
+        shape_keys = mesh_obj.data.shape_keys
+        if not shape_keys:
+            return []
+            
+        start = time.perf_counter()
+        expression_set = self.collect_expression_set()
+        names = list(expression_set.keys())
+        
+        # 表情×シェイプキーの値の表（存在するシェイプキーのみ）
+        shape_names = []
+        for expression in expression_set.values():
+            for shape_name in expression:
+                if shape_name in shape_keys.key_blocks and shape_name not in shape_names:
+                    shape_names.append(shape_name)
+        table = np.zeros((len(names), len(shape_names)))
+        for row, expression in enumerate(expression_set.values()):
+            for shape_name, value in expression.items():
+                if shape_name in shape_names:
+                    table[row, shape_names.index(shape_name)] = value
                     
+        # 全順序ペアの開始値・終了値と、どちらかで使われるチャンネルを一括計算
+        source, target = np.nonzero(~np.eye(len(names), dtype=bool))
+        start_values = table[source]
+        end_values = table[target]
+        used = (start_values != 0) | (end_values != 0)
+        frames = (1, 1 + transition_frames)
+        
+        actions = []
+        for pair in range(len(source)):
+            action = bpy.data.actions.new(
+                name=f"Transition_{names[source[pair]]}_to_{names[target[pair]]}"
+            )
+            action.id_root = 'KEY'
+            action.use_fake_user = True
+            
+            writer = KeyframeWriter(action)
+            for column in np.flatnonzero(used[pair]):
+                writer.add_shape_key_curve(
+                    shape_names[column], frames,
+                    (start_values[pair, column], end_values[pair, column])
+                )
+            writer.write()
+            actions.append(action)
+            
+        elapsed = time.perf_counter() - start
+        print(f"表情遷移: {len(names)}表情 / {len(actions)}クリップ / {elapsed:.2f}秒")
+        return actions
+        
     def set_interpolation_mode(self, mesh_obj):
         """補間モードを設定"""
         if not mesh_obj.data.shape_keys.animation_data:
@@ -247,11 +287,7 @@ class ExpressionAnimationCreator:
         if not action:
             return
             
-        for fcurve in action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframe.interpolation = 'BEZIER'
-                keyframe.handle_left_type = 'AUTO'
-                keyframe.handle_right_type = 'AUTO'
+        set_interpolation(action, 'BEZIER', 'AUTO')
                 
     def create_all_expressions(self):
         """全表情アニメーション作成"""
@@ -283,6 +319,9 @@ class ExpressionAnimationCreator:
         print("  - 感情遷移アニメーション作成中...")
         self.create_emotion_transition(face_mesh)
         
+        print("  - 全表情間の遷移アニメーション作成中...")
+        self.create_transition_set(face_mesh)
+        
         # 補間設定
         self.set_interpolation_mode(face_mesh)
         
@@ -293,6 +332,7 @@ class ExpressionAnimationCreator:
         print("  - Blink（瞬き）")
         print("  - LipSync_A, I, U, E, O（リップシンク）")
         print("  - EmotionTransition（感情遷移）")
+        print("  - Transition_<表情>_to_<表情>（全表情間の遷移）")
         
         return face_mesh
 
@@ -367,4 +407,6 @@ if __name__ == "__main__":
     print("3. Blend Shapesとして各表情がエクスポートされます")
     print("\n表情プリセット:")
     print("ExpressionPresets.create_conversation_set() - 会話用")
-    print("ExpressionPresets.create_reaction_set() - リアクション用")
\ No newline at end of file
+    print("ExpressionPresets.create_reaction_set() - リアクション用")
+    print("\nセリフごとのリップシンク:")
+    print("LipSyncCompiler().compile_file(タイムライン.csv, face_mesh) - lip_sync_compiler.py")
\ No newline at end of file
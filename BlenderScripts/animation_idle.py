@@ -1,6 +1,13 @@
 import bpy
 import math
+import numpy as np
 from mathutils import Vector, Quaternion
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter, ensure_action, set_interpolation
+from blink_scheduler import BlinkScheduler
 
 """
 キャラクター待機モーション作成スクリプト
@@ -12,6 +19,8 @@ class IdleAnimationCreator:
         self.fps = 30
         self.duration = 4.0  # 4秒のループアニメーション
         self.total_frames = int(self.fps * self.duration)
+        self.curves = None
+        self.blink_seed = 0
         
     def setup_scene(self):
         """シーン設定"""
@@ -108,16 +117,11 @@ class IdleAnimationCreator:
         bpy.ops.object.mode_set(mode='OBJECT')
         return armature
         
-    def animate_breathing(self, armature):
-        """呼吸アニメーション"""
-        bpy.ops.object.mode_set(mode='POSE')
+    def compute_curves(self):
+        """全ボーンの待機カーブを計算（アーマチュアに依存しない）"""
+        curves = {}
         
-        # Spine2ボーン（胸部）で呼吸を表現
-        spine2 = armature.pose.bones.get("Spine2")
-        if not spine2:
-            return
-            
-        # 呼吸のキーフレーム
+        # 呼吸のキーフレーム（Spine2ボーン＝胸部で表現）
         breathing_frames = [
             (1, 1.0),      # 通常
             (30, 1.02),    # 吸う
@@ -125,18 +129,11 @@ class IdleAnimationCreator:
             (90, 0.98),    # 吐く
             (120, 1.0)     # 通常（ループ）
         ]
+        curves[("Spine2", "scale")] = (
+            [frame for frame, _ in breathing_frames],
+            [(scale, scale, scale) for _, scale in breathing_frames]
+        )
         
-        for frame, scale in breathing_frames:
-            bpy.context.scene.frame_set(frame)
-            spine2.scale = (scale, scale, scale)
-            spine2.keyframe_insert(data_path="scale", frame=frame)
-            
-    def animate_weight_shift(self, armature):
-        """重心移動アニメーション"""
-        root = armature.pose.bones.get("Root")
-        if not root:
-            return
-            
         # 重心移動のキーフレーム
         weight_frames = [
             (1, (0, 0, 0)),
@@ -144,18 +141,11 @@ class IdleAnimationCreator:
             (80, (-0.02, 0, 0)),
             (120, (0, 0, 0))
         ]
+        curves[("Root", "location")] = (
+            [frame for frame, _ in weight_frames],
+            [loc for _, loc in weight_frames]
+        )
         
-        for frame, loc in weight_frames:
-            bpy.context.scene.frame_set(frame)
-            root.location = loc
-            root.keyframe_insert(data_path="location", frame=frame)
-            
-    def animate_head_movement(self, armature):
-        """頭の微細な動き"""
-        head = armature.pose.bones.get("Head")
-        if not head:
-            return
-            
         # 頭の動きのキーフレーム
         head_frames = [
             (1, (0, 0, 0)),
@@ -165,33 +155,64 @@ class IdleAnimationCreator:
             (110, (0, math.radians(3), 0)),
             (120, (0, 0, 0))
         ]
+        curves[("Head", "rotation_euler")] = (
+            [frame for frame, _ in head_frames],
+            [rot for _, rot in head_frames]
+        )
+        
+        # 腕の揺れ（サインカーブを全フレーム一括計算）
+        frames = np.arange(1, self.total_frames + 1)
+        t = (frames - 1) / self.total_frames * 2 * math.pi
+        for i, arm_name in enumerate(["Arm_L", "Arm_R"]):
+            # 左右で位相をずらす
+            phase_offset = math.pi if i == 1 else 0
+            rotation = np.zeros((len(frames), 3))
+            rotation[:, 0] = np.sin(t + phase_offset) * 0.05
+            curves[(arm_name, "rotation_euler")] = (frames, rotation)
+            
+        return curves
         
-        for frame, rot in head_frames:
-            bpy.context.scene.frame_set(frame)
-            head.rotation_euler = rot
-            head.keyframe_insert(data_path="rotation_euler", frame=frame)
+    def write_idle_channels(self, armature, channels):
+        """計算済みカーブのうち指定チャンネルを書き込み"""
+        if self.curves is None:
+            self.curves = self.compute_curves()
+            
+        writer = KeyframeWriter(armature.animation_data.action)
+        for channel in channels:
+            frames, values = self.curves[channel]
+            writer.add_bone_curve(channel[0], channel[1], frames, values)
+        writer.write()
+        
+    def animate_breathing(self, armature):
+        """呼吸アニメーション"""
+        if not armature.pose.bones.get("Spine2"):
+            return
+            
+        self.write_idle_channels(armature, [("Spine2", "scale")])
+            
+    def animate_weight_shift(self, armature):
+        """重心移動アニメーション"""
+        if not armature.pose.bones.get("Root"):
+            return
+            
+        self.write_idle_channels(armature, [("Root", "location")])
+            
+    def animate_head_movement(self, armature):
+        """頭の微細な動き"""
+        if not armature.pose.bones.get("Head"):
+            return
+            
+        self.write_idle_channels(armature, [("Head", "rotation_euler")])
             
     def animate_arm_sway(self, armature):
         """腕の自然な揺れ"""
-        arms = ["Arm_L", "Arm_R"]
+        channels = [
+            (arm_name, "rotation_euler")
+            for arm_name in ["Arm_L", "Arm_R"]
+            if armature.pose.bones.get(arm_name)
+        ]
         
-        for i, arm_name in enumerate(arms):
-            arm = armature.pose.bones.get(arm_name)
-            if not arm:
-                continue
-                
-            # 左右で位相をずらす
-            phase_offset = math.pi if i == 1 else 0
-            
-            for frame in range(1, self.total_frames + 1):
-                bpy.context.scene.frame_set(frame)
-                
-                # サインカーブで自然な揺れ
-                t = (frame - 1) / self.total_frames * 2 * math.pi
-                sway = math.sin(t + phase_offset) * 0.05
-                
-                arm.rotation_euler = (sway, 0, 0)
-                arm.keyframe_insert(data_path="rotation_euler", frame=frame)
+        self.write_idle_channels(armature, channels)
                 
     def animate_blink(self):
         """瞬きアニメーション（シェイプキー用）"""
@@ -211,40 +232,20 @@ class IdleAnimationCreator:
         if not blink_key:
             return
             
-        # 瞬きのタイミング（ランダム感を出す）
-        blink_frames = [
-            (35, 36, 37),   # 1回目の瞬き
-            (85, 86, 87),   # 2回目の瞬き
-        ]
+        # 瞬きのタイミング（シード付きで毎回同じ結果になる）
+        scheduler = BlinkScheduler(seed=self.blink_seed, fps=self.fps, blink_shape="Blink")
+        scheduler.mean_interval = 1.5  # 4秒のループ内で2回程度
+        scheduler.twitch_channels = []
         
-        for blink_set in blink_frames:
-            start, peak, end = blink_set
-            
-            # 瞬き前
-            bpy.context.scene.frame_set(start - 1)
-            blink_key.value = 0
-            blink_key.keyframe_insert(data_path="value", frame=start - 1)
-            
-            # 瞬き最大
-            bpy.context.scene.frame_set(peak)
-            blink_key.value = 1
-            blink_key.keyframe_insert(data_path="value", frame=peak)
-            
-            # 瞬き後
-            bpy.context.scene.frame_set(end + 1)
-            blink_key.value = 0
-            blink_key.keyframe_insert(data_path="value", frame=end + 1)
+        shape_keys = mesh_obj.data.shape_keys
+        scheduler.write(shape_keys, ensure_action(shape_keys, "IdleBlink"), self.total_frames)
             
     def set_interpolation_mode(self, armature):
         """補間モードを設定"""
         if not armature.animation_data or not armature.animation_data.action:
             return
             
-        for fcurve in armature.animation_data.action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframe.interpolation = 'BEZIER'
-                keyframe.handle_left_type = 'AUTO'
-                keyframe.handle_right_type = 'AUTO'
+        set_interpolation(armature.animation_data.action, 'BEZIER', 'AUTO')
                 
     def create_idle_animation(self):
         """待機アニメーション作成のメイン関数"""
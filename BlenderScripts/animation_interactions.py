@@ -1,6 +1,12 @@
 import bpy
 import math
 from mathutils import Vector, Quaternion
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter, set_interpolation
+from action_cache import ActionCache
 
 """
 キャラクターインタラクションアニメーション作成スクリプト
@@ -28,6 +34,25 @@ class InteractionAnimationCreator:
             "hand_kiss": self.create_hand_kiss_animation
         }
         
+        # キーフレーム定義（キャッシュのハッシュ計算にも使用）
+        self.definitions = {
+            "wave": self.define_wave,
+            "bow": self.define_bow,
+            "nod": self.define_nod,
+            "shake_head": self.define_shake_head,
+            "point": self.define_point,
+            "clap": self.define_clap,
+            "jump": self.define_jump,
+            "turn_around": self.define_turn_around,
+            "sit_down": self.define_sit_down,
+            "stand_up": self.define_stand_up,
+            "hug": self.define_hug,
+            "hand_kiss": self.define_hand_kiss
+        }
+        
+        self.use_cache = True
+        self.cache = None
+        
     def get_armature(self):
         """アーマチュアを取得"""
         for obj in bpy.data.objects:
@@ -35,21 +60,87 @@ class InteractionAnimationCreator:
                 return obj
         return None
         
-    def create_wave_animation(self, armature):
-        """手を振るアニメーション"""
-        action = bpy.data.actions.new(name="Wave")
+    @staticmethod
+    def split_table(frames_table, columns):
+        """(frame, 値1, 値2, ...) 形式の表をボーンごとのキーリストに分解"""
+        channels = []
+        for column, (bones, prop) in enumerate(columns, start=1):
+            if isinstance(bones, str):
+                bones = (bones,)
+            keys = [(row[0], row[column]) for row in frames_table]
+            for bone_name in bones:
+                channels.append((bone_name, prop, keys))
+        return channels
+        
+    def build_interaction(self, armature, interaction_name, action=None):
+        """定義からアクションを生成してアーマチュアに割り当て"""
+        action_name, channels = self.definitions[interaction_name]()
+        
+        if action is None:
+            action = bpy.data.actions.new(name=action_name)
         armature.animation_data_create()
         armature.animation_data.action = action
         
-        bpy.ops.object.mode_set(mode='POSE')
+        # アーマチュアに存在するボーンのみ書き込み
+        writer = KeyframeWriter(action)
+        for bone_name, prop, keys in channels:
+            if armature.pose.bones.get(bone_name):
+                writer.add_bone_keys(bone_name, prop, keys)
+        writer.write()
         
-        # 右腕を使用
-        shoulder_r = armature.pose.bones.get("Shoulder_R")
-        arm_r = armature.pose.bones.get("Arm_R")
+        return action
         
-        if not shoulder_r or not arm_r:
-            return
-            
+    def create_wave_animation(self, armature):
+        """手を振るアニメーション"""
+        return self.build_interaction(armature, "wave")
+        
+    def create_bow_animation(self, armature):
+        """お辞儀アニメーション"""
+        return self.build_interaction(armature, "bow")
+        
+    def create_nod_animation(self, armature):
+        """頷きアニメーション"""
+        return self.build_interaction(armature, "nod")
+        
+    def create_shake_head_animation(self, armature):
+        """首を横に振るアニメーション"""
+        return self.build_interaction(armature, "shake_head")
+        
+    def create_point_animation(self, armature):
+        """指差しアニメーション"""
+        return self.build_interaction(armature, "point")
+        
+    def create_clap_animation(self, armature):
+        """拍手アニメーション"""
+        return self.build_interaction(armature, "clap")
+        
+    def create_jump_animation(self, armature):
+        """ジャンプアニメーション"""
+        return self.build_interaction(armature, "jump")
+        
+    def create_turn_around_animation(self, armature):
+        """振り返りアニメーション"""
+        return self.build_interaction(armature, "turn_around")
+        
+    def create_sit_down_animation(self, armature):
+        """座るアニメーション"""
+        return self.build_interaction(armature, "sit_down")
+        
+    def create_stand_up_animation(self, armature):
+        """立ち上がるアニメーション"""
+        return self.build_interaction(armature, "stand_up")
+        
+    def create_hug_animation(self, armature):
+        """ハグアニメーション"""
+        return self.build_interaction(armature, "hug")
+        
+    def create_hand_kiss_animation(self, armature):
+        """手にキスするアニメーション"""
+        return self.build_interaction(armature, "hand_kiss")
+        
+    def define_wave(self):
+        """手を振るアニメーション"""
+        # 右腕を使用
         wave_frames = [
             (1, (0, 0, 0), (0, 0, 0)),  # 開始位置
             (10, (math.radians(-70), math.radians(30), math.radians(45)), 
@@ -65,26 +156,13 @@ class InteractionAnimationCreator:
             (60, (0, 0, 0), (0, 0, 0))  # 元に戻る
         ]
         
-        for frame, shoulder_rot, arm_rot in wave_frames:
-            bpy.context.scene.frame_set(frame)
-            shoulder_r.rotation_euler = shoulder_rot
-            shoulder_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            arm_r.rotation_euler = arm_rot
-            arm_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-    def create_bow_animation(self, armature):
-        """お辞儀アニメーション"""
-        action = bpy.data.actions.new(name="Bow")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        root = armature.pose.bones.get("Root")
-        spine1 = armature.pose.bones.get("Spine1")
-        spine2 = armature.pose.bones.get("Spine2")
-        head = armature.pose.bones.get("Head")
+        return "Wave", self.split_table(wave_frames, [
+            ("Shoulder_R", "rotation_euler"),
+            ("Arm_R", "rotation_euler")
+        ])
         
+    def define_bow(self):
+        """お辞儀アニメーション"""
         bow_frames = [
             (1, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0)),  # 直立
             (20, (0, 0, -0.1), 
@@ -98,34 +176,15 @@ class InteractionAnimationCreator:
             (60, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0))  # 戻る
         ]
         
-        for frame, root_loc, spine1_rot, spine2_rot, head_rot in bow_frames:
-            bpy.context.scene.frame_set(frame)
-            
-            if root:
-                root.location = root_loc
-                root.keyframe_insert(data_path="location", frame=frame)
-            if spine1:
-                spine1.rotation_euler = spine1_rot
-                spine1.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if spine2:
-                spine2.rotation_euler = spine2_rot
-                spine2.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if head:
-                head.rotation_euler = head_rot
-                head.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
-    def create_nod_animation(self, armature):
-        """頷きアニメーション"""
-        action = bpy.data.actions.new(name="Nod")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
+        return "Bow", self.split_table(bow_frames, [
+            ("Root", "location"),
+            ("Spine1", "rotation_euler"),
+            ("Spine2", "rotation_euler"),
+            ("Head", "rotation_euler")
+        ])
         
-        head = armature.pose.bones.get("Head")
-        if not head:
-            return
-            
+    def define_nod(self):
+        """頷きアニメーション"""
         nod_frames = [
             (1, (0, 0, 0)),
             (8, (math.radians(15), 0, 0)),   # 下を向く
@@ -134,23 +193,12 @@ class InteractionAnimationCreator:
             (30, (0, 0, 0))                  # 元に戻る
         ]
         
-        for frame, rot in nod_frames:
-            bpy.context.scene.frame_set(frame)
-            head.rotation_euler = rot
-            head.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-    def create_shake_head_animation(self, armature):
-        """首を横に振るアニメーション"""
-        action = bpy.data.actions.new(name="ShakeHead")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
+        return "Nod", self.split_table(nod_frames, [
+            ("Head", "rotation_euler")
+        ])
         
-        head = armature.pose.bones.get("Head")
-        if not head:
-            return
-            
+    def define_shake_head(self):
+        """首を横に振るアニメーション"""
         shake_frames = [
             (1, (0, 0, 0)),
             (8, (0, math.radians(-25), 0)),   # 左を向く
@@ -160,25 +208,12 @@ class InteractionAnimationCreator:
             (40, (0, 0, 0))                   # 元に戻る
         ]
         
-        for frame, rot in shake_frames:
-            bpy.context.scene.frame_set(frame)
-            head.rotation_euler = rot
-            head.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-    def create_point_animation(self, armature):
-        """指差しアニメーション"""
-        action = bpy.data.actions.new(name="Point")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        shoulder_r = armature.pose.bones.get("Shoulder_R")
-        arm_r = armature.pose.bones.get("Arm_R")
+        return "ShakeHead", self.split_table(shake_frames, [
+            ("Head", "rotation_euler")
+        ])
         
-        if not shoulder_r or not arm_r:
-            return
-            
+    def define_point(self):
+        """指差しアニメーション"""
         point_frames = [
             (1, (0, 0, 0), (0, 0, 0)),
             (15, (math.radians(-90), 0, 0), (0, 0, 0)),  # 腕を前に出す
@@ -186,26 +221,13 @@ class InteractionAnimationCreator:
             (45, (0, 0, 0), (0, 0, 0))                    # 戻る
         ]
         
-        for frame, shoulder_rot, arm_rot in point_frames:
-            bpy.context.scene.frame_set(frame)
-            shoulder_r.rotation_euler = shoulder_rot
-            shoulder_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            arm_r.rotation_euler = arm_rot
-            arm_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-    def create_clap_animation(self, armature):
-        """拍手アニメーション"""
-        action = bpy.data.actions.new(name="Clap")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        shoulder_l = armature.pose.bones.get("Shoulder_L")
-        shoulder_r = armature.pose.bones.get("Shoulder_R")
-        arm_l = armature.pose.bones.get("Arm_L")
-        arm_r = armature.pose.bones.get("Arm_R")
+        return "Point", self.split_table(point_frames, [
+            ("Shoulder_R", "rotation_euler"),
+            ("Arm_R", "rotation_euler")
+        ])
         
+    def define_clap(self):
+        """拍手アニメーション"""
         clap_frames = [
             (1, (0, 0, 0), (0, 0, 0)),
             (5, (math.radians(-60), math.radians(45), 0), 
@@ -221,27 +243,13 @@ class InteractionAnimationCreator:
             (35, (0, 0, 0), (0, 0, 0))                        # 戻る
         ]
         
-        for frame, l_rot, r_rot in clap_frames:
-            bpy.context.scene.frame_set(frame)
-            if shoulder_l:
-                shoulder_l.rotation_euler = l_rot
-                shoulder_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if shoulder_r:
-                shoulder_r.rotation_euler = r_rot
-                shoulder_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
-    def create_jump_animation(self, armature):
-        """ジャンプアニメーション"""
-        action = bpy.data.actions.new(name="Jump")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
+        return "Clap", self.split_table(clap_frames, [
+            ("Shoulder_L", "rotation_euler"),
+            ("Shoulder_R", "rotation_euler")
+        ])
         
-        root = armature.pose.bones.get("Root")
-        if not root:
-            return
-            
+    def define_jump(self):
+        """ジャンプアニメーション"""
         jump_frames = [
             (1, (0, 0, 0)),
             (8, (0, 0, -0.2)),     # しゃがむ
@@ -250,48 +258,24 @@ class InteractionAnimationCreator:
             (25, (0, 0, 0))        # 元に戻る
         ]
         
-        for frame, loc in jump_frames:
-            bpy.context.scene.frame_set(frame)
-            root.location = loc
-            root.keyframe_insert(data_path="location", frame=frame)
-            
-    def create_turn_around_animation(self, armature):
-        """振り返りアニメーション"""
-        action = bpy.data.actions.new(name="TurnAround")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
+        return "Jump", self.split_table(jump_frames, [
+            ("Root", "location")
+        ])
         
-        root = armature.pose.bones.get("Root")
-        if not root:
-            return
-            
+    def define_turn_around(self):
+        """振り返りアニメーション"""
         turn_frames = [
             (1, (0, 0, 0)),
             (30, (0, 0, math.radians(180))),   # 180度回転
             (60, (0, 0, math.radians(360)))    # 元に戻る（360度）
         ]
         
-        for frame, rot in turn_frames:
-            bpy.context.scene.frame_set(frame)
-            root.rotation_euler = rot
-            root.keyframe_insert(data_path="rotation_euler", frame=frame)
-            
-    def create_sit_down_animation(self, armature):
-        """座るアニメーション"""
-        action = bpy.data.actions.new(name="SitDown")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        root = armature.pose.bones.get("Root")
-        hip_l = armature.pose.bones.get("Hip_L")
-        hip_r = armature.pose.bones.get("Hip_R")
-        leg_l = armature.pose.bones.get("Leg_L")
-        leg_r = armature.pose.bones.get("Leg_R")
+        return "TurnAround", self.split_table(turn_frames, [
+            ("Root", "rotation_euler")
+        ])
         
+    def define_sit_down(self):
+        """座るアニメーション"""
         sit_frames = [
             (1, (0, 0, 0), (0, 0, 0), (0, 0, 0)),
             (30, (0, 0, -0.5), 
@@ -302,39 +286,15 @@ class InteractionAnimationCreator:
                  (math.radians(90), 0, 0))   # 維持
         ]
         
-        for frame, root_loc, hip_rot, leg_rot in sit_frames:
-            bpy.context.scene.frame_set(frame)
-            if root:
-                root.location = root_loc
-                root.keyframe_insert(data_path="location", frame=frame)
-            if hip_l:
-                hip_l.rotation_euler = hip_rot
-                hip_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if hip_r:
-                hip_r.rotation_euler = hip_rot
-                hip_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if leg_l:
-                leg_l.rotation_euler = leg_rot
-                leg_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if leg_r:
-                leg_r.rotation_euler = leg_rot
-                leg_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
-    def create_stand_up_animation(self, armature):
-        """立ち上がるアニメーション"""
-        action = bpy.data.actions.new(name="StandUp")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
+        return "SitDown", self.split_table(sit_frames, [
+            ("Root", "location"),
+            (("Hip_L", "Hip_R"), "rotation_euler"),
+            (("Leg_L", "Leg_R"), "rotation_euler")
+        ])
         
+    def define_stand_up(self):
+        """立ち上がるアニメーション"""
         # SitDownの逆再生
-        root = armature.pose.bones.get("Root")
-        hip_l = armature.pose.bones.get("Hip_L")
-        hip_r = armature.pose.bones.get("Hip_R")
-        leg_l = armature.pose.bones.get("Leg_L")
-        leg_r = armature.pose.bones.get("Leg_R")
-        
         stand_frames = [
             (1, (0, 0, -0.5), 
                 (math.radians(-90), 0, 0), 
@@ -342,37 +302,14 @@ class InteractionAnimationCreator:
             (30, (0, 0, 0), (0, 0, 0), (0, 0, 0))  # 立った状態
         ]
         
-        for frame, root_loc, hip_rot, leg_rot in stand_frames:
-            bpy.context.scene.frame_set(frame)
-            if root:
-                root.location = root_loc
-                root.keyframe_insert(data_path="location", frame=frame)
-            if hip_l:
-                hip_l.rotation_euler = hip_rot
-                hip_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if hip_r:
-                hip_r.rotation_euler = hip_rot
-                hip_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if leg_l:
-                leg_l.rotation_euler = leg_rot
-                leg_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if leg_r:
-                leg_r.rotation_euler = leg_rot
-                leg_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
-    def create_hug_animation(self, armature):
-        """ハグアニメーション"""
-        action = bpy.data.actions.new(name="Hug")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        shoulder_l = armature.pose.bones.get("Shoulder_L")
-        shoulder_r = armature.pose.bones.get("Shoulder_R")
-        arm_l = armature.pose.bones.get("Arm_L")
-        arm_r = armature.pose.bones.get("Arm_R")
+        return "StandUp", self.split_table(stand_frames, [
+            ("Root", "location"),
+            (("Hip_L", "Hip_R"), "rotation_euler"),
+            (("Leg_L", "Leg_R"), "rotation_euler")
+        ])
         
+    def define_hug(self):
+        """ハグアニメーション"""
         hug_frames = [
             (1, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0)),
             (20, (math.radians(-80), math.radians(60), 0), 
@@ -386,34 +323,15 @@ class InteractionAnimationCreator:
             (70, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0))  # 戻る
         ]
         
-        for frame, sl_rot, sr_rot, al_rot, ar_rot in hug_frames:
-            bpy.context.scene.frame_set(frame)
-            if shoulder_l:
-                shoulder_l.rotation_euler = sl_rot
-                shoulder_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if shoulder_r:
-                shoulder_r.rotation_euler = sr_rot
-                shoulder_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if arm_l:
-                arm_l.rotation_euler = al_rot
-                arm_l.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if arm_r:
-                arm_r.rotation_euler = ar_rot
-                arm_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
-    def create_hand_kiss_animation(self, armature):
-        """手にキスするアニメーション"""
-        action = bpy.data.actions.new(name="HandKiss")
-        armature.animation_data_create()
-        armature.animation_data.action = action
-        
-        bpy.ops.object.mode_set(mode='POSE')
-        
-        shoulder_r = armature.pose.bones.get("Shoulder_R")
-        arm_r = armature.pose.bones.get("Arm_R")
-        head = armature.pose.bones.get("Head")
-        spine2 = armature.pose.bones.get("Spine2")
+        return "Hug", self.split_table(hug_frames, [
+            ("Shoulder_L", "rotation_euler"),
+            ("Shoulder_R", "rotation_euler"),
+            ("Arm_L", "rotation_euler"),
+            ("Arm_R", "rotation_euler")
+        ])
         
+    def define_hand_kiss(self):
+        """手にキスするアニメーション"""
         kiss_frames = [
             (1, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0)),
             (20, (math.radians(-120), math.radians(30), 0), 
@@ -431,32 +349,45 @@ class InteractionAnimationCreator:
             (70, (0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0))  # 戻る
         ]
         
-        for frame, s_rot, a_rot, h_rot, sp_rot in kiss_frames:
-            bpy.context.scene.frame_set(frame)
-            if shoulder_r:
-                shoulder_r.rotation_euler = s_rot
-                shoulder_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if arm_r:
-                arm_r.rotation_euler = a_rot
-                arm_r.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if head:
-                head.rotation_euler = h_rot
-                head.keyframe_insert(data_path="rotation_euler", frame=frame)
-            if spine2:
-                spine2.rotation_euler = sp_rot
-                spine2.keyframe_insert(data_path="rotation_euler", frame=frame)
-                
+        return "HandKiss", self.split_table(kiss_frames, [
+            ("Shoulder_R", "rotation_euler"),
+            ("Arm_R", "rotation_euler"),
+            ("Head", "rotation_euler"),
+            ("Spine2", "rotation_euler")
+        ])
+        
     def set_interpolation_mode(self, armature):
         """補間モードを設定"""
         if not armature.animation_data or not armature.animation_data.action:
             return
             
-        for fcurve in armature.animation_data.action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframe.interpolation = 'BEZIER'
-                keyframe.handle_left_type = 'AUTO'
-                keyframe.handle_right_type = 'AUTO'
+        set_interpolation(armature.animation_data.action, 'BEZIER', 'AUTO')
                 
+    def create_cached_interactions(self, armature):
+        """定義が変わったインタラクションだけを再生成"""
+        if self.cache is None:
+            self.cache = ActionCache()
+            
+        layout = ActionCache.bone_layout(armature)
+        armature.animation_data_create()
+        
+        for interaction_name in self.interactions.keys():
+            action_name, channels = self.definitions[interaction_name]()
+            content_hash = ActionCache.compute_hash([action_name, channels], self.fps, layout)
+            
+            action = self.cache.get(action_name, content_hash)
+            if action:
+                print(f"  - {interaction_name}: キャッシュを使用")
+                armature.animation_data.action = action
+                continue
+                
+            print(f"  - {interaction_name}作成中...")
+            action = self.build_interaction(armature, interaction_name, self.cache.prepare_action(action_name))
+            self.set_interpolation_mode(armature)
+            self.cache.store(action, content_hash)
+            
+        self.cache.print_stats()
+        
     def create_all_interactions(self):
         """全インタラクションアニメーション作成"""
         print("インタラクションアニメーション作成開始...")
@@ -471,10 +402,13 @@ class InteractionAnimationCreator:
             armature = idle_creator.create_simple_armature()
             
         # 各インタラクション作成
-        for interaction_name, create_func in self.interactions.items():
-            print(f"  - {interaction_name}作成中...")
-            create_func(armature)
-            self.set_interpolation_mode(armature)
+        if not self.use_cache:
+            for interaction_name, create_func in self.interactions.items():
+                print(f"  - {interaction_name}作成中...")
+                create_func(armature)
+                self.set_interpolation_mode(armature)
+        else:
+            self.create_cached_interactions(armature)
             
         print("\nインタラクションアニメーション作成完了！")
         print("作成されたアニメーション:")
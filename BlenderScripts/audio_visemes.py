@@ -0,0 +1,161 @@
+import os
+import wave
+import hashlib
+import numpy as np
+from viseme_curves import VOWELS, shape_name, smoothing_kernel
+
+"""
+音声ファイルからの口形推定モジュール
+WAVファイルをフレームごとにFFT解析し、音量と母音（第1・第2フォルマントの推定値）から
+mouth_a/i/u/e/o の値を求める。bpyに依存しないため、ワーカープロセスからも読み込める
+"""
+
+# 解析方法を変えたときはキャッシュを無効にするため番号を上げる
+ANALYSIS_VERSION = 1
+
+# 日本語母音のおおよそのフォルマント周波数 (F1, F2) [Hz]
+VOWEL_FORMANTS = {
+    "a": (800, 1200),
+    "i": (300, 2300),
+    "u": (350, 1300),
+    "e": (500, 1900),
+    "o": (500, 900)
+}
+
+# フォルマントを探す周波数帯 [Hz]
+F1_BAND = (200, 1000)
+F2_BAND = (800, 2800)
+
+# 音量を0〜1に割り当てる範囲（ピークからのdB）
+SILENCE_DB = -45.0
+FULL_DB = -6.0
+
+
+def read_wav(path):
+    """WAVファイルをモノラルのfloat配列として読み込む"""
+    with wave.open(str(path), "rb") as f:
+        channels = f.getnchannels()
+        sample_width = f.getsampwidth()
+        sample_rate = f.getframerate()
+        raw = f.readframes(f.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        # 24bit: 3バイトずつ上位に詰めて32bitとして読む
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(data), 4), dtype=np.uint8)
+        padded[:, 1:] = data
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2147483648
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"{path}: 未対応のサンプル幅です ({sample_width}バイト)")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def band_centroid(spectrum, freqs, band):
+    """周波数帯内のスペクトル重心（フレームごと）"""
+    mask = (freqs >= band[0]) & (freqs <= band[1])
+    power = spectrum[:, mask]
+    total = power.sum(axis=1)
+    return (power * freqs[mask]).sum(axis=1) / np.maximum(total, 1e-12)
+
+
+def analyze_samples(samples, sample_rate, fps=30, coarticulation=0.08):
+    """音声サンプルからフレームごとの母音の値（フレーム数×5）を推定"""
+    hop = sample_rate / fps
+    window_size = int(2 ** np.ceil(np.log2(hop * 2)))
+    frame_count = max(int(np.ceil(len(samples) / hop)), 1)
+
+    # 全フレームの窓を一括で切り出してFFT
+    padded = np.pad(samples, (window_size // 2, window_size))
+    starts = (np.arange(frame_count) * hop).astype(np.int64)
+    windows = padded[starts[:, None] + np.arange(window_size)[None, :]]
+    windows = windows * np.hanning(window_size)[None, :]
+    spectrum = np.abs(np.fft.rfft(windows, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(window_size, 1.0 / sample_rate)
+
+    # 音量（ピーク基準のdBを0〜1に）
+    rms = np.sqrt(np.mean(windows ** 2, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-9) / max(rms.max(), 1e-9))
+    amplitude = np.clip((db - SILENCE_DB) / (FULL_DB - SILENCE_DB), 0.0, 1.0)
+
+    # フォルマント推定値に近い母音ほど大きな重み
+    f1 = band_centroid(spectrum, freqs, F1_BAND)
+    f2 = band_centroid(spectrum, freqs, F2_BAND)
+    distances = np.stack([
+        ((f1 - VOWEL_FORMANTS[vowel][0]) / 200) ** 2 + ((f2 - VOWEL_FORMANTS[vowel][1]) / 400) ** 2
+        for vowel in VOWELS
+    ], axis=1)
+    weights = np.exp(-distances)
+    weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-12)
+
+    values = weights * amplitude[:, None]
+
+    # 前後のフレームと滑らかにつなぐ
+    kernel = smoothing_kernel(fps, coarticulation)
+    for channel in range(len(VOWELS)):
+        values[:, channel] = np.convolve(values[:, channel], kernel, mode="same")
+    return values
+
+
+def audio_hash(path, fps):
+    """音声データと解析条件のハッシュ"""
+    digest = hashlib.sha256()
+    digest.update(f"{ANALYSIS_VERSION}:{fps}:".encode("utf-8"))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def values_to_curves(values):
+    """フレーム×母音の配列をシェイプキーごとのカーブに変換"""
+    frames = np.arange(1, len(values) + 1)
+    curves = {}
+    for channel, vowel in enumerate(VOWELS):
+        if values[:, channel].max() <= 1e-4:
+            continue
+        curves[shape_name(vowel)] = (frames, values[:, channel])
+    return curves
+
+
+def analyze_file(task):
+    """ワーカー用: (path, fps, cache_dir) を解析し (名前, カーブ, キャッシュ使用, エラー) を返す"""
+    # 読めないファイルは例外にせずエラーとして返す（バッチ全体を止めない）
+    path = task[0]
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return analyze_task(task) + (None,)
+    except (OSError, EOFError, ValueError, wave.Error) as error:
+        return name, None, False, str(error) or type(error).__name__
+
+
+def analyze_task(task):
+    """(path, fps, cache_dir) を解析し (名前, カーブ, キャッシュ使用) を返す"""
+    path, fps, cache_dir = task
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{audio_hash(path, fps)}.npy")
+        if os.path.exists(cache_path):
+            return name, values_to_curves(np.load(cache_path)), True
+
+    samples, sample_rate = read_wav(path)
+    values = analyze_samples(samples, sample_rate, fps).astype(np.float32)
+
+    if cache_path:
+        # 書き込み途中のファイルを他のワーカーが読まないよう、一時ファイル経由で保存
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(temp_path, cache_path)
+
+    return name, values_to_curves(values), False
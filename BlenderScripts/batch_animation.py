@@ -0,0 +1,179 @@
+import bpy
+import time
+from fnmatch import fnmatch
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter
+from action_cache import ActionCache
+from gait_engine import GaitEngine, GAIT_PRESETS
+from animation_idle import IdleAnimationCreator
+from animation_interactions import InteractionAnimationCreator
+
+"""
+複数キャラクターへのアニメーション一括適用スクリプト
+各クリップのカーブは1回だけ計算し、ボーン構成が同じアーマチュア同士では
+アクションを共有する（作成時間はクリップ数に比例し、キャラクター数には比例しない）
+使用方法: AnimationBatchApplier(pattern="*_Armature").apply()
+"""
+
+def find_armatures(names=None, pattern=None):
+    """名前リストまたは名前パターンでアーマチュアを取得"""
+    armatures = []
+    for obj in bpy.data.objects:
+        if obj.type != 'ARMATURE':
+            continue
+        if names is not None and obj.name not in names:
+            continue
+        if pattern is not None and not fnmatch(obj.name, pattern):
+            continue
+        armatures.append(obj)
+    return armatures
+
+
+class AnimationBatchApplier:
+    def __init__(self, names=None, pattern=None):
+        self.fps = 30
+        self.names = names        # 対象アーマチュア名のリスト（Noneなら全て）
+        self.pattern = pattern    # 対象アーマチュア名のパターン（例: "Misaki*"）
+
+        # 作成するクリップ
+        self.use_idle = True
+        self.walk_presets = ["walk", "run", "sneak", "feminine"]
+        self.interactions = None  # Noneなら全インタラクション
+        self.clip_gap = 10        # NLAで並べるクリップの間隔（フレーム）
+
+        self.engine = GaitEngine(self.fps)
+        self.report = {}
+
+    def collect_clips(self):
+        """全クリップのカーブを計算（アーマチュアに依存しない）"""
+        # 戻り値: [(アクション名, {(ボーン名, プロパティ): (frames, values)}, ループするか)]
+        clips = []
+
+        # 待機
+        if self.use_idle:
+            idle_creator = IdleAnimationCreator()
+            clips.append(("IdleAnimation", idle_creator.compute_curves(), True))
+
+        # 歩行（同じフレーム数のプリセットはまとめて計算）
+        params_list = [GAIT_PRESETS[name] for name in self.walk_presets]
+        for params, curves in zip(params_list, self.engine.compute_batch(params_list)):
+            clips.append((params.name, curves, True))
+
+        # インタラクション（キーリストを配列形式に変換）
+        interaction_creator = InteractionAnimationCreator()
+        interaction_names = self.interactions or list(interaction_creator.definitions.keys())
+        for interaction_name in interaction_names:
+            action_name, channels = interaction_creator.definitions[interaction_name]()
+            curves = {}
+            for bone_name, prop, keys in channels:
+                curves[(bone_name, prop)] = (
+                    [frame for frame, _ in keys],
+                    [value for _, value in keys]
+                )
+            clips.append((action_name, curves, False))
+
+        return clips
+
+    def group_by_layout(self, armatures):
+        """ボーン構成が同じアーマチュアをまとめる"""
+        groups = {}
+        for armature in armatures:
+            layout_hash = ActionCache.compute_hash([], self.fps, ActionCache.bone_layout(armature))
+            groups.setdefault(layout_hash, []).append(armature)
+        return list(groups.values())
+
+    def write_clip(self, action_name, curves, bone_names):
+        """1クリップ分のアクションを作成（存在するボーンのみ）"""
+        # 同名のローカルアクションは再利用して、再実行で .001 を増やさない
+        action = bpy.data.actions.get(action_name)
+        if action and action.library is None:
+            action.fcurves.clear()
+        else:
+            action = bpy.data.actions.new(name=action_name)
+        action.use_fake_user = True  # 未割り当てでも保存されるように
+
+        writer = KeyframeWriter(action)
+        for (bone_name, prop), (frames, values) in curves.items():
+            if bone_name in bone_names:
+                writer.add_bone_curve(bone_name, prop, frames, values)
+        writer.write()
+        return action
+
+    def assign_clip(self, armature, action, loop):
+        """アクションをNLAトラックとして追加（Unityでは1クリップずつ出力される）"""
+        armature.animation_data_create()
+        tracks = armature.animation_data.nla_tracks
+
+        # 再実行時は同じクリップのトラックを作り直す
+        old = tracks.get(action.name)
+        if old is not None:
+            tracks.remove(old)
+
+        # クリップが同時に再生されないよう、既存のストリップの後ろに並べる
+        ends = [strip.frame_end for track in tracks for strip in track.strips]
+        start = int(max(ends)) + self.clip_gap if ends else 1
+
+        track = tracks.new()
+        track.name = action.name
+        strip = track.strips.new(name=action.name, start=start, action=action)
+        if loop:
+            strip.repeat = 10  # ループ設定
+
+    def apply(self):
+        """全対象アーマチュアにアニメーションセットを適用"""
+        armatures = find_armatures(self.names, self.pattern)
+        if not armatures:
+            print("対象のアーマチュアが見つかりません")
+            return {}
+
+        start = time.perf_counter()
+        clips = self.collect_clips()
+        compute_time = time.perf_counter() - start
+
+        groups = self.group_by_layout(armatures)
+        action_count = 0
+
+        for group in groups:
+            bone_names = {bone.name for bone in group[0].pose.bones}
+
+            for action_name, curves, loop in clips:
+                # 構成が複数ある場合は代表アーマチュア名を付けて区別
+                if len(groups) > 1:
+                    action_name = f"{action_name}_{group[0].name}"
+                action = self.write_clip(action_name, curves, bone_names)
+                action_count += 1
+
+                for armature in group:
+                    self.assign_clip(armature, action, loop)
+
+            # アクティブアクションを外し、NLAストリップのみで再生
+            for armature in group:
+                armature.animation_data.action = None
+
+        total_time = time.perf_counter() - start
+        self.report = {
+            "armatures": len(armatures),
+            "layouts": len(groups),
+            "clips": len(clips),
+            "actions": action_count,
+            "compute_time": compute_time,
+            "total_time": total_time
+        }
+        self.print_report()
+        return self.report
+
+    def print_report(self):
+        """適用結果を表示"""
+        report = self.report
+        print("アニメーション一括適用:")
+        print(f"  アーマチュア {report['armatures']}体 / ボーン構成 {report['layouts']}種類")
+        print(f"  クリップ {report['clips']}個 -> アクション {report['actions']}個")
+        print(f"  計算 {report['compute_time'] * 1000:.1f}ms / 合計 {report['total_time'] * 1000:.1f}ms")
+
+# 実行
+if __name__ == "__main__":
+    applier = AnimationBatchApplier()
+    applier.apply()
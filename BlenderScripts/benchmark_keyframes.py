@@ -0,0 +1,107 @@
+import bpy
+import math
+import time
+import numpy as np
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from animation_idle import IdleAnimationCreator
+from keyframe_writer import KeyframeWriter
+
+"""
+キーフレーム書き込みのベンチマークスクリプト
+従来の frame_set + keyframe_insert と KeyframeWriter の一括書き込みを比較
+使用方法: blender --background --python benchmark_keyframes.py
+"""
+
+class KeyframeBenchmark:
+    def __init__(self):
+        self.frame_counts = [30, 120, 600]
+        self.scene_props = 200  # シーンの重さを再現するためのダミーオブジェクト数
+
+    def setup_scene(self):
+        """ベンチマーク用のシーンを準備"""
+        for i in range(self.scene_props):
+            mesh = bpy.data.meshes.new(f"BenchProp_{i}")
+            obj = bpy.data.objects.new(f"BenchProp_{i}", mesh)
+            bpy.context.scene.collection.objects.link(obj)
+
+        armature = None
+        for obj in bpy.data.objects:
+            if obj.type == 'ARMATURE':
+                armature = obj
+                break
+        if not armature:
+            armature = IdleAnimationCreator().create_simple_armature()
+        return armature
+
+    def sample_values(self, frame_count, bone_index):
+        """ボーンごとのサンプル回転値（N×3）"""
+        t = np.arange(frame_count) / frame_count * 2 * math.pi
+        rotation = np.zeros((frame_count, 3))
+        rotation[:, 0] = np.sin(t + bone_index) * 0.3
+        rotation[:, 2] = np.cos(t + bone_index) * 0.1
+        return rotation
+
+    def new_action(self, armature, name):
+        """計測ごとに新しいアクションを割り当て"""
+        action = bpy.data.actions.new(name=name)
+        armature.animation_data_create()
+        armature.animation_data.action = action
+        return action
+
+    def run_legacy(self, armature, frame_count):
+        """従来方式: frame_set + keyframe_insert"""
+        self.new_action(armature, f"Bench_Legacy_{frame_count}")
+        bones = list(armature.pose.bones)
+        values = [self.sample_values(frame_count, i) for i in range(len(bones))]
+
+        start = time.perf_counter()
+        for frame in range(1, frame_count + 1):
+            bpy.context.scene.frame_set(frame)
+            for bone, rotation in zip(bones, values):
+                bone.rotation_euler = rotation[frame - 1]
+                bone.keyframe_insert(data_path="rotation_euler", frame=frame)
+        return time.perf_counter() - start
+
+    def run_batched(self, armature, frame_count):
+        """一括方式: KeyframeWriter"""
+        action = self.new_action(armature, f"Bench_Batched_{frame_count}")
+        bones = list(armature.pose.bones)
+        frames = np.arange(1, frame_count + 1)
+
+        start = time.perf_counter()
+        writer = KeyframeWriter(action)
+        for i, bone in enumerate(bones):
+            writer.add_bone_curve(bone.name, "rotation_euler", frames, self.sample_values(frame_count, i))
+        writer.write()
+        return time.perf_counter() - start
+
+    def run(self):
+        """ベンチマーク実行"""
+        armature = self.setup_scene()
+        bone_count = len(armature.pose.bones)
+        scene = bpy.context.scene
+        frame_current = scene.frame_current
+
+        print("=" * 50)
+        print("キーフレーム書き込みベンチマーク")
+        print(f"ボーン数: {bone_count} / ダミーオブジェクト数: {self.scene_props}")
+        print("=" * 50)
+
+        results = []
+        for frame_count in self.frame_counts:
+            legacy = self.run_legacy(armature, frame_count)
+            batched = self.run_batched(armature, frame_count)
+            results.append((frame_count, legacy, batched))
+            print(f"{frame_count:>5}フレーム: 従来 {legacy * 1000:9.1f}ms / "
+                  f"一括 {batched * 1000:7.1f}ms / {legacy / max(batched, 1e-9):6.1f}倍")
+
+        scene.frame_set(frame_current)
+        return results
+
+# 実行
+if __name__ == "__main__":
+    benchmark = KeyframeBenchmark()
+    benchmark.run()
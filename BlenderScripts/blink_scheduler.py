@@ -0,0 +1,120 @@
+import bpy
+import time
+import numpy as np
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter
+
+"""
+瞬き・微表情スケジューラ
+シード値と統計パラメータ（瞬き間隔の分布、二重瞬きの確率など）から
+長いクリップ全体のイベントを決定的に生成し、キーを一括で書き込む
+"""
+
+# 微表情（目・眉の小さなピクつき）に使うシェイプキー
+TWITCH_CHANNELS = ["brow_up", "brow_worried", "eyes_wide", "eyes_down"]
+
+
+class BlinkScheduler:
+    """シード付きの瞬き・微表情タイムライン生成"""
+
+    def __init__(self, seed=0, fps=30, blink_shape="blink"):
+        self.seed = seed
+        self.fps = fps
+        self.blink_shape = blink_shape
+
+        # 瞬き（間隔はガンマ分布）
+        self.mean_interval = 4.0            # 平均間隔（秒）
+        self.interval_shape = 4.0           # ガンマ分布の形状（大きいほど規則的）
+        self.min_interval = 0.8             # 最短間隔（秒）
+        self.double_blink_probability = 0.15
+        self.double_blink_gap = 8           # 二重瞬きの間隔（フレーム）
+        self.close_frames = 2               # 閉じるまでのフレーム数
+        self.open_frames = 3                # 開くまでのフレーム数
+
+        # 微表情（間隔は指数分布）
+        self.twitch_channels = list(TWITCH_CHANNELS)
+        self.twitch_interval = 2.5          # 平均間隔（秒）
+        self.twitch_strength = (0.1, 0.3)   # 強さの範囲
+        self.twitch_frames = (4, 10)        # 長さの範囲（フレーム）
+
+    def definition(self):
+        """生成結果を決める全パラメータ（キャッシュのハッシュ計算用）"""
+        return {key: value for key, value in self.__dict__.items()}
+
+    def event_times(self, rng, mean_interval, total_frames, margin, shape=None):
+        """区間内のイベント開始フレームを一括生成"""
+        # 必要数より多めにサンプルしてから範囲外を切り捨てる
+        count = int(total_frames / (mean_interval * self.fps) * 2) + 8
+        if shape:
+            intervals = rng.gamma(shape, mean_interval / shape, count)
+        else:
+            intervals = rng.exponential(mean_interval, count)
+        intervals = np.maximum(intervals, self.min_interval) * self.fps
+        frames = np.round(np.cumsum(intervals)).astype(np.int64)
+        return frames[frames < total_frames - margin]
+
+    def generate(self, total_frames):
+        """全イベントのカーブを計算"""
+        # 戻り値: {シェイプキー名: (frames, values)}
+        rng = np.random.default_rng(self.seed)
+        curves = {}
+
+        # 瞬き（ループの継ぎ目にかからないよう末尾を空ける）
+        margin = self.double_blink_gap + self.close_frames + self.open_frames + 1
+        blinks = self.event_times(rng, self.mean_interval, total_frames, margin, self.interval_shape)
+        doubles = blinks[rng.random(len(blinks)) < self.double_blink_probability] + self.double_blink_gap
+        blinks = np.sort(np.concatenate((blinks, doubles)))
+
+        offsets = np.array([-self.close_frames, 0, self.open_frames])
+        frames = (blinks[:, None] + offsets[None, :]).ravel()
+        values = np.tile([0.0, 1.0, 0.0], len(blinks))
+        curves[self.blink_shape] = (frames, values)
+
+        # 微表情（同時に1つだけ発生させるので、同じチャンネル内で重ならない）
+        if self.twitch_channels:
+            twitches = self.event_times(rng, self.twitch_interval, total_frames, self.twitch_frames[1] + 1)
+            channels = rng.integers(0, len(self.twitch_channels), len(twitches))
+            strengths = rng.uniform(*self.twitch_strength, len(twitches))
+            lengths = rng.integers(self.twitch_frames[0], self.twitch_frames[1] + 1, len(twitches))
+
+            for index, shape_name in enumerate(self.twitch_channels):
+                selected = channels == index
+                if not selected.any():
+                    continue
+                starts = twitches[selected]
+                frames = np.stack((starts, starts + 2, starts + lengths[selected]), axis=1).ravel()
+                values = np.stack((np.zeros(len(starts)), strengths[selected],
+                                   np.zeros(len(starts))), axis=1).ravel()
+                curves[shape_name] = (frames, values)
+
+        return curves
+
+    def write(self, shape_keys, action, total_frames):
+        """生成したカーブをアクションに一括書き込み（存在するシェイプキーのみ）"""
+        start = time.perf_counter()
+        curves = self.generate(total_frames)
+        generate_time = time.perf_counter() - start
+
+        writer = KeyframeWriter(action)
+        for shape_name, (frames, values) in curves.items():
+            if shape_name in shape_keys.key_blocks:
+                writer.add_shape_key_curve(shape_name, frames, values)
+        key_count = writer.write()
+
+        print(f"瞬きスケジュール: {total_frames}フレーム / {key_count}キー / "
+              f"生成 {generate_time * 1000:.1f}ms / 合計 {(time.perf_counter() - start) * 1000:.1f}ms")
+        return key_count
+
+# 実行
+if __name__ == "__main__":
+    # 10分間のタイムラインを生成して所要時間を確認
+    scheduler = BlinkScheduler(seed=1)
+    start = time.perf_counter()
+    curves = scheduler.generate(30 * 600)
+    elapsed = time.perf_counter() - start
+    for shape_name, (frames, values) in curves.items():
+        print(f"  {shape_name}: {len(frames)}キー")
+    print(f"生成時間: {elapsed * 1000:.2f}ms")
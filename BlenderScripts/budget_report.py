@@ -0,0 +1,237 @@
+import bpy
+import json
+import numpy as np
+from pathlib import Path
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mesh_builder import PART_ATTRIBUTE
+
+"""
+アセットのポリゴン・頂点・マテリアル予算の集計と検査
+元のパーツ（頭・髪・制服・アクセサリーなど）ごとに三角形数・頂点数・マテリアル数を集計し、
+アセットの種類ごとの予算と比較して機械可読なレポート（JSON）を書き出す
+"""
+
+REPORT_DIR = Path(__file__).parent.parent / "BlenderAssets" / "Reports"
+
+# アセットの種類ごとの予算
+ASSET_BUDGETS = {
+    # メインキャラクター
+    "hero": {
+        "triangles": 20000,
+        "vertices": 15000,
+        "shape_keys": 64,
+        "bones": 80,
+        "materials": 8,
+        "uv_sets": 2,
+        "categories": {
+            "head": 4000,
+            "hair": 6000,
+            "eyes": 1000,
+            "body": 4000,
+            "uniform": 4000,
+            "accessories": 2000
+        }
+    },
+    # モブキャラクター
+    "npc": {
+        "triangles": 4000,
+        "vertices": 3000,
+        "shape_keys": 8,
+        "bones": 40,
+        "materials": 4,
+        "uv_sets": 1,
+        "categories": {
+            "head": 800,
+            "hair": 1200,
+            "eyes": 200,
+            "body": 1200,
+            "uniform": 800,
+            "accessories": 400
+        }
+    },
+    # 小物・背景
+    "prop": {
+        "triangles": 2000,
+        "vertices": 2000,
+        "shape_keys": 0,
+        "bones": 0,
+        "materials": 2,
+        "uv_sets": 2,
+        "categories": {}
+    }
+}
+
+# パーツ名の先頭 → 分類（上から順に判定し、該当しないものはアクセサリー）
+PART_CATEGORIES = [
+    ("Head", "head"),
+    ("Hair", "hair"),
+    ("Bangs", "hair"),
+    ("SideHair", "hair"),
+    ("TwinTail", "hair"),
+    ("Ponytail", "hair"),
+    ("Eye", "eyes"),
+    ("Body", "body"),
+    ("UpperArm", "body"),
+    ("LowerArm", "body"),
+    ("Hand", "body"),
+    ("Thigh", "body"),
+    ("Shin", "body"),
+    ("Foot", "body"),
+    ("Top", "uniform"),
+    ("Skirt", "uniform"),
+    ("Jacket", "uniform"),
+    ("Jersey", "uniform"),
+    ("Shorts", "uniform"),
+    ("Apron", "uniform")
+]
+
+
+def part_category(name):
+    """パーツ名の分類"""
+    for prefix, category in PART_CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return "accessories"
+
+
+def bone_count(obj):
+    """メッシュを変形するアーマチュアのボーン数"""
+    armature = obj.find_armature()
+    if armature is None:
+        for modifier in obj.modifiers:
+            if modifier.type == 'ARMATURE' and modifier.object is not None:
+                armature = modifier.object
+                break
+    return len(armature.data.bones) if armature is not None else 0
+
+
+class BudgetAnalyzer:
+    """アセットの予算の集計・検査"""
+
+    def __init__(self, report_dir=REPORT_DIR):
+        self.report_dir = Path(report_dir)
+        self.reports = []
+
+    def face_arrays(self, mesh):
+        """面ごとの三角形数・パーツ番号・マテリアル番号と、各面の頂点番号"""
+        count = len(mesh.polygons)
+        loop_totals = np.empty(count, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        materials = np.empty(count, dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", materials)
+
+        parts = np.full(count, -1, dtype=np.int32)
+        attribute = mesh.attributes.get(PART_ATTRIBUTE)
+        if attribute is not None and attribute.domain == 'FACE':
+            attribute.data.foreach_get("value", parts)
+
+        vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", vertex_indices)
+        return loop_totals - 2, parts, materials, loop_totals, vertex_indices
+
+    def analyze(self, obj, asset_class="hero"):
+        """オブジェクトを集計して予算と比較"""
+        if asset_class not in ASSET_BUDGETS:
+            raise ValueError(f"未知のアセット分類です: {asset_class}")
+        budget = ASSET_BUDGETS[asset_class]
+        mesh = obj.data
+        triangles, parts, materials, loop_totals, vertex_indices = self.face_arrays(mesh)
+        part_names = list(mesh.get("part_names", []))
+
+        # 面の各ループがどのパーツに属するか
+        loop_parts = np.repeat(parts, loop_totals)
+
+        breakdown = {}
+        for index in np.unique(parts):
+            name = part_names[index] if 0 <= index < len(part_names) else "(unnamed)"
+            selected = parts == index
+            breakdown[name] = {
+                "category": part_category(name) if index >= 0 else "accessories",
+                "triangles": int(triangles[selected].sum()),
+                "vertices": int(len(np.unique(vertex_indices[loop_parts == index]))),
+                "materials": sorted(int(m) for m in np.unique(materials[selected]))
+            }
+
+        categories = {}
+        for part in breakdown.values():
+            category = categories.setdefault(part["category"], {"triangles": 0, "vertices": 0})
+            category["triangles"] += part["triangles"]
+            category["vertices"] += part["vertices"]
+
+        used_materials = {slot.material.name for slot in obj.material_slots if slot.material is not None}
+        shape_keys = mesh.shape_keys.key_blocks if mesh.shape_keys else []
+        totals = {
+            "triangles": int(triangles.sum()),
+            "vertices": len(mesh.vertices),
+            "shape_keys": max(len(shape_keys) - 1, 0),
+            "bones": bone_count(obj),
+            "materials": len(used_materials),
+            "uv_sets": len(mesh.uv_layers)
+        }
+
+        violations = []
+        for metric, value in totals.items():
+            if value > budget[metric]:
+                violations.append({"metric": metric, "value": value, "budget": budget[metric]})
+        for category, limit in budget["categories"].items():
+            value = categories.get(category, {}).get("triangles", 0)
+            if value > limit:
+                violations.append({"metric": f"{category}.triangles", "value": value, "budget": limit})
+
+        report = {
+            "asset": obj.name,
+            "asset_class": asset_class,
+            "passed": not violations,
+            "totals": totals,
+            "categories": categories,
+            "parts": breakdown,
+            "violations": violations
+        }
+        self.reports.append(report)
+        return report
+
+    def write(self, filename="budget_report.json"):
+        """全レポートをJSONで書き出す"""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / filename
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "passed": all(report["passed"] for report in self.reports),
+                "assets": self.reports
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+    def enforce(self):
+        """予算を超えたアセットがあれば中断（RuntimeError）"""
+        failed = [report for report in self.reports if not report["passed"]]
+        if failed:
+            details = [
+                f"{report['asset']}: {violation['metric']} {violation['value']} > {violation['budget']}"
+                for report in failed for violation in report["violations"]
+            ]
+            raise RuntimeError("予算を超えたアセットがあります:\n  " + "\n  ".join(details))
+
+    def print_report(self, report):
+        """1アセットの集計を表示"""
+        totals = report["totals"]
+        status = "OK" if report["passed"] else "予算超過"
+        print(f"予算 [{report['asset_class']}] {report['asset']}: {status}")
+        print(f"  {totals['triangles']}三角形 / {totals['vertices']}頂点 / シェイプキー {totals['shape_keys']} / "
+              f"ボーン {totals['bones']} / マテリアル {totals['materials']} / UV {totals['uv_sets']}")
+        for category, values in sorted(report["categories"].items()):
+            print(f"  {category}: {values['triangles']}三角形 / {values['vertices']}頂点")
+        for violation in report["violations"]:
+            print(f"  ! {violation['metric']}: {violation['value']} (予算 {violation['budget']})")
+
+# 実行
+if __name__ == "__main__":
+    # 選択中のメッシュを検査
+    analyzer = BudgetAnalyzer()
+    for obj in bpy.context.selected_objects:
+        if obj.type == 'MESH':
+            analyzer.print_report(analyzer.analyze(obj))
+    print(f"Report: {analyzer.write()}")
+    analyzer.enforce()
@@ -1,205 +1,157 @@
 import bpy
-import bmesh
 from mathutils import Vector
 import math
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mesh_builder import MeshBuilder, clear_scene
+from material_pool import material_pool
+from budget_report import BudgetAnalyzer
+from hair_generator import HairGenerator, PIN_GROUP
 
 """
 Blender用美少女キャラクターベースモデル生成スクリプト
 使用方法: Blenderのスクリプトエディタで実行
 """
 
+# マテリアルスロット番号（add_materials の追加順）
+SKIN = 0
+HAIR = 1
+CLOTH = 2
+
 class AnimeCharacterCreator:
     def __init__(self):
         self.clean_scene()
+        self.builder = None
+        self.hair_vertex_budget = 600  # 髪の頂点数（物理演算のコストに比例）
         
     def clean_scene(self):
         """シーンをクリーンアップ"""
-        bpy.ops.object.select_all(action='SELECT')
-        bpy.ops.object.delete(use_global=False)
+        clear_scene()
         
     def create_head(self):
         """アニメ風の頭部を作成"""
         # UV球を作成して変形
-        bpy.ops.mesh.primitive_uv_sphere_add(
+        head = self.builder.add_uv_sphere(
             segments=16, 
             ring_count=8,
             radius=1.0,
-            location=(0, 0, 1.6)
+            name="Head",
+            material=SKIN
         )
-        head = bpy.context.active_object
-        head.name = "Head"
         
         # 頭部を変形（アニメ風に）
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.transform.resize(value=(0.9, 0.8, 1.0))
+        self.builder.resize(head, (0.9, 0.8, 1.0))
         
         # 顔の下部を平らに
-        bm = bmesh.from_edit_mesh(head.data)
-        for vert in bm.verts:
-            if vert.co.z < -0.3:
-                vert.co.z *= 0.5
-        bmesh.update_edit_mesh(head.data)
-        
-        bpy.ops.object.mode_set(mode='OBJECT')
-        
-        # スムーズシェーディング
-        bpy.ops.object.shade_smooth()
+        self.builder.deform(head, [
+            {"kernel": "scale", "where": [["z", "<", -0.3]], "value": [1, 1, 0.5]}
+        ])
         
-        return head
+        return self.builder.place(head, location=(0, 0, 1.6))
         
     def create_body(self):
         """シンプルな体を作成"""
         # 胴体
-        bpy.ops.mesh.primitive_cylinder_add(
+        body = self.builder.add_cylinder(
             vertices=8,
             radius=0.4,
             depth=1.2,
-            location=(0, 0, 0.6)
+            name="Body",
+            material=CLOTH
         )
-        body = bpy.context.active_object
-        body.name = "Body"
         
         # 胴体を変形
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.transform.resize(value=(0.8, 0.6, 1.0))
-        bpy.ops.object.mode_set(mode='OBJECT')
+        self.builder.resize(body, (0.8, 0.6, 1.0))
         
-        bpy.ops.object.shade_smooth()
-        
-        return body
+        return self.builder.place(body, location=(0, 0, 0.6))
         
     def create_arms(self):
         """腕を作成"""
+        builder = self.builder
         arms = []
         
         for side, x_pos in [("L", -0.5), ("R", 0.5)]:
             # 上腕
-            bpy.ops.mesh.primitive_cylinder_add(
+            upper_arm = builder.add_cylinder(
                 vertices=8,
                 radius=0.12,
                 depth=0.5,
-                location=(x_pos, 0, 0.9),
-                rotation=(0, math.radians(90), 0)
+                name=f"UpperArm_{side}",
+                material=SKIN
             )
-            upper_arm = bpy.context.active_object
-            upper_arm.name = f"UpperArm_{side}"
+            builder.place(upper_arm, location=(x_pos, 0, 0.9), rotation=(0, math.radians(90), 0))
             
             # 前腕
-            bpy.ops.mesh.primitive_cylinder_add(
+            lower_arm = builder.add_cylinder(
                 vertices=8,
                 radius=0.1,
                 depth=0.5,
-                location=(x_pos * 1.5, 0, 0.9),
-                rotation=(0, math.radians(90), 0)
+                name=f"LowerArm_{side}",
+                material=SKIN
             )
-            lower_arm = bpy.context.active_object
-            lower_arm.name = f"LowerArm_{side}"
+            builder.place(lower_arm, location=(x_pos * 1.5, 0, 0.9), rotation=(0, math.radians(90), 0))
             
             # 手
-            bpy.ops.mesh.primitive_uv_sphere_add(
+            hand = builder.add_uv_sphere(
                 segments=8,
                 ring_count=4,
                 radius=0.15,
-                location=(x_pos * 2, 0, 0.9)
+                name=f"Hand_{side}",
+                material=SKIN
             )
-            hand = bpy.context.active_object
-            hand.name = f"Hand_{side}"
-            
-            arms.extend([upper_arm, lower_arm, hand])
+            builder.place(hand, location=(x_pos * 2, 0, 0.9))
             
-        # スムーズシェーディング
-        for arm in arms:
-            arm.select_set(True)
-            bpy.context.view_layer.objects.active = arm
-            bpy.ops.object.shade_smooth()
-            arm.select_set(False)
+            arms.extend(upper_arm + lower_arm + hand)
             
         return arms
         
     def create_legs(self):
         """脚を作成"""
+        builder = self.builder
         legs = []
         
         for side, x_pos in [("L", -0.2), ("R", 0.2)]:
             # 太もも
-            bpy.ops.mesh.primitive_cylinder_add(
+            thigh = builder.add_cylinder(
                 vertices=8,
                 radius=0.15,
                 depth=0.6,
-                location=(x_pos, 0, -0.3)
+                name=f"Thigh_{side}",
+                material=SKIN
             )
-            thigh = bpy.context.active_object
-            thigh.name = f"Thigh_{side}"
+            builder.place(thigh, location=(x_pos, 0, -0.3))
             
             # すね
-            bpy.ops.mesh.primitive_cylinder_add(
+            shin = builder.add_cylinder(
                 vertices=8,
                 radius=0.12,
                 depth=0.6,
-                location=(x_pos, 0, -0.9)
+                name=f"Shin_{side}",
+                material=SKIN
             )
-            shin = bpy.context.active_object
-            shin.name = f"Shin_{side}"
+            builder.place(shin, location=(x_pos, 0, -0.9))
             
             # 足
-            bpy.ops.mesh.primitive_cube_add(
-                size=0.3,
-                location=(x_pos, 0.1, -1.3)
-            )
-            foot = bpy.context.active_object
-            foot.name = f"Foot_{side}"
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.transform.resize(value=(0.8, 1.5, 0.3))
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            legs.extend([thigh, shin, foot])
+            foot = builder.add_cube(size=0.3, name=f"Foot_{side}", material=SKIN)
+            builder.resize(foot, (0.8, 1.5, 0.3))
+            builder.place(foot, location=(x_pos, 0.1, -1.3))
             
-        # スムーズシェーディング
-        for leg in legs:
-            leg.select_set(True)
-            bpy.context.view_layer.objects.active = leg
-            bpy.ops.object.shade_smooth()
-            leg.select_set(False)
+            legs.extend(thigh + shin + foot)
             
         return legs
         
     def create_hair(self):
-        """髪の毛を作成（シンプルなメッシュ）"""
-        # ベースとなる球を作成
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            segments=16,
-            ring_count=8,
+        """髪の毛を作成（顔の部分を開けたシェル＋短冊、頂点数は予算内）"""
+        hair = HairGenerator(
+            self.builder,
+            vertex_budget=self.hair_vertex_budget,
             radius=1.1,
-            location=(0, 0, 1.7)
-        )
-        hair = bpy.context.active_object
-        hair.name = "Hair"
-        
-        # 髪の形に変形
-        bpy.ops.object.mode_set(mode='EDIT')
-        bm = bmesh.from_edit_mesh(hair.data)
-        
-        for vert in bm.verts:
-            # 前髪
-            if vert.co.y > 0 and vert.co.z > 0:
-                vert.co.y *= 1.2
-            # 後ろ髪を長く
-            if vert.co.y < 0:
-                vert.co.z -= 0.3
-                vert.co.y *= 1.3
-            # 顔の部分を削除
-            if vert.co.z < 0.5 and vert.co.y > -0.3:
-                vert.co = (0, 0, 0)
-                
-        bmesh.update_edit_mesh(hair.data)
-        bpy.ops.mesh.remove_doubles()
-        bpy.ops.object.mode_set(mode='OBJECT')
-        
-        bpy.ops.object.shade_smooth()
-        
-        return hair
+            material=HAIR
+        ).build()
+        
+        return self.builder.place(hair, location=(0, 0, 1.7))
         
     def create_eyes(self):
         """アニメ風の大きな目を作成"""
@@ -207,37 +159,24 @@ class AnimeCharacterCreator:
         
         for side, x_pos in [("L", -0.25), ("R", 0.25)]:
             # 目の球体
-            bpy.ops.mesh.primitive_uv_sphere_add(
+            eye = self.builder.add_uv_sphere(
                 segments=16,
                 ring_count=8,
                 radius=0.15,
-                location=(x_pos, 0.7, 1.6)
+                name=f"Eye_{side}",
+                material=HAIR
             )
-            eye = bpy.context.active_object
-            eye.name = f"Eye_{side}"
             
             # 目を平らに変形
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.transform.resize(value=(1.0, 0.3, 1.2))
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            eyes.append(eye)
+            self.builder.resize(eye, (1.0, 0.3, 1.2))
+            eyes.extend(self.builder.place(eye, location=(x_pos, 0.7, 1.6)))
             
         return eyes
         
     def join_all_parts(self):
-        """全パーツを結合"""
-        bpy.ops.object.select_all(action='SELECT')
-        bpy.ops.object.join()
-        
-        character = bpy.context.active_object
-        character.name = "AnimeCharacter"
-        
-        # 原点を足元に設定
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='BOUNDS')
+        """全パーツを1つのメッシュとして書き込み"""
+        # 原点を重心に設定
+        character = self.builder.to_object("AnimeCharacter", origin='CENTER_OF_MASS')
         character.location = (0, 0, 1.5)
         
         return character
@@ -246,20 +185,16 @@ class AnimeCharacterCreator:
         """基本マテリアルを追加"""
         character = bpy.context.active_object
         
+        pool = material_pool()
+        
         # 肌マテリアル
-        skin_mat = bpy.data.materials.new(name="Skin")
-        skin_mat.use_nodes = True
-        skin_mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (1.0, 0.8, 0.7, 1.0)
+        skin_mat = pool.get("Skin", (1.0, 0.8, 0.7, 1.0))
         
         # 髪マテリアル
-        hair_mat = bpy.data.materials.new(name="Hair")
-        hair_mat.use_nodes = True
-        hair_mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (0.8, 0.5, 0.3, 1.0)
+        hair_mat = pool.get("Hair", (0.8, 0.5, 0.3, 1.0))
         
         # 服マテリアル
-        cloth_mat = bpy.data.materials.new(name="Cloth")
-        cloth_mat.use_nodes = True
-        cloth_mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (0.2, 0.3, 0.8, 1.0)
+        cloth_mat = pool.get("Cloth", (0.2, 0.3, 0.8, 1.0))
         
         # マテリアルを割り当て
         character.data.materials.append(skin_mat)
@@ -270,7 +205,8 @@ class AnimeCharacterCreator:
         """キャラクターを作成"""
         print("Creating anime character base...")
         
-        # 各パーツを作成
+        # 各パーツを作成（すべて1つのbmeshに追加）
+        self.builder = MeshBuilder()
         self.create_head()
         self.create_body()
         self.create_arms()
@@ -278,12 +214,19 @@ class AnimeCharacterCreator:
         self.create_hair()
         self.create_eyes()
         
+        # 髪以外の頂点は物理演算で固定
+        self.builder.fill_weights(PIN_GROUP, 1.0)
+        
         # パーツを結合
         self.join_all_parts()
         
         # マテリアルを追加
         self.add_materials()
         
+        # 予算チェック
+        analyzer = BudgetAnalyzer()
+        analyzer.print_report(analyzer.analyze(bpy.context.active_object))
+        
         print("Character creation complete!")
         print("次のステップ:")
         print("1. Sculpt Modeで詳細を追加")
@@ -0,0 +1,199 @@
+import bpy
+import sys
+import math
+import time
+import os
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mesh_builder import MeshBuilder, clear_scene
+from material_pool import material_pool
+from texture_baker import TextureBaker
+from budget_report import BudgetAnalyzer
+from session_manager import BuildSession
+from character_spec import load_spec, find_specs, spec_hash, validate_spec, SPEC_DIR
+
+"""
+キャラクター定義（character_specs/*.json）から3Dモデルを作成する共通エンジン
+キャラクターの追加・全キャラクターの一括再作成にPythonコードの追加は不要
+"""
+
+# 左右対称パーツの側（定義は左側で記述し、右側はX軸で反転して作成）
+SIDES = [("L", 1), ("R", -1)]
+
+
+class CharacterCreator:
+    """キャラクター定義からのモデル作成"""
+
+    def __init__(self, spec, clean=True):
+        self.spec = validate_spec(spec)
+        self.spec_hash = spec_hash(self.spec)
+        self.character_name = spec["name"]
+        self.builder = None
+        self.texture_baker = TextureBaker()
+        if clean:
+            self.clean_scene()
+
+    @classmethod
+    def from_file(cls, path, clean=True):
+        """定義ファイルから作成"""
+        return cls(load_spec(path), clean)
+
+    @classmethod
+    def from_name(cls, name, clean=True):
+        """character_specs 内の定義名（ファイル名）から作成"""
+        return cls.from_file(SPEC_DIR / f"{name.lower()}.json", clean)
+
+    def clean_scene(self):
+        """シーンをクリーンアップ"""
+        clear_scene()
+
+    def material_slots(self):
+        """マテリアル名 → スロット番号"""
+        return {material["name"]: index for index, material in enumerate(self.spec["materials"])}
+
+    def add_part(self, part, slots, name, mirror=1):
+        """1つのパーツを追加（mirror=-1 でX軸反転した位置・回転）"""
+        builder = self.builder
+        add = getattr(builder, f"add_{part['primitive']}")
+        verts = add(
+            name=name,
+            material=slots[part["material"]],
+            smooth=part.get("smooth", True),
+            **part.get("params", {})
+        )
+
+        if "resize" in part:
+            builder.resize(verts, part["resize"])
+        if "deform" in part:
+            builder.deform(verts, part["deform"])
+
+        # X軸反転ではY・Z軸まわりの回転の向きが逆になる
+        for angle, axis in part.get("rotate", []):
+            sign = mirror if axis in ('Y', 'Z') else 1
+            builder.rotate(verts, math.radians(angle * sign), axis)
+
+        location = part.get("location", [0, 0, 0])
+        rotation = [math.radians(value) for value in part.get("rotation", [0, 0, 0])]
+        return builder.place(
+            verts,
+            location=(location[0] * mirror, location[1], location[2]),
+            rotation=(rotation[0], rotation[1] * mirror, rotation[2] * mirror)
+        )
+
+    def create_parts(self):
+        """定義されたパーツをすべて1つのbmeshに追加"""
+        slots = self.material_slots()
+        for part in self.spec["parts"]:
+            if part.get("symmetric"):
+                for side, mirror in SIDES:
+                    self.add_part(part, slots, f"{part['name']}_{side}", mirror)
+            else:
+                self.add_part(part, slots, part["name"])
+
+    def add_materials(self, obj):
+        """定義のマテリアルをスロット順に設定"""
+        obj.data.materials.clear()
+
+        pool = material_pool()
+        for material in self.spec["materials"]:
+            name = f"{self.character_name}_{material['name']}"
+            params = {key: material[key] for key in ("roughness", "metallic", "ior") if key in material}
+
+            # 細部はベイクしたテクスチャを Base Color に貼る
+            image = None
+            if "texture" in material:
+                image = self.texture_baker.get(
+                    name, material["texture"], material["color"], material.get("texture_size")
+                )
+            mat = pool.get(name, material["color"], image=image, **params)
+            obj.data.materials.append(mat)
+
+    def cached_object(self):
+        """同じ定義から作成済みのモデル（無ければNone）"""
+        obj = bpy.data.objects.get(f"{self.character_name}_Model")
+        if obj is not None and obj.get("spec_hash") == self.spec_hash:
+            return obj
+        return None
+
+    def check_budget(self, character, analyzer=None):
+        """作成したモデルを予算と比較して表示"""
+        analyzer = analyzer or BudgetAnalyzer()
+        report = analyzer.analyze(character, self.spec.get("asset_class", "hero"))
+        analyzer.print_report(report)
+        return report
+
+    def create_character(self, use_cache=True, analyzer=None):
+        """キャラクターを作成"""
+        title = self.spec.get("title")
+        print(f"Creating {self.character_name}" + (f" ({title})..." if title else "..."))
+
+        # 定義が変わっていなければ作成済みのモデルを使う
+        if use_cache:
+            character = self.cached_object()
+            if character is not None:
+                print(f"{self.character_name}: 定義が同じため再作成をスキップ ({self.spec_hash})")
+                self.check_budget(character, analyzer)
+                return character
+
+        # パーツ作成（すべて1つのbmeshに追加）
+        self.builder = MeshBuilder()
+        self.create_parts()
+
+        # メッシュへ1回だけ書き込み
+        character = self.builder.to_object(f"{self.character_name}_Model")
+        self.add_materials(character)
+
+        character.location = self.spec.get("location", (0, 0, 0))
+        character.scale = self.spec.get("scale", (1, 1, 1))
+        character["spec_hash"] = self.spec_hash
+
+        print(f"{self.character_name} model created successfully!")
+        self.check_budget(character, analyzer)
+        return character
+
+
+def create_all_characters(directory=None, spacing=2.5, use_cache=True):
+    """全キャラクターを1つのプロセス・シーンで作成（X方向に並べる）"""
+    # 予算を超えたキャラクターがあれば全員の作成後にRuntimeErrorで中断する
+    start = time.perf_counter()
+    analyzer = BudgetAnalyzer()
+    paths = find_specs(directory)
+
+    # 1件でも定義が不正なら作成前に中断する
+    specs = [load_spec(path) for path in paths]
+
+    characters = []
+    with BuildSession(disable_undo=True) as session:
+        for index, spec in enumerate(specs):
+            with session.step(spec["name"]):
+                creator = CharacterCreator(spec, clean=False)
+                character = creator.create_character(use_cache, analyzer)
+                offset = (index - (len(specs) - 1) / 2) * spacing
+                character.location.x = spec.get("location", (0, 0, 0))[0] + offset
+                characters.append(character)
+
+    print(f"\n{len(characters)}体のキャラクターを作成: {time.perf_counter() - start:.2f}秒")
+    for character in characters:
+        print(f"  {character.name}: {len(character.data.vertices)}頂点 / 定義 {character['spec_hash']}")
+
+    print(f"Budget report: {analyzer.write('characters_budget.json')}")
+    analyzer.enforce()
+    return characters
+
+# 実行
+if __name__ == "__main__":
+    # blender --background --python character_engine.py -- [定義名 ...]
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    clear_scene()
+    try:
+        if args:
+            characters = [CharacterCreator.from_name(name, clean=False).create_character() for name in args]
+        else:
+            characters = create_all_characters()
+    except (ValueError, RuntimeError) as error:
+        # バッチ実行では終了コードで失敗を伝える
+        print(error)
+        sys.exit(1)
+
+    print("\nUse export_to_unity.py to export as FBX")
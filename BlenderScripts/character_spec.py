@@ -0,0 +1,286 @@
+import json
+import hashlib
+from pathlib import Path
+from deform_kernels import AXES, COMPARISONS
+
+"""
+キャラクター定義（JSON）の読み込み・検証・ハッシュ計算
+体型・色・パーツ構成・変形パラメータをデータとして記述し、
+CharacterCreator（character_engine.py）で組み立てる
+"""
+
+SPEC_DIR = Path(__file__).parent / "character_specs"
+
+# プリミティブのパラメータの型（分割数は3以上の整数、長さは正の数）
+SEGMENTS = {"type": "integer", "minimum": 3}
+LENGTH = {"type": "number", "exclusiveMinimum": 0}
+
+# プリミティブごとに指定できるパラメータ
+PRIMITIVE_PARAMS = {
+    "uv_sphere": {"segments": SEGMENTS, "ring_count": SEGMENTS, "radius": LENGTH},
+    "ico_sphere": {"subdivisions": {"type": "integer", "minimum": 1}, "radius": LENGTH},
+    "cylinder": {"vertices": SEGMENTS, "radius": LENGTH, "depth": LENGTH},
+    "cone": {
+        "vertices": SEGMENTS, "radius1": {"type": "number", "minimum": 0},
+        "radius2": {"type": "number", "minimum": 0}, "depth": LENGTH
+    },
+    "cube": {"size": LENGTH},
+    "torus": {
+        "major_radius": LENGTH, "minor_radius": LENGTH,
+        "major_segments": SEGMENTS, "minor_segments": SEGMENTS
+    }
+}
+
+
+def params_schema(primitive):
+    """プリミティブのパラメータのスキーマ"""
+    return {"type": "object", "additionalProperties": False, "properties": PRIMITIVE_PARAMS[primitive]}
+
+
+DEFORM_KERNELS = ["scale", "offset", "shear", "set", "push"]
+
+# 変形の条件・シアーで使える軸名（x, y, z と絶対値の abs_x, abs_y, abs_z）
+AXIS_NAMES = sorted(AXES) + [f"abs_{axis}" for axis in sorted(AXES)]
+
+# rotate で使える回転軸
+ROTATE_AXES = ["X", "Y", "Z"]
+
+# ベイクできるテクスチャのレシピ（texture_baker.py）
+TEXTURES = ["iris", "blush", "stripes"]
+
+VECTOR3 = {"type": "array", "items": {"type": "number"}, "minItems": 3, "maxItems": 3}
+COLOR = {"type": "array", "items": {"type": "number"}, "minItems": 4, "maxItems": 4}
+
+# 変形の条件 [軸名, 比較演算子, 値]
+CONDITION = {
+    "type": "array",
+    "minItems": 3,
+    "maxItems": 3,
+    "prefixItems": [
+        {"type": "string", "enum": AXIS_NAMES},
+        {"type": "string", "enum": sorted(COMPARISONS)},
+        {"type": "number"}
+    ]
+}
+
+
+def deform_schema(kernels, required, **properties):
+    """変形カーネルごとの変形指定のスキーマ（kernel で選ばれる）"""
+    return {
+        "type": "object",
+        "required": ["kernel"] + required,
+        "additionalProperties": False,
+        "properties": {
+            "kernel": {"type": "string", "enum": kernels},
+            "mirror": {"type": "boolean"},
+            "mirror_axis": {"type": "string", "enum": sorted(AXES)},
+            **properties
+        }
+    }
+
+
+# 変形指定（deform_kernels.apply_op が読む項目をカーネルごとに必須にする）
+DEFORM_SCHEMA = {
+    "type": "object",
+    "required": ["kernel"],
+    "properties": {"kernel": {"type": "string", "enum": DEFORM_KERNELS}},
+    "oneOf": [
+        deform_schema(
+            ["scale", "offset", "set"], ["value"],
+            where={"type": "array", "items": CONDITION}, value=VECTOR3
+        ),
+        deform_schema(
+            ["shear"], ["axis", "source", "factor"],
+            where={"type": "array", "items": CONDITION},
+            axis={"type": "string", "enum": sorted(AXES)},
+            source={"type": "string", "enum": AXIS_NAMES},
+            factor={"type": "number"}
+        ),
+        deform_schema(
+            ["push"], ["center", "radius", "offset"],
+            center=VECTOR3, radius={"type": "number"}, offset=VECTOR3
+        )
+    ]
+}
+
+# JSON Schemaのサブセットで記述したキャラクター定義のスキーマ
+SPEC_SCHEMA = {
+    "type": "object",
+    "required": ["name", "materials", "parts"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "asset_class": {"type": "string", "enum": ["hero", "npc", "prop"]},
+        "location": VECTOR3,
+        "scale": VECTOR3,
+        "materials": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "color"],
+                "additionalProperties": False,
+                "properties": {
+                    "name": {"type": "string"},
+                    "color": COLOR,
+                    "roughness": {"type": "number"},
+                    "metallic": {"type": "number"},
+                    "ior": {"type": "number"},
+                    "texture": {"type": "string", "enum": TEXTURES},
+                    "texture_size": {"type": "number"}
+                }
+            }
+        },
+        "parts": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "primitive", "material"],
+                "additionalProperties": False,
+                "properties": {
+                    "name": {"type": "string"},
+                    "primitive": {"type": "string", "enum": sorted(PRIMITIVE_PARAMS)},
+                    "params": {"type": "object"},
+                    "material": {"type": "string"},
+                    "smooth": {"type": "boolean"},
+                    "symmetric": {"type": "boolean"},
+                    "resize": VECTOR3,
+                    "deform": {"type": "array", "items": DEFORM_SCHEMA},
+                    "rotate": {
+                        # [角度（度）, 回転軸]
+                        "type": "array",
+                        "items": {
+                            "type": "array",
+                            "minItems": 2,
+                            "maxItems": 2,
+                            "prefixItems": [
+                                {"type": "number"},
+                                {"type": "string", "enum": ROTATE_AXES}
+                            ]
+                        }
+                    },
+                    "location": VECTOR3,
+                    "rotation": VECTOR3
+                }
+            }
+        }
+    }
+}
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool
+}
+
+
+def schema_errors(value, schema, path="spec"):
+    """スキーマに合わない箇所をすべて列挙"""
+    errors = []
+    expected = schema.get("type")
+    if expected:
+        # boolはintのサブクラスなので数値としては扱わない
+        if not isinstance(value, JSON_TYPES[expected]) or (expected in ("number", "integer") and isinstance(value, bool)):
+            return [f"{path}: {expected} が必要です"]
+
+    if "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: {schema['minimum']} 以上である必要があります")
+    if "exclusiveMinimum" in schema and value <= schema["exclusiveMinimum"]:
+        errors.append(f"{path}: {schema['exclusiveMinimum']} より大きい必要があります")
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} は {schema['enum']} のいずれかである必要があります")
+
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: 必須項目です")
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(schema_errors(item, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties", True) is False:
+                # 綴り間違いの項目を無視せずに報告する
+                errors.append(f"{path}.{key}: 未知の項目です")
+
+    if expected == "array":
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: {schema['minItems']}個以上の要素が必要です")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: {schema['maxItems']}個以下の要素である必要があります")
+        prefix = schema.get("prefixItems", [])
+        for index, item in enumerate(value):
+            if index < len(prefix):
+                errors.extend(schema_errors(item, prefix[index], f"{path}[{index}]"))
+            elif "items" in schema:
+                errors.extend(schema_errors(item, schema["items"], f"{path}[{index}]"))
+
+    if "oneOf" in schema and not errors:
+        errors.extend(one_of_errors(value, schema["oneOf"], path))
+
+    return errors
+
+
+def one_of_errors(value, choices, path):
+    """oneOf の検証（enum で値が選ばれる候補があれば、その候補のエラーだけを報告）"""
+    # すべての候補で必須の項目（kernel など）の値で候補を絞り、分かりやすいエラーにする
+    if isinstance(value, dict):
+        keys = set.intersection(*(set(choice.get("required", [])) for choice in choices))
+        selected = [
+            choice for choice in choices
+            if all(
+                value.get(key) in choice["properties"][key]["enum"]
+                for key in keys if "enum" in choice["properties"].get(key, {})
+            )
+        ]
+        if len(selected) == 1:
+            return schema_errors(value, selected[0], path)
+
+    matched = [choice for choice in choices if not schema_errors(value, choice, path)]
+    if len(matched) != 1:
+        return [f"{path}: 候補のうち1つだけに一致する必要があります（一致 {len(matched)}個）"]
+    return []
+
+
+def validate_spec(spec):
+    """キャラクター定義を検証（不正な場合はValueError）"""
+    errors = schema_errors(spec, SPEC_SCHEMA)
+
+    # スキーマで表せない相互参照のチェック
+    if not errors:
+        material_names = [material["name"] for material in spec["materials"]]
+        for index, part in enumerate(spec["parts"]):
+            path = f"spec.parts[{index}]"
+            if part["material"] not in material_names:
+                errors.append(f"{path}.material: 未定義のマテリアル {part['material']!r} です")
+            # パラメータの名前と値はプリミティブの種類ごとに検証
+            errors.extend(schema_errors(part.get("params", {}), params_schema(part["primitive"]), f"{path}.params"))
+
+    if errors:
+        name = spec.get("name", "?") if isinstance(spec, dict) else "?"
+        raise ValueError(f"キャラクター定義 {name} が不正です:\n  " + "\n  ".join(errors))
+    return spec
+
+
+def load_spec(path):
+    """キャラクター定義ファイルを読み込んで検証"""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    return validate_spec(spec)
+
+
+def find_specs(directory=None):
+    """定義ファイルの一覧（ファイル名順）"""
+    return sorted(Path(directory or SPEC_DIR).glob("*.json"))
+
+
+def spec_hash(spec):
+    """定義内容のハッシュ（ビルドキャッシュのキー）"""
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
@@ -1,21 +1,57 @@
 import bpy
 import bmesh
+import sys
+from pathlib import Path
 from mathutils import Vector
 import math
+import numpy as np
+import os
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from material_pool import material_pool
+from session_manager import BuildSession, clear_scene_data
+from prop_library import PropLibrary
+from static_batcher import StaticBatcher
+from scatter_system import ScatterSystem, set_realize
+from environment_materials import environment_material, assign
+from palette_atlas import PaletteAtlas
+from environment_workers import EnvironmentWorkerPool
 
 """
 ゲーム環境3Dアセット生成スクリプト
 教室、カフェ、公園、ホテルルームなどを自動生成
 """
 
+BLEND_DIR = Path(__file__).parent.parent / "BlenderAssets" / "Environments"
+FBX_DIR = Path(__file__).parent.parent / "UnityProject" / "Assets" / "Models" / "Environments"
+
+# 環境名 → 作成メソッド名
+ENVIRONMENTS = {
+    "classroom": "create_classroom",
+    "cafe": "create_cafe",
+    "park": "create_park",
+    "hotel_room": "create_hotel_room"
+}
+
 class EnvironmentCreator:
     def __init__(self):
         self.clean_scene()
+        self.props = PropLibrary()  # 繰り返し配置する小物はメッシュを共有
+        self.merge_static = True  # エクスポート時に静的なメッシュをマテリアル・セルごとに結合
+        self.merge_shared_props = False  # 共有メッシュの小物も結合する（ドローコールは減るがプレハブ用の共有メッシュは無くなる）
+        self.seed = 0  # 散布の乱数シード
+        self.use_atlas = False  # 単色の小物を1枚のパレット画像にまとめる
+        self.workers = 1  # create_all_environments の並列数（2以上で環境ごとに別のBlenderプロセス）
+        self.job_timeout = 600  # 並列実行時の1環境あたりのタイムアウト（秒）
+        self.tree_density = 0.04  # 公園の木の密度（1平方メートルあたりの最大数）
+        
+        # 公園の小道（XY平面の折れ線）と幅
+        self.path_points = [(-10, 1.2), (-5, 1.0), (0, 1.4), (5, 1.0), (10, 1.2)]
+        self.path_width = 1.5
         
     def clean_scene(self):
-        """シーンをクリーンアップ"""
-        bpy.ops.object.select_all(action='SELECT')
-        bpy.ops.object.delete(use_global=False)
+        """シーンをクリーンアップ（孤立したメッシュ・マテリアルも解放）"""
+        clear_scene_data()
         
     def create_classroom(self):
         """教室環境を生成"""
@@ -25,6 +61,7 @@ class EnvironmentCreator:
         bpy.ops.mesh.primitive_plane_add(size=10, location=(0, 0, 0))
         floor = bpy.context.active_object
         floor.name = "Classroom_Floor"
+        assign(floor, "floor_wood")
         
         # 壁
         self.create_walls(10, 10, 3)
@@ -53,6 +90,7 @@ class EnvironmentCreator:
         bpy.ops.mesh.primitive_plane_add(size=8, location=(0, 0, 0))
         floor = bpy.context.active_object
         floor.name = "Cafe_Floor"
+        assign(floor, "floor_tile")
         
         # 壁（おしゃれな感じ）
         self.create_walls(8, 8, 3, wall_type="cafe")
@@ -78,24 +116,28 @@ class EnvironmentCreator:
         bpy.ops.mesh.primitive_plane_add(size=20, location=(0, 0, 0))
         ground = bpy.context.active_object
         ground.name = "Park_Ground"
+        assign(ground, "grass")
+        
+        # 木の散布範囲（小道とベンチ・街灯の周りには置かない）
+        scatter = ScatterSystem(size=20, seed=self.seed)
+        scatter.exclude_path(self.path_points, self.path_width)
         
         # ベンチ
         for i in range(3):
             x = (i - 1) * 5
             self.create_bench(x, 0, 0)
-            
-        # 木
-        for i in range(5):
-            x = (i - 2) * 4
-            y = 5 if i % 2 == 0 else -5
-            self.create_tree(x, y, 0)
+            scatter.exclude_circle((x, 0), 1.5)
             
         # 街灯
-        self.create_street_lights()
+        for light in self.create_street_lights():
+            scatter.exclude_circle(light.location, 1.0)
         
         # 小道
         self.create_path()
         
+        # 木（形状を共有するインスタンスとして散布）
+        self.create_trees(scatter)
+        
         print("Park created!")
         
     def create_hotel_room(self):
@@ -106,6 +148,7 @@ class EnvironmentCreator:
         bpy.ops.mesh.primitive_plane_add(size=6, location=(0, 0, 0))
         floor = bpy.context.active_object
         floor.name = "Hotel_Floor"
+        assign(floor, "carpet")
         
         # 壁
         self.create_walls(6, 6, 3, wall_type="hotel")
@@ -130,52 +173,61 @@ class EnvironmentCreator:
         
     def create_walls(self, width, depth, height, wall_type="default"):
         """壁を生成"""
+        surface = f"wall_{wall_type}"
+        
         # 前壁
         bpy.ops.mesh.primitive_cube_add(size=1, location=(0, -depth/2, height/2))
         wall = bpy.context.active_object
         wall.scale = (width, 0.1, height)
         wall.name = f"{wall_type}_Wall_Front"
+        assign(wall, surface)
         
         # 後壁
         bpy.ops.mesh.primitive_cube_add(size=1, location=(0, depth/2, height/2))
         wall = bpy.context.active_object
         wall.scale = (width, 0.1, height)
         wall.name = f"{wall_type}_Wall_Back"
+        assign(wall, surface)
         
         # 左壁
         bpy.ops.mesh.primitive_cube_add(size=1, location=(-width/2, 0, height/2))
         wall = bpy.context.active_object
         wall.scale = (0.1, depth, height)
         wall.name = f"{wall_type}_Wall_Left"
+        assign(wall, surface)
         
         # 右壁
         bpy.ops.mesh.primitive_cube_add(size=1, location=(width/2, 0, height/2))
         wall = bpy.context.active_object
         wall.scale = (0.1, depth, height)
         wall.name = f"{wall_type}_Wall_Right"
+        assign(wall, surface)
         
     def create_desk_and_chair(self, x, y, height):
-        """机と椅子を生成"""
-        # 机
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, height))
-        desk = bpy.context.active_object
-        desk.scale = (0.6, 0.4, 0.05)
-        desk.name = f"Desk_{x}_{y}"
-        
-        # 机の脚
+        """机と椅子を生成（形状は共有）"""
+        # 机（天板と脚）
+        materials = (environment_material("wood"), environment_material("metal"))
+        self.props.place("Desk", self.build_desk, f"Desk_{x}_{y}", (x, y, 0), materials=materials, height=height)
+        
+        # 椅子
+        materials = (environment_material("wood"),)
+        self.props.place("Chair", self.build_chair, f"Chair_{x}_{y}", (x, y - 0.5, 0), materials=materials, height=height)
+        
+    def build_desk(self, builder, height):
+        """机の形状（床の位置が原点）"""
+        top = builder.add_cube(size=1, name="Desk", smooth=False)
+        builder.resize(top, (0.6, 0.4, 0.05))
+        builder.place(top, location=(0, 0, height))
+        
         for dx, dy in [(-0.25, -0.15), (0.25, -0.15), (-0.25, 0.15), (0.25, 0.15)]:
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.02, depth=height,
-                location=(x + dx, y + dy, height/2)
-            )
-            leg = bpy.context.active_object
-            leg.name = f"DeskLeg_{x}_{y}"
+            leg = builder.add_cylinder(radius=0.02, depth=height, name="DeskLeg", material=1, smooth=False)
+            builder.place(leg, location=(dx, dy, height/2))
             
-        # 椅子
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y - 0.5, height/2))
-        chair = bpy.context.active_object
-        chair.scale = (0.4, 0.4, 0.05)
-        chair.name = f"Chair_{x}_{y}"
+    def build_chair(self, builder, height):
+        """椅子の形状（床の位置が原点）"""
+        seat = builder.add_cube(size=1, name="Chair", smooth=False)
+        builder.resize(seat, (0.4, 0.4, 0.05))
+        builder.place(seat, location=(0, 0, height/2))
         
     def create_blackboard(self):
         """黒板を生成"""
@@ -185,10 +237,7 @@ class EnvironmentCreator:
         board.name = "Blackboard"
         
         # 黒板マテリアル
-        mat = bpy.data.materials.new(name="Blackboard_Material")
-        mat.use_nodes = True
-        mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (0.1, 0.1, 0.1, 1)
-        board.data.materials.append(mat)
+        assign(board, "blackboard")
         
     def create_windows(self):
         """窓を生成"""
@@ -198,13 +247,8 @@ class EnvironmentCreator:
             window.scale = (0.8, 0.05, 1)
             window.name = f"Window_{x}"
             
-            # ガラスマテリアル
-            mat = bpy.data.materials.new(name=f"Glass_{x}")
-            mat.use_nodes = True
-            bsdf = mat.node_tree.nodes["Principled BSDF"]
-            bsdf.inputs[15].default_value = 0  # Transmission
-            bsdf.inputs[14].default_value = 1.45  # IOR
-            window.data.materials.append(mat)
+            # ガラスマテリアル（全窓で共有）
+            assign(window, "glass")
             
     def create_door(self):
         """ドアを生成"""
@@ -212,84 +256,149 @@ class EnvironmentCreator:
         door = bpy.context.active_object
         door.scale = (0.05, 1, 2)
         door.name = "Door"
+        assign(door, "dark_wood")
         
     def create_cafe_table(self, x, y):
-        """カフェテーブルを生成"""
-        # テーブル（丸型）
-        bpy.ops.mesh.primitive_cylinder_add(
-            radius=0.4, depth=0.05,
-            location=(x, y, 0.7)
-        )
-        table = bpy.context.active_object
-        table.name = f"CafeTable_{x}_{y}"
-        
-        # テーブル脚（1本）
-        bpy.ops.mesh.primitive_cylinder_add(
-            radius=0.05, depth=0.7,
-            location=(x, y, 0.35)
-        )
-        leg = bpy.context.active_object
-        leg.name = f"TableLeg_{x}_{y}"
+        """カフェテーブルを生成（形状は共有）"""
+        # テーブル（丸型の天板と脚1本）
+        materials = (environment_material("wood"), environment_material("metal"))
+        self.props.place("CafeTable", self.build_cafe_table, f"CafeTable_{x}_{y}", (x, y, 0), materials=materials)
         
         # 椅子（2脚）
+        materials = (environment_material("wood"),)
         for dy in [-0.6, 0.6]:
-            bpy.ops.mesh.primitive_cylinder_add(
-                radius=0.2, depth=0.05,
-                location=(x, y + dy, 0.4)
-            )
-            seat = bpy.context.active_object
-            seat.name = f"CafeSeat_{x}_{y}"
+            self.props.place("CafeSeat", self.build_cafe_seat, f"CafeSeat_{x}_{y}", (x, y + dy, 0), materials=materials)
             
+    def build_cafe_table(self, builder):
+        """カフェテーブルの形状"""
+        top = builder.add_cylinder(radius=0.4, depth=0.05, name="CafeTable", smooth=False)
+        builder.place(top, location=(0, 0, 0.7))
+        leg = builder.add_cylinder(radius=0.05, depth=0.7, name="TableLeg", material=1, smooth=False)
+        builder.place(leg, location=(0, 0, 0.35))
+        
+    def build_cafe_seat(self, builder):
+        """カフェの椅子の形状"""
+        seat = builder.add_cylinder(radius=0.2, depth=0.05, name="CafeSeat", smooth=False)
+        builder.place(seat, location=(0, 0, 0.4))
+        
     def create_counter(self):
         """カウンターを生成"""
         bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 3.5, 0.5))
         counter = bpy.context.active_object
         counter.scale = (4, 0.5, 1)
         counter.name = "Counter"
+        assign(counter, "wood")
         
         # コーヒーマシン
         bpy.ops.mesh.primitive_cube_add(size=1, location=(1, 3.5, 1.2))
         machine = bpy.context.active_object
         machine.scale = (0.3, 0.3, 0.4)
         machine.name = "CoffeeMachine"
+        assign(machine, "metal")
+        
+    def create_cafe_decorations(self):
+        """カフェの装飾（隅の鉢植え、形状は共有）"""
+        materials = (environment_material("dark_wood"), environment_material("leaves"))
+        for x, y in [(-3.5, -3.5), (3.5, -3.5), (-3.5, 2.5), (3.5, 2.5)]:
+            self.props.place("PottedPlant", self.build_potted_plant, f"PottedPlant_{x}_{y}", (x, y, 0), materials=materials)
+            
+    def build_potted_plant(self, builder):
+        """鉢植えの形状（鉢と葉）"""
+        pot = builder.add_cone(vertices=16, radius1=0.15, radius2=0.2, depth=0.4, name="Pot", smooth=False)
+        builder.place(pot, location=(0, 0, 0.2))
+        leaves = builder.add_ico_sphere(subdivisions=2, radius=0.35, name="PlantLeaves", material=1, smooth=False)
+        builder.place(leaves, location=(0, 0, 0.7))
         
     def create_bench(self, x, y, z):
-        """ベンチを生成"""
-        # 座面
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z + 0.4))
-        seat = bpy.context.active_object
-        seat.scale = (2, 0.5, 0.05)
-        seat.name = f"BenchSeat_{x}"
-        
-        # 背もたれ
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y - 0.2, z + 0.7))
-        back = bpy.context.active_object
-        back.scale = (2, 0.05, 0.5)
-        back.name = f"BenchBack_{x}"
+        """ベンチを生成（形状は共有）"""
+        materials = (environment_material("wood"),)
+        return self.props.place("Bench", self.build_bench, f"Bench_{x}", (x, y, z), materials=materials)
         
-    def create_tree(self, x, y, z):
-        """木を生成"""
-        # 幹
-        bpy.ops.mesh.primitive_cylinder_add(
-            radius=0.2, depth=3,
-            location=(x, y, z + 1.5)
-        )
-        trunk = bpy.context.active_object
-        trunk.name = f"TreeTrunk_{x}_{y}"
+    def build_bench(self, builder):
+        """ベンチの形状（座面と背もたれ）"""
+        seat = builder.add_cube(size=1, name="BenchSeat", smooth=False)
+        builder.resize(seat, (2, 0.5, 0.05))
+        builder.place(seat, location=(0, 0, 0.4))
+        
+        back = builder.add_cube(size=1, name="BenchBack", smooth=False)
+        builder.resize(back, (2, 0.05, 0.5))
+        builder.place(back, location=(0, -0.2, 0.7))
         
-        # 葉（球体）
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            radius=1.5,
-            location=(x, y, z + 3.5)
+    def create_tree(self, x, y, z):
+        """木を生成（形状とマテリアルは共有）"""
+        # 幹はスロット0、葉はスロット1
+        return self.props.place("Tree", self.build_tree, f"Tree_{x}_{y}", (x, y, z), materials=self.tree_materials())
+        
+    def tree_materials(self):
+        """木のマテリアル（幹・葉）"""
+        return (environment_material("bark"), environment_material("leaves"))
+        
+    def build_tree(self, builder):
+        """木の形状（幹と葉の球体）"""
+        trunk = builder.add_cylinder(radius=0.2, depth=3, name="TreeTrunk", material=0, smooth=False)
+        builder.place(trunk, location=(0, 0, 1.5))
+        
+        leaves = builder.add_uv_sphere(radius=1.5, name="TreeLeaves", material=1, smooth=False)
+        builder.place(leaves, location=(0, 0, 3.5))
+        
+    def create_trees(self, scatter):
+        """公園の木を散布（エクスポート時まではインスタンスのまま）"""
+        tree = self.props.mesh("Tree", self.build_tree, materials=self.tree_materials())
+        return scatter.scatter(
+            "Park_Trees", [tree],
+            density=self.tree_density, distance_min=2.5, scale=(0.7, 1.2)
         )
-        leaves = bpy.context.active_object
-        leaves.name = f"TreeLeaves_{x}_{y}"
         
-        # 葉のマテリアル
-        mat = bpy.data.materials.new(name=f"Leaves_{x}_{y}")
-        mat.use_nodes = True
-        mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (0.2, 0.6, 0.2, 1)
-        leaves.data.materials.append(mat)
+    def create_path(self):
+        """小道を生成（折れ線に沿った帯）"""
+        half = self.path_width / 2
+        verts = []
+        for i, (x, y) in enumerate(self.path_points):
+            # 前後の点の方向に垂直な向きに幅を付ける
+            prev_x, prev_y = self.path_points[max(i - 1, 0)]
+            next_x, next_y = self.path_points[min(i + 1, len(self.path_points) - 1)]
+            dx, dy = next_x - prev_x, next_y - prev_y
+            length = math.hypot(dx, dy)
+            nx, ny = -dy / length * half, dx / length * half
+            verts.extend([(x - nx, y - ny, 0.01), (x + nx, y + ny, 0.01)])
+        faces = [(2 * i, 2 * i + 2, 2 * i + 3, 2 * i + 1) for i in range(len(self.path_points) - 1)]
+        
+        mesh = bpy.data.meshes.new("Park_Path")
+        mesh.from_pydata(verts, [], faces)
+        mesh.materials.append(environment_material("path"))
+        path = bpy.data.objects.new("Park_Path", mesh)
+        bpy.context.scene.collection.objects.link(path)
+        return path
+        
+    def create_street_lights(self, spacing=6.0, offset=1.5, height=3.0):
+        """小道沿いに街灯を生成（柱の形状は共有）"""
+        lights = []
+        start_x, start_y = self.path_points[0]
+        end_x, _ = self.path_points[-1]
+        count = int((end_x - start_x) // spacing)
+        for i in range(count):
+            x = start_x + spacing * (i + 0.5)
+            y = float(np.interp(x, [p[0] for p in self.path_points], [p[1] for p in self.path_points])) + offset
+            self.props.place(
+                "StreetLightPole", self.build_street_light, f"StreetLight_{i}", (x, y, 0),
+                materials=(environment_material("metal"), environment_material("lamp_shade")), height=height
+            )
+            
+            light_data = bpy.data.lights.new(f"StreetLight_{i}_Lamp", type='POINT')
+            light_data.energy = 100
+            light_data.color = (1.0, 0.85, 0.6)
+            lamp = bpy.data.objects.new(f"StreetLight_{i}_Lamp", light_data)
+            lamp.location = (x, y, height + 0.1)
+            bpy.context.scene.collection.objects.link(lamp)
+            lights.append(lamp)
+        return lights
+        
+    def build_street_light(self, builder, height):
+        """街灯の柱の形状"""
+        pole = builder.add_cylinder(vertices=12, radius=0.06, depth=height, name="StreetLightPole", smooth=False)
+        builder.place(pole, location=(0, 0, height/2))
+        head = builder.add_uv_sphere(segments=12, ring_count=6, radius=0.18, name="StreetLightHead", material=1)
+        builder.place(head, location=(0, 0, height + 0.1))
         
     def create_bed(self, x, y, z):
         """ベッドを生成（重要な家具）"""
@@ -298,6 +407,7 @@ class EnvironmentCreator:
         mattress = bpy.context.active_object
         mattress.scale = (1, 2, 0.3)
         mattress.name = "Bed_Mattress"
+        assign(mattress, "sheets")
         
         # 枕
         for dy in [0.8, -0.8]:
@@ -305,18 +415,53 @@ class EnvironmentCreator:
             pillow = bpy.context.active_object
             pillow.scale = (0.4, 0.3, 0.1)
             pillow.name = f"Pillow_{dy}"
+            assign(pillow, "sheets")
             
         # ベッドフレーム
         bpy.ops.mesh.primitive_cube_add(size=1, location=(x, y, z + 0.15))
         frame = bpy.context.active_object
         frame.scale = (1.1, 2.1, 0.15)
         frame.name = "Bed_Frame"
-        
-        # シーツマテリアル
-        mat = bpy.data.materials.new(name="Bed_Sheets")
-        mat.use_nodes = True
-        mat.node_tree.nodes["Principled BSDF"].inputs[0].default_value = (0.9, 0.9, 1.0, 1)
-        mattress.data.materials.append(mat)
+        assign(frame, "wood")
+        
+    def create_side_table(self, x, y, z):
+        """サイドテーブルを生成（形状は共有）"""
+        materials = (environment_material("wood"),)
+        return self.props.place("SideTable", self.build_side_table, f"SideTable_{x}", (x, y, z), materials=materials)
+        
+    def build_side_table(self, builder):
+        """サイドテーブルの形状（箱型）"""
+        table = builder.add_cube(size=1, name="SideTable", smooth=False)
+        builder.resize(table, (0.5, 0.4, 0.5))
+        builder.place(table, location=(0, 0, 0.25))
+        
+    def create_sofa(self, x, y, z):
+        """ソファを生成"""
+        materials = (environment_material("fabric"),)
+        return self.props.place("Sofa", self.build_sofa, "Sofa", (x, y, z), materials=materials)
+        
+    def build_sofa(self, builder):
+        """ソファの形状（座面・背もたれ・肘掛け）"""
+        seat = builder.add_cube(size=1, name="SofaSeat", smooth=False)
+        builder.resize(seat, (1.6, 0.7, 0.4))
+        builder.place(seat, location=(0, 0, 0.2))
+        
+        back = builder.add_cube(size=1, name="SofaBack", smooth=False)
+        builder.resize(back, (1.6, 0.2, 0.5))
+        builder.place(back, location=(0, -0.25, 0.65))
+        
+        for dx in [-0.8, 0.8]:
+            arm = builder.add_cube(size=1, name="SofaArm", smooth=False)
+            builder.resize(arm, (0.15, 0.7, 0.3))
+            builder.place(arm, location=(dx, 0, 0.55))
+            
+    def create_bathroom_door(self):
+        """バスルームのドアを生成"""
+        bpy.ops.mesh.primitive_cube_add(size=1, location=(-2.95, 2, 1))
+        door = bpy.context.active_object
+        door.scale = (0.05, 0.9, 2)
+        door.name = "BathroomDoor"
+        assign(door, "dark_wood")
         
     def create_mood_lighting(self):
         """ムード照明を生成"""
@@ -335,34 +480,77 @@ class EnvironmentCreator:
             lamp.data.color = (1.0, 0.7, 0.5)
             lamp.name = f"BedsideLamp_{x}"
             
-    def create_all_environments(self):
-        """全環境を個別ファイルとして生成"""
-        environments = [
-            ("classroom", self.create_classroom),
-            ("cafe", self.create_cafe),
-            ("park", self.create_park),
-            ("hotel_room", self.create_hotel_room)
-        ]
-        
-        for name, create_func in environments:
-            # シーンクリア
-            self.clean_scene()
+    def create_environment(self, name, export=False):
+        """1つの環境を作成して.blendに保存（export=True ならFBXも書き出す）"""
+        if name not in ENVIRONMENTS:
+            raise ValueError(f"未知の環境です: {name}（{', '.join(ENVIRONMENTS)}）")
+            
+        # シーンクリア（小物の配置数も環境ごとに数える）
+        self.clean_scene()
+        self.props = PropLibrary()
+        
+        # 環境生成
+        getattr(self, ENVIRONMENTS[name])()
+        self.props.print_report()
+        
+        # 単色の小物をパレット画像にまとめる
+        if self.use_atlas:
+            atlas = PaletteAtlas()
+            atlas.apply(bpy.context.scene.objects)
+            atlas.print_report()
             
-            # 環境生成
-            create_func()
+        # 保存
+        BLEND_DIR.mkdir(parents=True, exist_ok=True)
+        filepath = BLEND_DIR / f"{name}.blend"
+        bpy.ops.wm.save_as_mainfile(filepath=str(filepath))
+        print(f"Saved: {filepath}")
+        
+        if export:
+            self.export_to_fbx(name)
             
-            # 保存
-            filepath = f"BlenderAssets/Environments/{name}.blend"
-            bpy.ops.wm.save_as_mainfile(filepath=filepath)
-            print(f"Saved: {filepath}")
+    def create_all_environments(self, export=False):
+        """全環境を個別ファイルとして生成"""
+        # 並列実行: 環境ごとに別のBlenderプロセスで作成し、出力ファイルを集める
+        if self.workers > 1:
+            pool = EnvironmentWorkerPool(bpy.app.binary_path, self.workers, self.job_timeout, export=export)
+            pool.run(ENVIRONMENTS)
+            pool.print_report()
+            print(f"Report: {pool.write()}")
+            if pool.failed():
+                raise RuntimeError(f"作成に失敗した環境があります: {', '.join(r['job'] for r in pool.failed())}")
+            return pool.results
             
+        # ステップごとにデータブロック数とメモリを記録（アンドゥは無効）
+        with BuildSession(disable_undo=True) as session:
+            for name in ENVIRONMENTS:
+                with session.step(name):
+                    self.create_environment(name, export)
+                    
     def export_to_fbx(self, environment_name):
         """FBX形式でエクスポート"""
-        export_path = f"UnityProject/Assets/Models/Environments/{environment_name}.fbx"
-        
+        FBX_DIR.mkdir(parents=True, exist_ok=True)
+        export_path = str(FBX_DIR / f"{environment_name}.fbx")
+        
+        # 重複マテリアルをまとめて件数を確認
+        material_pool().print_report(bpy.context.scene.objects)
+        
+        # 散布したインスタンスはエクスポートの間だけ実体化
+        scattered = set_realize(bpy.context.scene.objects, True)
+        
+        # 動かないオブジェクトを結合（元のオブジェクトはエクスポートしない、共有メッシュの小物は既定でそのまま）
+        objects = list(bpy.context.scene.objects)
+        batcher = StaticBatcher(merge_shared=self.merge_shared_props)
+        if self.merge_static:
+            objects = batcher.merge(objects)
+            batcher.print_report()
+            print(f"Batching report: {batcher.write(f'{environment_name}_batching.json')}")
+            
+        for obj in bpy.context.view_layer.objects:
+            obj.select_set(obj in objects)
+            
         bpy.ops.export_scene.fbx(
             filepath=export_path,
-            use_selection=False,
+            use_selection=True,
             global_scale=1.0,
             apply_unit_scale=True,
             apply_scale_options='FBX_SCALE_ALL',
@@ -371,14 +559,27 @@ class EnvironmentCreator:
         )
         
         print(f"Exported to: {export_path}")
+        
+        # 結合したオブジェクトを削除して元のシーンに戻す
+        batcher.cleanup()
+        set_realize(scattered, False)
 
 # 実行
 if __name__ == "__main__":
-    creator = EnvironmentCreator()
+    # blender --background --python create_environments.py -- [環境名 ...] [--no-export]
+    # （環境名を指定すると1プロセスでその環境だけ作成する。環境のワーカープールもこの形で起動する）
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    names = [arg for arg in args if not arg.startswith("--")]
     
-    # 個別に環境を作成する場合
-    # creator.create_classroom()
-    # creator.create_hotel_room()
+    creator = EnvironmentCreator()
     
-    # 全環境を作成
-    creator.create_all_environments()
\ No newline at end of file
+    try:
+        if names:
+            for name in names:
+                creator.create_environment(name, export="--no-export" not in args)
+        else:
+            # 全環境を作成（creator.workers を2以上にすると並列）
+            creator.create_all_environments()
+    except (ValueError, RuntimeError) as error:
+        print(error)
+        sys.exit(1)
@@ -0,0 +1,121 @@
+import numpy as np
+
+"""
+頂点変形カーネル
+頂点座標をNumPy配列（頂点数×3）として扱い、条件マスク付きの拡大縮小・移動、
+減衰付きの押し出し、左右対称のスカルプトを一括で適用する
+変形内容は辞書のリストで記述する（例: {"kernel": "scale", "where": [["z", "<", -0.4]], "value": [0.7, 0.8, 1.0]}）
+"""
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal
+}
+
+
+def read_coords(mesh):
+    """メッシュの頂点座標を一括で取得"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def write_coords(mesh, co):
+    """メッシュの頂点座標を一括で設定"""
+    mesh.vertices.foreach_set("co", np.asarray(co, dtype=np.float64).ravel())
+    mesh.update()
+
+
+def axis_values(co, name):
+    """軸名（x, y, z, abs_x, abs_y, abs_z）に対応する値"""
+    if name.startswith("abs_"):
+        return np.abs(co[:, AXES[name[4:]]])
+    return co[:, AXES[name]]
+
+
+def axis_mask(co, conditions):
+    """[(軸名, 比較演算子, 値), ...] をすべて満たす頂点のマスク"""
+    mask = np.ones(len(co), dtype=bool)
+    for name, comparison, value in conditions or []:
+        mask &= COMPARISONS[comparison](axis_values(co, name), value)
+    return mask
+
+
+def masked_scale(co, mask, scale):
+    """マスク内の頂点を原点基準で拡大縮小"""
+    co[mask] *= np.asarray(scale, dtype=np.float64)
+    return co
+
+
+def masked_offset(co, mask, offset):
+    """マスク内の頂点を移動"""
+    co[mask] += np.asarray(offset, dtype=np.float64)
+    return co
+
+
+def masked_shear(co, mask, axis, source, factor):
+    """マスク内の頂点を別の軸の値に比例して移動（axis += source * factor）"""
+    co[mask, AXES[axis]] += axis_values(co[mask], source) * factor
+    return co
+
+
+def masked_set(co, mask, value):
+    """マスク内の頂点を1点に集める"""
+    co[mask] = np.asarray(value, dtype=np.float64)
+    return co
+
+
+def falloff_weights(co, center, radius):
+    """中心からの距離に応じた滑らかな重み（半径の外は0）"""
+    distance = np.linalg.norm(co - np.asarray(center, dtype=np.float64), axis=1) / radius
+    t = np.clip(1.0 - distance, 0.0, 1.0)
+    return t * t * (3 - 2 * t)
+
+
+def falloff_push(co, center, radius, offset):
+    """中心付近の頂点を減衰付きで押し出す"""
+    weights = falloff_weights(co, center, radius)
+    co += weights[:, None] * np.asarray(offset, dtype=np.float64)
+    return co
+
+
+def mirror_sculpt(co, kernel, axis="x", **params):
+    """+側で定義した変形を左右対称に適用"""
+    index = AXES[axis]
+    sign = np.where(co[:, index] < 0, -1.0, 1.0)
+    co[:, index] *= sign
+    kernel(co, **params)
+    co[:, index] *= sign
+    return co
+
+
+def apply_op(co, op):
+    """1つの変形指定を適用"""
+    kernel = op["kernel"]
+    if kernel == "push":
+        return falloff_push(co, op["center"], op["radius"], op["offset"])
+
+    mask = axis_mask(co, op.get("where"))
+    if kernel == "scale":
+        return masked_scale(co, mask, op["value"])
+    if kernel == "offset":
+        return masked_offset(co, mask, op["value"])
+    if kernel == "shear":
+        return masked_shear(co, mask, op["axis"], op["source"], op["factor"])
+    if kernel == "set":
+        return masked_set(co, mask, op["value"])
+    raise ValueError(f"未知の変形カーネルです: {kernel}")
+
+
+def apply_ops(co, ops):
+    """変形指定のリストを順に適用（"mirror": true の指定は左右対称に適用）"""
+    for op in ops:
+        if op.get("mirror"):
+            mirror_sculpt(co, apply_op, op.get("mirror_axis", "x"), op=op)
+        else:
+            apply_op(co, op)
+    return co
@@ -0,0 +1,63 @@
+from material_pool import material_pool
+
+"""
+環境用マテリアルライブラリ
+表面の種類（床・壁・木材・金属・ガラスなど）ごとに1つのマテリアルを使い、
+教室・カフェ・公園・ホテルルームのすべてのオブジェクトで共有する
+"""
+
+# 表面の種類 → マテリアルのパラメータ（material_pool.get の引数）
+ENVIRONMENT_MATERIALS = {
+    # 床・地面
+    "floor_wood": {"color": (0.55, 0.38, 0.22, 1.0), "roughness": 0.6},
+    "floor_tile": {"color": (0.75, 0.72, 0.68, 1.0), "roughness": 0.35},
+    "carpet": {"color": (0.45, 0.3, 0.3, 1.0), "roughness": 0.95},
+    "grass": {"color": (0.25, 0.5, 0.2, 1.0), "roughness": 0.9},
+    "path": {"color": (0.55, 0.5, 0.4, 1.0), "roughness": 0.9},
+
+    # 壁（create_walls の wall_type ごと）
+    "wall_default": {"color": (0.9, 0.9, 0.85, 1.0), "roughness": 0.8},
+    "wall_cafe": {"color": (0.8, 0.65, 0.5, 1.0), "roughness": 0.7},
+    "wall_hotel": {"color": (0.85, 0.8, 0.7, 1.0), "roughness": 0.7},
+
+    # 家具・小物
+    "wood": {"color": (0.6, 0.42, 0.25, 1.0), "roughness": 0.5},
+    "dark_wood": {"color": (0.3, 0.2, 0.12, 1.0), "roughness": 0.5},
+    "metal": {"color": (0.6, 0.6, 0.62, 1.0), "roughness": 0.35, "metallic": 1.0},
+    "fabric": {"color": (0.35, 0.45, 0.6, 1.0), "roughness": 0.9},
+    "sheets": {"color": (0.9, 0.9, 1.0, 1.0), "roughness": 0.8},
+    "blackboard": {"color": (0.1, 0.1, 0.1, 1.0), "roughness": 0.7},
+    "lamp_shade": {"color": (0.95, 0.9, 0.75, 1.0), "roughness": 0.6},
+
+    # 透明
+    "glass": {"color": (0.9, 0.95, 1.0, 1.0), "roughness": 0.05, "transmission": 1.0, "ior": 1.45},
+
+    # 植物
+    "leaves": {"color": (0.2, 0.6, 0.2, 1.0)},
+    "bark": {"color": (0.35, 0.22, 0.12, 1.0), "roughness": 0.9}
+}
+
+# 表面の種類を保存するマテリアルのカスタムプロパティ名
+SURFACE_PROP = "surface"
+
+# パレットアトラス（palette_atlas.py）にまとめない表面の種類（不透明な単色にすると見た目が変わる）
+NON_ATLAS_SURFACES = {"glass"}
+
+
+def environment_material(surface):
+    """表面の種類のマテリアル（同じ種類は環境をまたいで1つだけ）"""
+    if surface not in ENVIRONMENT_MATERIALS:
+        raise ValueError(f"未知の表面の種類です: {surface}")
+    params = dict(ENVIRONMENT_MATERIALS[surface])
+    name = "Env_" + "".join(part.capitalize() for part in surface.split("_"))
+    mat = material_pool().get(name, **params)
+    mat[SURFACE_PROP] = surface
+    return mat
+
+
+def assign(obj, surface):
+    """オブジェクトのメッシュに表面の種類のマテリアルを設定"""
+    mat = environment_material(surface)
+    obj.data.materials.clear()
+    obj.data.materials.append(mat)
+    return mat
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+環境の並列生成（ヘッドレスBlenderのワーカープール）
+環境1つを1ジョブとして別々のBlenderプロセス（--background）で作成し、
+同時に動かすプロセス数・ジョブごとのタイムアウト・ログの保存を管理して、
+保存された.blendとFBXを集める（bpyを使わないのでBlenderの外からも実行できる）
+"""
+
+SCRIPT = Path(__file__).parent / "create_environments.py"
+LOG_DIR = Path(__file__).parent.parent / "BlenderAssets" / "Reports" / "Logs"
+REPORT_PATH = Path(__file__).parent.parent / "BlenderAssets" / "Reports" / "environments_build.json"
+
+# 作成する環境（create_environments.py の ENVIRONMENTS と同じ名前）
+DEFAULT_JOBS = ["classroom", "cafe", "park", "hotel_room"]
+
+# ワーカーのログから出力ファイルを拾う目印
+OUTPUT_MARKERS = ("Saved: ", "Exported to: ")
+
+
+def find_blender(blender=None):
+    """Blenderの実行ファイル（引数 → 環境変数BLENDER → PATHの順に探す）"""
+    blender = blender or os.environ.get("BLENDER") or shutil.which("blender")
+    if not blender or (not Path(blender).exists() and shutil.which(blender) is None):
+        raise RuntimeError("Blenderが見つかりません（環境変数 BLENDER で指定してください）")
+    return blender
+
+
+def collect_outputs(log_path):
+    """ワーカーのログに書かれた出力ファイルのうち、存在するもの"""
+    outputs = []
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            for marker in OUTPUT_MARKERS:
+                if line.startswith(marker):
+                    path = line[len(marker):].strip()
+                    if Path(path).exists() and path not in outputs:
+                        outputs.append(path)
+    return outputs
+
+
+class EnvironmentWorkerPool:
+    """環境ごとのBlenderプロセスの並列実行"""
+
+    def __init__(self, blender=None, workers=None, timeout=600, log_dir=LOG_DIR, export=True):
+        self.blender = find_blender(blender)
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.log_dir = Path(log_dir)
+        self.export = export
+        self.results = []
+        self.elapsed = 0.0
+
+    def threads_per_worker(self, job_count):
+        """ワーカー1つあたりのスレッド数（CPUを取り合わないように分ける）"""
+        running = min(self.workers, job_count)
+        return max(1, (os.cpu_count() or 1) // max(running, 1))
+
+    def command(self, name, threads):
+        """1ジョブのコマンドライン"""
+        args = [name] + ([] if self.export else ["--no-export"])
+        return [
+            self.blender, "--background", "--factory-startup",
+            "--threads", str(threads),
+            # スクリプトの例外を終了コードで伝える
+            "--python-exit-code", "1",
+            "--python", str(SCRIPT),
+            "--"
+        ] + args
+
+    def run_job(self, name, threads):
+        """1ジョブを実行してログと結果を記録"""
+        log_path = self.log_dir / f"{name}.log"
+        start = time.perf_counter()
+        status = "ok"
+        returncode = None
+        with open(log_path, "w", encoding="utf-8") as log:
+            try:
+                process = subprocess.run(
+                    self.command(name, threads),
+                    stdout=log, stderr=subprocess.STDOUT,
+                    cwd=SCRIPT.parent.parent, timeout=self.timeout
+                )
+                returncode = process.returncode
+                if returncode != 0:
+                    status = "failed"
+            except subprocess.TimeoutExpired:
+                # subprocess.run がプロセスを終了させる
+                status = "timeout"
+
+        result = {
+            "job": name,
+            "status": status,
+            "returncode": returncode,
+            "seconds": round(time.perf_counter() - start, 2),
+            "log": str(log_path),
+            "outputs": collect_outputs(log_path)
+        }
+        print(f"[{name}] {status} {result['seconds']:.1f}秒 ({len(result['outputs'])}ファイル)")
+        return result
+
+    def run(self, jobs=DEFAULT_JOBS):
+        """全ジョブを最大 workers 個ずつ並列に実行"""
+        jobs = list(jobs)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        threads = self.threads_per_worker(len(jobs))
+        print(f"{len(jobs)}ジョブを {min(self.workers, len(jobs))}並列で実行（1プロセス {threads}スレッド）")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.results = list(executor.map(lambda name: self.run_job(name, threads), jobs))
+        self.elapsed = time.perf_counter() - start
+        return self.results
+
+    def failed(self):
+        """成功しなかったジョブ"""
+        return [result for result in self.results if result["status"] != "ok"]
+
+    def write(self, path=REPORT_PATH):
+        """結果をJSONで書き出す"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "workers": self.workers,
+                "seconds": round(self.elapsed, 2),
+                "jobs": self.results
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+    def print_report(self):
+        """ジョブごとの結果と出力ファイルを表示"""
+        total = sum(result["seconds"] for result in self.results)
+        print(f"環境の並列生成: {self.elapsed:.1f}秒（ジョブの合計 {total:.1f}秒）")
+        for result in self.results:
+            print(f"  {result['job']}: {result['status']} {result['seconds']:.1f}秒")
+            for output in result["outputs"]:
+                print(f"    {output}")
+            if result["status"] != "ok":
+                print(f"    ログ: {result['log']}")
+
+# 実行
+if __name__ == "__main__":
+    # python environment_workers.py [-j ワーカー数] [--timeout 秒] [環境名 ...]
+    parser = argparse.ArgumentParser(description="環境をBlenderのワーカープールで並列に作成")
+    parser.add_argument("jobs", nargs="*", default=DEFAULT_JOBS)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--blender", default=None)
+    parser.add_argument("--no-export", action="store_true")
+    options = parser.parse_args()
+
+    try:
+        pool = EnvironmentWorkerPool(options.blender, options.workers, options.timeout, export=not options.no_export)
+    except RuntimeError as error:
+        print(error)
+        sys.exit(1)
+
+    pool.run(options.jobs)
+    pool.print_report()
+    print(f"Report: {pool.write()}")
+    sys.exit(1 if pool.failed() else 0)
@@ -1,6 +1,13 @@
 import bpy
 import os
 from pathlib import Path
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_reduction import KeyframeReducer
+from material_pool import material_pool
+from lod_generator import LODGenerator, is_generated_lod
+from budget_report import BudgetAnalyzer
 
 """
 BlenderモデルをUnity用にエクスポートするスクリプト
@@ -10,6 +17,13 @@ BlenderモデルをUnity用にエクスポートするスクリプト
 class UnityExporter:
     def __init__(self):
         self.export_path = Path(__file__).parent.parent / "UnityProject" / "Assets" / "Models" / "Characters"
+        self.reduce_keyframes = True  # エクスポート前にキーフレームを削減
+        self.keyframe_reducer = KeyframeReducer()
+        self.material_count = 0
+        self.generate_lods = True  # LOD1〜LOD3を作成して一緒にエクスポート
+        self.lod_generator = LODGenerator()
+        self.asset_class = "hero"  # 予算の分類（hero / npc / prop）
+        self.enforce_budget = True  # 予算を超えたらエクスポートしない
         self.ensure_export_directory()
         
     def ensure_export_directory(self):
@@ -54,6 +68,44 @@ class UnityExporter:
                 
                 bpy.ops.object.mode_set(mode='OBJECT')
                 
+    def check_budget(self, filename="character"):
+        """エクスポート対象を予算と比較し、超過していれば中断"""
+        print("Checking asset budget...")
+        
+        analyzer = BudgetAnalyzer()
+        # 作成済みの下位のLODは除き、元のモデル（_LOD0）を分析する
+        for obj in bpy.context.scene.objects:
+            if obj.type == 'MESH' and not is_generated_lod(obj):
+                analyzer.print_report(analyzer.analyze(obj, self.asset_class))
+        print(f"Budget report: {analyzer.write(f'{filename}_budget.json')}")
+        
+        if self.enforce_budget:
+            analyzer.enforce()
+            
+    def create_lods(self):
+        """選択中のモデルからLODを作成"""
+        print("Generating LODs...")
+        
+        self.lod_generator.generate_all(bpy.context.selected_objects)
+        self.lod_generator.print_report()
+        
+    def deduplicate_materials(self):
+        """内容が同じマテリアルを1つにまとめ、エクスポートされる件数を表示"""
+        print("Deduplicating materials...")
+        
+        self.material_count = material_pool().print_report(bpy.context.selected_objects)
+        
+    def reduce_animation_keys(self):
+        """全アクションのキーフレームを許容誤差内で削減"""
+        print("Reducing animation keyframes...")
+        
+        # キャッシュからリンクしたアクションもローカルにして削減する
+        self.keyframe_reducer.reduce_all_actions(include_linked=True)
+        self.keyframe_reducer.print_report()
+        
+        if not self.keyframe_reducer.verify():
+            print("Warning: some channels exceeded the error bound and were left unreduced")
+            
     def setup_unity_scale(self):
         """Unity用のスケール設定"""
         print("Setting Unity scale...")
@@ -63,6 +115,15 @@ class UnityExporter:
         bpy.ops.transform.resize(value=(100, 100, 100))
         bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
         
+    def animation_bake_options(self):
+        """FBXのアニメーションのベイク設定（キーフレーム削減時は削減後のカーブをそのままサンプリング）"""
+        # FBXエクスポーターの簡略化は削減の許容誤差と無関係に値を変えるため、削減時は使わない
+        # 端のキーは常に書き出す（Unityで再サンプリングしないため）
+        return {
+            "bake_anim_force_startend_keying": True,
+            "bake_anim_simplify_factor": 0.0 if self.reduce_keyframes else 1.0
+        }
+        
     def export_fbx(self, filename="character"):
         """FBX形式でエクスポート"""
         export_file = self.export_path / f"{filename}.fbx"
@@ -80,7 +141,7 @@ class UnityExporter:
             apply_unit_scale=True,
             apply_scale_options='FBX_SCALE_ALL',
             bake_space_transform=False,
-            object_types={'MESH', 'ARMATURE'},
+            object_types={'MESH', 'ARMATURE', 'EMPTY'},  # EMPTYはLODGroupの親
             use_mesh_modifiers=True,
             use_mesh_modifiers_render=True,
             mesh_smooth_type='FACE',
@@ -97,9 +158,8 @@ class UnityExporter:
             bake_anim_use_all_bones=True,
             bake_anim_use_nla_strips=True,
             bake_anim_use_all_actions=True,
-            bake_anim_force_startend_keying=True,
             bake_anim_step=1.0,
-            bake_anim_simplify_factor=1.0,
+            **self.animation_bake_options(),
             path_mode='AUTO',
             embed_textures=True,
             batch_mode='OFF',
@@ -219,6 +279,17 @@ ModelImporter:
   assetBundleVariant: 
 """
         
+        # 削減したキーをUnityで再サンプリングしない
+        if self.reduce_keyframes:
+            meta_content = meta_content.replace("    resampleCurves: 1", "    resampleCurves: 0")
+        
+        # LODの切り替え画面比率
+        if self.generate_lods and self.lod_generator.results:
+            meta_content = meta_content.replace(
+                "    lODScreenPercentages: []",
+                self.lod_generator.meta_screen_percentages()
+            )
+        
         meta_file = self.export_path / f"{filename}.fbx.meta"
         with open(meta_file, 'w') as f:
             f.write(meta_content)
@@ -231,12 +302,26 @@ ModelImporter:
         print("Starting Unity Export Process")
         print("="*50)
         
+        # 予算チェック（超過していればRuntimeError）
+        self.check_budget(filename)
+        
         # 準備
         self.prepare_for_export()
         
         # 最適化
         self.optimize_mesh()
         
+        # LOD作成
+        if self.generate_lods:
+            self.create_lods()
+        
+        # マテリアルの重複をまとめる
+        self.deduplicate_materials()
+        
+        # キーフレーム削減
+        if self.reduce_keyframes:
+            self.reduce_animation_keys()
+        
         # スケール設定
         self.setup_unity_scale()
         
@@ -249,6 +334,7 @@ ModelImporter:
         print("="*50)
         print("Export Complete!")
         print(f"File exported to: {self.export_path}/{filename}.fbx")
+        print(f"Materials: {self.material_count}")
         print("Import this file into Unity project")
         print("="*50)
 
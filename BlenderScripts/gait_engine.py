@@ -0,0 +1,230 @@
+import bpy
+import math
+import time
+import numpy as np
+from keyframe_writer import KeyframeWriter
+
+"""
+歩行サイクル計算エンジン
+パラメータ（周期・歩幅・腰の揺れ・膝の上げ・腕の振り・上下動）から
+全ボーン・全フレームのカーブをNumPy配列で一括計算する
+"""
+
+# 基準の歩幅（この歩幅で太ももの振り幅が +30° / -20° になる）
+BASE_STRIDE = 0.6
+
+# ルート・背骨のキー位置（サイクル内の正規化時間）
+# 30フレームの歩行で 1, 8, 15, 23, 30 フレームに相当
+CYCLE_KNOTS = np.array([0, 7, 14, 22, 29]) / 29
+
+# (太もも, すね, 位相)
+LEG_CHANNELS = [
+    ("Hip_L", "Leg_L", 0),      # 左脚
+    ("Hip_R", "Leg_R", 0.5)     # 右脚（半周期ずれ）
+]
+
+# (肩, 腕, 位相)
+ARM_CHANNELS = [
+    ("Shoulder_L", "Arm_L", 0.5),   # 左腕（脚と逆位相）
+    ("Shoulder_R", "Arm_R", 0)      # 右腕
+]
+
+
+class GaitParameters:
+    """歩行パラメータセット"""
+
+    def __init__(self, name="WalkCycle", cycle_length=1.0, stride=0.6,
+                 hip_sway=5.0, knee_lift=60.0, arm_swing=20.0, bounce=0.02):
+        self.name = name
+        self.cycle_length = cycle_length  # 1サイクルの秒数
+        self.stride = stride              # 歩幅
+        self.hip_sway = hip_sway          # 腰の回転（度）
+        self.knee_lift = knee_lift        # 膝の最大曲げ（度）
+        self.arm_swing = arm_swing        # 肩の振り（度）
+        self.bounce = bounce              # 上下動（m）
+
+    def copy(self, **overrides):
+        """一部の値を変更したコピーを作成"""
+        values = dict(self.__dict__)
+        values.update(overrides)
+        return GaitParameters(**values)
+
+
+# 基本プリセット
+GAIT_PRESETS = {
+    "walk": GaitParameters("WalkCycle", 1.0, 0.6, 5.0, 60.0, 20.0, 0.02),
+    "run": GaitParameters("RunCycle", 0.6, 1.2, 3.0, 90.0, 35.0, 0.06),
+    "sneak": GaitParameters("SneakWalk", 2.0, 0.3, 2.0, 40.0, 8.0, 0.005),
+    "feminine": GaitParameters("FeminineWalk", 1.2, 0.4, 9.0, 50.0, 14.0, 0.015)
+}
+
+
+class GaitEngine:
+    """歩行カーブの一括計算"""
+
+    def __init__(self, fps=30):
+        self.fps = fps
+
+    def total_frames(self, params):
+        """サイクルのフレーム数"""
+        return max(int(self.fps * params.cycle_length), 2)
+
+    def compute(self, params):
+        """1つのパラメータセットのカーブを計算"""
+        return self.compute_batch([params])[0]
+
+    def compute_batch(self, params_list):
+        """複数のパラメータセットをまとめて計算"""
+        # 戻り値: params_list と同順の {(ボーン名, プロパティ): (frames, values[N×3])}
+        results = [None] * len(params_list)
+
+        # フレーム数が同じものは (バリエーション数 × フレーム数) の配列で一度に計算
+        groups = {}
+        for i, params in enumerate(params_list):
+            groups.setdefault(self.total_frames(params), []).append(i)
+
+        for total_frames, indices in groups.items():
+            batch = self.evaluate(total_frames, [params_list[i] for i in indices])
+            for row, i in enumerate(indices):
+                results[i] = {
+                    channel: (frames, values[row])
+                    for channel, (frames, values) in batch.items()
+                }
+
+        return results
+
+    def evaluate(self, total_frames, params_list):
+        """同じフレーム数のバリエーションを一括評価"""
+        def column(attr):
+            return np.array([getattr(p, attr) for p in params_list], dtype=np.float64)[:, None]
+
+        variant_count = len(params_list)
+        frames = np.arange(1, total_frames + 1)
+        knot_frames = 1 + np.round(CYCLE_KNOTS * (total_frames - 1))
+
+        stride_scale = column("stride") / BASE_STRIDE
+        hip_forward = math.radians(30) * stride_scale
+        hip_back = math.radians(-20) * stride_scale
+        knee_lift = np.radians(column("knee_lift"))
+        arm_swing = np.radians(column("arm_swing"))
+        hip_sway = np.radians(column("hip_sway"))
+        bounce = column("bounce")
+
+        curves = {}
+
+        def rotation_x(values):
+            rotation = np.zeros((variant_count, values.shape[1], 3))
+            rotation[..., 0] = values
+            return rotation
+
+        # 脚（区分線形の太もも・膝角度）
+        for hip_name, leg_name, phase in LEG_CHANNELS:
+            t = (((frames - 1) / total_frames + phase) % 1.0)[None, :]
+
+            hip_angle = np.select(
+                [t < 0.25, t < 0.5, t < 0.75],
+                [hip_forward * (t * 4),              # 前方への振り出し
+                 hip_forward * (2 - t * 4),          # 着地から中立
+                 hip_back * ((t - 0.5) * 4)],        # 後方への移動
+                hip_back * (4 - t * 4)               # 中立へ戻る
+            )
+            knee_angle = np.select(
+                [t < 0.25, t < 0.5, t < 0.75],
+                [knee_lift * (t * 4),                # 膝を曲げて持ち上げ
+                 knee_lift * (2 - t * 4),            # 着地で伸ばす
+                 np.full_like(knee_lift * t, math.radians(5))],  # 支持脚
+                knee_lift * 0.5 * ((t - 0.75) * 4)   # 次の振り出しの準備
+            )
+
+            curves[(hip_name, "rotation_euler")] = (frames, rotation_x(hip_angle))
+            curves[(leg_name, "rotation_euler")] = (frames, rotation_x(knee_angle))
+
+        # 腕（サイン波の振りと肘の曲げ）
+        for shoulder_name, arm_name, phase in ARM_CHANNELS:
+            t = (((frames - 1) / total_frames + phase) % 1.0)[None, :]
+            wave = np.sin(t * 2 * math.pi)
+
+            shoulder_swing = wave * arm_swing
+            elbow_bend = (math.radians(15) + np.abs(wave) * math.radians(10)) * (arm_swing / math.radians(20))
+
+            elbow = np.zeros((variant_count, total_frames, 3))
+            elbow[..., 1] = elbow_bend
+            curves[(shoulder_name, "rotation_euler")] = (frames, rotation_x(shoulder_swing))
+            curves[(arm_name, "rotation_euler")] = (frames, elbow)
+
+        # ルートの上下動と腰の回転（疎なキー）
+        root_location = np.zeros((variant_count, len(knot_frames), 3))
+        root_location[..., 2] = bounce * np.array([0, 1, -0.5, 1, 0])
+        root_rotation = np.zeros((variant_count, len(knot_frames), 3))
+        root_rotation[..., 2] = hip_sway * np.array([0, 1, 0, -1, 0])
+        curves[("Root", "location")] = (knot_frames, root_location)
+        curves[("Root", "rotation_euler")] = (knot_frames, root_rotation)
+
+        # 背骨（腰と逆向きにひねる）
+        spine_rotation = np.zeros((variant_count, len(knot_frames), 3))
+        spine_rotation[..., 0] = math.radians(2) * np.array([0, 1, 0, 1, 0])
+        spine_rotation[..., 2] = -hip_sway * 0.6 * np.array([0, 1, 0, -1, 0])
+        curves[("Spine1", "rotation_euler")] = (knot_frames, spine_rotation)
+        curves[("Spine2", "rotation_euler")] = (knot_frames, spine_rotation)
+
+        # 頭部の安定化（軽い上下動の補正）
+        t = ((frames - 1) / total_frames)[None, :]
+        head_bob = np.sin(t * 4 * math.pi) * math.radians(2) * np.ones((variant_count, 1))
+        curves[("Head", "rotation_euler")] = (frames, rotation_x(head_bob))
+
+        return curves
+
+    def write_curves(self, curves, action, bone_names=None):
+        """計算済みカーブをアクションに一括書き込み"""
+        writer = KeyframeWriter(action)
+        for (bone_name, prop), (frames, values) in curves.items():
+            if bone_names is not None and bone_name not in bone_names:
+                continue
+            writer.add_bone_curve(bone_name, prop, frames, values)
+        return writer.write()
+
+    def build_family(self, preset_names=None, speed_steps=(0.8, 0.9, 1.0, 1.1, 1.2),
+                     stride_steps=(0.85, 1.0, 1.15)):
+        """プリセットを基に速度×歩幅のバリエーション群を作成"""
+        preset_names = preset_names or list(GAIT_PRESETS.keys())
+        family = []
+
+        for preset_name in preset_names:
+            base = GAIT_PRESETS[preset_name]
+            for speed in speed_steps:
+                for stride in stride_steps:
+                    family.append(base.copy(
+                        name=f"{base.name}_S{round(speed * 100)}_W{round(stride * 100)}",
+                        cycle_length=base.cycle_length / speed,
+                        stride=base.stride * stride,
+                        arm_swing=base.arm_swing * stride,
+                        bounce=base.bounce * speed
+                    ))
+
+        return family
+
+    def create_actions(self, params_list, armature=None):
+        """バリエーション群を一括計算してアクションとして保存"""
+        bone_names = None
+        if armature:
+            bone_names = {bone.name for bone in armature.pose.bones}
+
+        start = time.perf_counter()
+        all_curves = self.compute_batch(params_list)
+        compute_time = time.perf_counter() - start
+
+        actions = []
+        key_count = 0
+        for params, curves in zip(params_list, all_curves):
+            action = bpy.data.actions.new(name=params.name)
+            action.use_fake_user = True  # 未割り当てでも保存されるように
+            key_count += self.write_curves(curves, action, bone_names)
+            actions.append(action)
+
+        total_time = time.perf_counter() - start
+        clip_count = max(len(actions), 1)
+        print(f"歩行バリエーション: {len(actions)}クリップ / {key_count}キー")
+        print(f"  計算 {compute_time * 1000:.1f}ms / 合計 {total_time * 1000:.1f}ms"
+              f"（1クリップあたり {total_time * 1000 / clip_count:.2f}ms）")
+
+        return actions
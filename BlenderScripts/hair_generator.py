@@ -0,0 +1,177 @@
+import math
+
+"""
+髪メッシュ生成モジュール
+頭を覆うシェル（顔の部分は面を作らずに開口する）と、後ろ髪・横髪の短冊（カード）を
+頂点数の予算内で作成し、物理演算の固定に使う根元→毛先のウェイトを設定する
+MeshBuilder のbmeshに直接追加する
+"""
+
+# 固定用のウェイトを保存する頂点グループ名（1.0で固定、0.0で自由）
+PIN_GROUP = "Hair_Pin"
+
+
+class HairGenerator:
+    """シェル＋カード構成の髪の作成"""
+
+    def __init__(self, builder, vertex_budget=600, radius=1.1, material=0, name="Hair"):
+        self.builder = builder
+        self.vertex_budget = vertex_budget
+        self.radius = radius
+        self.material = material
+        self.name = name
+
+        # シェルと短冊への頂点の配分
+        self.shell_share = 0.5
+        self.max_polar = math.radians(130)   # シェルの下端（頭頂からの角度）
+
+        # 顔の開口（単位球上の座標で、前向きかつ生え際より下）
+        self.opening_front = 0.25            # y がこれより大きい
+        self.opening_top = 0.45              # z がこれより小さい
+
+        # 短冊
+        self.card_segments = 4               # 長さ方向の分割数
+        self.card_length = 0.9
+        self.card_width = 0.22
+        self.card_root_polar = math.radians(95)
+
+        self.vertex_count = 0
+
+    def shape(self, x, y, z):
+        """単位球上の点を髪の形に変形（前髪を前へ、後ろ髪を長く）"""
+        if y > 0 and z > 0:
+            y *= 1.2
+        if y < 0:
+            # 横から後ろへ滑らかに下げる（段差のある面を作らない）
+            z -= 0.3 * min(-y / 0.4, 1.0)
+            y *= 1.3
+        return (x * self.radius, y * self.radius, z * self.radius)
+
+    def in_opening(self, x, y, z):
+        """顔の開口部分に入っているか"""
+        return y > self.opening_front and z < self.opening_top
+
+    @staticmethod
+    def sphere_point(polar, azimuth):
+        """極角・方位角から単位球上の点"""
+        return (
+            math.sin(polar) * math.cos(azimuth),
+            math.sin(polar) * math.sin(azimuth),
+            math.cos(polar)
+        )
+
+    def build_shell(self, budget):
+        """顔の部分を除いたシェルを作成（開口部の面と頂点は作らない）"""
+        bm = self.builder.bm
+        uv_layer = self.builder.uv_layer
+
+        # 分割数は予算から決める（頂点数 ≒ 分割数 × リング数）
+        segments = max(8, int(math.sqrt(budget * 2)) // 2 * 2)
+        rings = max(3, budget // segments)
+        while 1 + segments * rings > budget and rings > 3:
+            rings -= 1
+
+        polar = [self.max_polar * (i + 1) / rings for i in range(rings)]
+        azimuth = [2 * math.pi * j / segments for j in range(segments)]
+
+        # 面の中心が開口部に入る面は作らない
+        def keep(ring, segment):
+            center_polar = self.max_polar * (ring + 1.5) / rings if ring >= 0 else polar[0] / 2
+            center_azimuth = 2 * math.pi * (segment + 0.5) / segments
+            return not self.in_opening(*self.sphere_point(center_polar, center_azimuth))
+
+        # 使う頂点だけを作成
+        verts = {}
+
+        def vert(ring, segment):
+            key = (ring, segment % segments)
+            if key not in verts:
+                if ring < 0:
+                    co = self.shape(0, 0, 1)
+                else:
+                    co = self.shape(*self.sphere_point(polar[ring], azimuth[key[1]]))
+                verts[key] = bm.verts.new(co)
+            return verts[key]
+
+        def uv(ring, segment):
+            v = 1.0 if ring < 0 else 1.0 - (ring + 1) / rings
+            return (segment / segments, v)
+
+        faces = []
+        # 頭頂は1頂点からの三角形（縮退した面を作らない）
+        for j in range(segments):
+            if keep(-1, j):
+                corners = [(-1, 0), (0, j), (0, j + 1)]
+                faces.append((corners, [(j + 0.5, -1), (j, 0), (j + 1, 0)]))
+        for i in range(rings - 1):
+            for j in range(segments):
+                if keep(i, j):
+                    corners = [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)]
+                    faces.append((corners, corners))
+
+        for corners, uv_keys in faces:
+            face = bm.faces.new([vert(r, s) for r, s in corners])
+            for loop, (r, s) in zip(face.loops, uv_keys):
+                loop[uv_layer].uv = uv(r, s)
+
+        shell = list(verts.values())
+        # シェルは頭に固定
+        self.builder.set_weights(shell, PIN_GROUP, [1.0] * len(shell))
+        return shell
+
+    def build_cards(self, count):
+        """後ろ・横の短冊を作成（根元1.0→毛先0.0のウェイト）"""
+        bm = self.builder.bm
+        uv_layer = self.builder.uv_layer
+        rows = self.card_segments + 1
+        cards = []
+
+        # 顔の開口を避けて後ろ側に並べる（方位角 -90° を中心に左右へ）
+        spread = math.radians(200)
+        for index in range(count):
+            azimuth = -math.pi / 2 + spread * ((index + 0.5) / count - 0.5)
+            root = self.shape(*self.sphere_point(self.card_root_polar, azimuth))
+            outward = (math.cos(azimuth), math.sin(azimuth))
+            tangent = (-math.sin(azimuth), math.cos(azimuth))
+
+            row_verts = []
+            weights = []
+            for row in range(rows):
+                t = row / (rows - 1)
+                # 毛先に向かって下へ伸ばし、少し外へ広げる
+                bulge = 0.12 * math.sin(t * math.pi * 0.5)
+                center = (
+                    root[0] + outward[0] * bulge,
+                    root[1] + outward[1] * bulge,
+                    root[2] - self.card_length * t
+                )
+                half = self.card_width * (1.0 - 0.5 * t) / 2
+                row_verts.append((
+                    bm.verts.new((center[0] - tangent[0] * half, center[1] - tangent[1] * half, center[2])),
+                    bm.verts.new((center[0] + tangent[0] * half, center[1] + tangent[1] * half, center[2]))
+                ))
+                weights.extend([1.0 - t, 1.0 - t])
+
+            for row in range(rows - 1):
+                (a, b), (c, d) = row_verts[row], row_verts[row + 1]
+                face = bm.faces.new((a, c, d, b))
+                v0, v1 = row / (rows - 1), (row + 1) / (rows - 1)
+                for loop, co in zip(face.loops, [(0, 1 - v0), (0, 1 - v1), (1, 1 - v1), (1, 1 - v0)]):
+                    loop[uv_layer].uv = co
+
+            card = [vert for pair in row_verts for vert in pair]
+            self.builder.set_weights(card, PIN_GROUP, weights)
+            cards.extend(card)
+        return cards
+
+    def build(self):
+        """予算内でシェルと短冊を作成し、頂点リストを返す"""
+        shell = self.build_shell(int(self.vertex_budget * self.shell_share))
+
+        card_verts = 2 * (self.card_segments + 1)
+        count = max(0, (self.vertex_budget - len(shell)) // card_verts)
+        cards = self.build_cards(count)
+
+        verts = self.builder.finish_part(shell + cards, self.name, self.material, True)
+        self.vertex_count = len(verts)
+        return verts
@@ -0,0 +1,233 @@
+import bpy
+import math
+import numpy as np
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import write_fcurve
+
+"""
+キーフレーム削減スクリプト
+密にサンプリングされたアクションを、許容誤差内に収まる最小限のベジェキーに置き換える
+使用方法: エクスポート前に KeyframeReducer().reduce_all_actions() を実行
+"""
+
+# スナップショット対象のキーフレーム属性（属性名, 1キーあたりの要素数, dtype）
+KEY_ATTRIBUTES = [
+    ("co", 2, np.float32),
+    ("handle_left", 2, np.float32),
+    ("handle_right", 2, np.float32),
+    ("interpolation", 1, np.int32),
+    ("handle_left_type", 1, np.int32),
+    ("handle_right_type", 1, np.int32)
+]
+
+
+def snapshot_keys(fcurve):
+    """F-Curveのキーフレームを配列として保存"""
+    points = fcurve.keyframe_points
+    count = len(points)
+    snapshot = {}
+    for attr, size, dtype in KEY_ATTRIBUTES:
+        data = np.empty(count * size, dtype=dtype)
+        points.foreach_get(attr, data)
+        snapshot[attr] = data
+    return snapshot
+
+
+def restore_keys(action, data_path, index, group, snapshot):
+    """保存したキーフレームでF-Curveを復元"""
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve:
+        action.fcurves.remove(fcurve)
+    if group:
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    else:
+        fcurve = action.fcurves.new(data_path, index=index)
+
+    points = fcurve.keyframe_points
+    points.add(len(snapshot["co"]) // 2)
+    for attr, size, dtype in KEY_ATTRIBUTES:
+        points.foreach_set(attr, snapshot[attr])
+    fcurve.update()
+    return fcurve
+
+
+def evaluate_fcurve(fcurve, frames):
+    """F-Curveを指定フレームで評価（シーンのフレームは変更しない）"""
+    return np.array([fcurve.evaluate(frame) for frame in frames], dtype=np.float64)
+
+
+def douglas_peucker(frames, values, tolerance):
+    """線形補間で許容誤差内に収まるキーのインデックスを選択"""
+    keep = np.zeros(len(frames), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(frames) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        span = frames[first + 1:last]
+        ratio = (span - frames[first]) / (frames[last] - frames[first])
+        linear = values[first] + (values[last] - values[first]) * ratio
+        error = np.abs(values[first + 1:last] - linear)
+
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return keep
+
+
+class KeyframeReducer:
+    """許容誤差付きキーフレーム削減"""
+
+    def __init__(self, angular_error=0.5, position_error=0.001, scale_error=0.001, value_error=0.005):
+        self.angular_error = math.radians(angular_error)  # 回転の許容誤差（度で指定）
+        self.position_error = position_error              # 位置の許容誤差（m）
+        self.scale_error = scale_error                    # スケールの許容誤差
+        self.value_error = value_error                    # シェイプキーなどその他の値
+        self.max_iterations = 32
+        self.report = []
+
+    def tolerance_for(self, data_path):
+        """データパスに応じた許容誤差"""
+        if data_path.endswith("rotation_euler") or data_path.endswith("rotation_quaternion"):
+            return self.angular_error
+        if data_path.endswith("location"):
+            return self.position_error
+        if data_path.endswith("scale"):
+            return self.scale_error
+        return self.value_error
+
+    def reduce_fcurve(self, action, fcurve):
+        """1本のF-Curveを削減し (削減前キー数, 削減後キー数, 最大誤差, 成否) を返す"""
+        data_path = fcurve.data_path
+        index = fcurve.array_index
+        group = fcurve.group.name if fcurve.group else None
+        tolerance = self.tolerance_for(data_path)
+
+        snapshot = snapshot_keys(fcurve)
+        keys = snapshot["co"].reshape(-1, 2).astype(np.float64)
+        before = len(keys)
+        if before <= 2:
+            return before, before, 0.0, True
+
+        # 元のカーブを整数フレームごとにサンプリング（回帰チェックの基準）
+        sample_frames = np.arange(math.floor(keys[0, 0]), math.ceil(keys[-1, 0]) + 1, dtype=np.float64)
+        reference = evaluate_fcurve(fcurve, sample_frames)
+
+        key_frames = keys[:, 0]
+        key_values = keys[:, 1]
+
+        # 線形近似で初期キーを選び、ベジェ評価で誤差が出た区間にキーを追加していく
+        keep = douglas_peucker(key_frames, key_values, tolerance * 0.5)
+        max_error = 0.0
+
+        for _ in range(self.max_iterations):
+            fcurve = write_fcurve(
+                action, data_path, index, key_frames[keep], key_values[keep], group,
+                'BEZIER', 'AUTO_CLAMPED'
+            )
+            error = np.abs(evaluate_fcurve(fcurve, sample_frames) - reference)
+            max_error = float(error.max())
+            if max_error <= tolerance:
+                break
+
+            # 選択済みキーで区切った各区間の最悪点に最も近いキーを追加
+            added = False
+            kept_frames = key_frames[keep]
+            segment = np.searchsorted(kept_frames, sample_frames, side='right')
+            for seg in np.unique(segment[error > tolerance]):
+                in_segment = (segment == seg) & (error > tolerance)
+                worst_frame = sample_frames[in_segment][np.argmax(error[in_segment])]
+                nearest = int(np.argmin(np.abs(key_frames - worst_frame)))
+                if not keep[nearest]:
+                    keep[nearest] = True
+                    added = True
+            if not added:
+                break
+
+        # 回帰チェック: 許容誤差を超えた場合は元のキーに戻す
+        if max_error > tolerance:
+            restore_keys(action, data_path, index, group, snapshot)
+            return before, before, max_error, False
+
+        return before, int(keep.sum()), max_error, True
+
+    def reduce_action(self, action):
+        """アクション内の全F-Curveを削減"""
+        # F-Curveは作り直されるため、先にチャンネル一覧を確定させる
+        channels = [(fcurve.data_path, fcurve.array_index) for fcurve in action.fcurves]
+
+        before_total = 0
+        after_total = 0
+        max_error = 0.0
+        failed = []
+
+        for data_path, index in channels:
+            fcurve = action.fcurves.find(data_path, index=index)
+            if not fcurve:
+                continue
+            before, after, error, ok = self.reduce_fcurve(action, fcurve)
+            before_total += before
+            after_total += after
+            max_error = max(max_error, error)
+            if not ok:
+                failed.append(f"{data_path}[{index}]")
+
+        entry = {
+            "action": action.name,
+            "keys_before": before_total,
+            "keys_after": after_total,
+            "max_error": max_error,
+            "failed_channels": failed
+        }
+        self.report.append(entry)
+        return entry
+
+    def reduce_all_actions(self, include_linked=False):
+        """bpy.data.actions 内の全アクションを削減"""
+        # include_linked: ライブラリからリンクしたアクション（ActionCache）をローカルにして削減する
+        # （キャッシュのライブラリ自体は変更しない）
+        self.report = []
+        for action in list(bpy.data.actions):
+            if action.library:
+                # リンクされたライブラリのアクションは読み取り専用
+                if not include_linked:
+                    continue
+                action = action.make_local()
+            self.reduce_action(action)
+        return self.report
+
+    def verify(self):
+        """回帰チェック: 全チャンネルが許容誤差内に収まったか"""
+        return all(not entry["failed_channels"] for entry in self.report)
+
+    def print_report(self):
+        """削減結果を表示"""
+        print("キーフレーム削減結果:")
+        total_before = 0
+        total_after = 0
+        for entry in self.report:
+            total_before += entry["keys_before"]
+            total_after += entry["keys_after"]
+            status = "OK" if not entry["failed_channels"] else f"NG {entry['failed_channels']}"
+            print(f"  {entry['action']}: {entry['keys_before']} -> {entry['keys_after']}キー "
+                  f"(最大誤差 {entry['max_error']:.5f}) {status}")
+        print(f"  合計: {total_before} -> {total_after}キー")
+
+# 実行
+if __name__ == "__main__":
+    reducer = KeyframeReducer()
+    reducer.reduce_all_actions()
+    reducer.print_report()
+
+    if not reducer.verify():
+        print("警告: 許容誤差を超えたチャンネルは元のキーのまま残しています")
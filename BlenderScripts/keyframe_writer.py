@@ -0,0 +1,182 @@
+import bpy
+import numpy as np
+
+"""
+F-Curve一括書き込みモジュール
+frame_set + keyframe_insert を使わず、事前計算した(フレーム, 値)配列から
+F-Curveを直接生成する（シーンのフレームには一切触れない）
+"""
+
+# RNAのenum値（foreach_setで一括設定するため整数で指定）
+INTERPOLATION_MODES = {
+    'CONSTANT': 0,
+    'LINEAR': 1,
+    'BEZIER': 2
+}
+
+HANDLE_TYPES = {
+    'FREE': 0,
+    'AUTO': 1,
+    'VECTOR': 2,
+    'ALIGNED': 3,
+    'AUTO_CLAMPED': 4
+}
+
+
+def pose_bone_path(bone_name, prop):
+    """ポーズボーンのデータパスを作成"""
+    return f'pose.bones["{bone_name}"].{prop}'
+
+
+def shape_key_path(shape_name):
+    """シェイプキー値のデータパスを作成"""
+    return f'key_blocks["{shape_name}"].value'
+
+
+def ensure_action(id_data, name):
+    """IDにアクションが無ければ作成して割り当てる"""
+    if not id_data.animation_data:
+        id_data.animation_data_create()
+    if not id_data.animation_data.action:
+        id_data.animation_data.action = bpy.data.actions.new(name=name)
+    return id_data.animation_data.action
+
+
+def write_fcurve(action, data_path, index, frames, values, group=None,
+                 interpolation='BEZIER', handle_type='AUTO'):
+    """1チャンネル分のキーを一括で書き込む（既存のF-Curveは置き換え）"""
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    count = len(frames)
+
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve:
+        action.fcurves.remove(fcurve)
+    if group:
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    else:
+        fcurve = action.fcurves.new(data_path, index=index)
+
+    if count == 0:
+        return fcurve
+
+    # 座標をまとめて設定
+    points = fcurve.keyframe_points
+    points.add(count)
+    co = np.empty(count * 2, dtype=np.float32)
+    co[0::2] = frames
+    co[1::2] = values
+    points.foreach_set("co", co)
+
+    # 補間とハンドルもまとめて設定
+    points.foreach_set("interpolation", [INTERPOLATION_MODES[interpolation]] * count)
+    points.foreach_set("handle_left_type", [HANDLE_TYPES[handle_type]] * count)
+    points.foreach_set("handle_right_type", [HANDLE_TYPES[handle_type]] * count)
+
+    # ハンドル再計算
+    fcurve.update()
+    return fcurve
+
+
+def set_interpolation(action, interpolation='BEZIER', handle_type='AUTO'):
+    """アクション内の全キーの補間モードを一括設定"""
+    if not action:
+        return
+
+    for fcurve in action.fcurves:
+        points = fcurve.keyframe_points
+        count = len(points)
+        if count == 0:
+            continue
+        points.foreach_set("interpolation", [INTERPOLATION_MODES[interpolation]] * count)
+        points.foreach_set("handle_left_type", [HANDLE_TYPES[handle_type]] * count)
+        points.foreach_set("handle_right_type", [HANDLE_TYPES[handle_type]] * count)
+        fcurve.update()
+
+
+class KeyframeWriter:
+    """チャンネルごとのキー配列を溜めてアクションへ一括書き込み"""
+
+    def __init__(self, action, interpolation='BEZIER', handle_type='AUTO'):
+        self.action = action
+        self.interpolation = interpolation
+        self.handle_type = handle_type
+
+        # (data_path, index) -> [frames配列, values配列, グループ名]
+        self.channels = {}
+
+    def add_channel(self, data_path, index, frames, values, group=None):
+        """1チャンネル分のキー配列を追加"""
+        frames = np.asarray(frames, dtype=np.float32).ravel()
+        values = np.asarray(values, dtype=np.float32).ravel()
+        if len(frames) != len(values):
+            raise ValueError(f"{data_path}[{index}]: フレーム数と値の数が一致しません")
+
+        key = (data_path, index)
+        if key in self.channels:
+            channel = self.channels[key]
+            channel[0] = np.concatenate((channel[0], frames))
+            channel[1] = np.concatenate((channel[1], values))
+        else:
+            self.channels[key] = [frames, values, group]
+
+    def add_vector_channel(self, data_path, frames, vectors, group=None):
+        """ベクトル値（N×成分数）を成分ごとのチャンネルとして追加"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[:, None]
+        for index in range(vectors.shape[1]):
+            self.add_channel(data_path, index, frames, vectors[:, index], group)
+
+    def add_bone_keys(self, bone_name, prop, keys):
+        """[(frame, (x, y, z)), ...] 形式のボーンキーを追加"""
+        if not keys:
+            return
+        frames = [frame for frame, _ in keys]
+        vectors = [value for _, value in keys]
+        self.add_vector_channel(pose_bone_path(bone_name, prop), frames, vectors, group=bone_name)
+
+    def add_bone_curve(self, bone_name, prop, frames, vectors):
+        """事前計算済み配列のボーンキーを追加"""
+        self.add_vector_channel(pose_bone_path(bone_name, prop), frames, vectors, group=bone_name)
+
+    def add_shape_key_keys(self, shape_name, keys):
+        """[(frame, value), ...] 形式のシェイプキーを追加"""
+        if not keys:
+            return
+        frames = [frame for frame, _ in keys]
+        values = [value for _, value in keys]
+        self.add_channel(shape_key_path(shape_name), 0, frames, values)
+
+    def add_shape_key_curve(self, shape_name, frames, values):
+        """事前計算済み配列のシェイプキーを追加"""
+        self.add_channel(shape_key_path(shape_name), 0, frames, values)
+
+    def key_count(self):
+        """書き込み予定のキー総数"""
+        return sum(len(channel[0]) for channel in self.channels.values())
+
+    def write(self):
+        """溜めた全チャンネルをF-Curveとして書き込み、書き込んだキー数を返す"""
+        total = 0
+
+        for (data_path, index), (frames, values, group) in self.channels.items():
+            if len(frames) == 0:
+                continue
+
+            # フレーム順に並べ、同一フレームは後から追加した値を優先
+            order = np.argsort(frames, kind='stable')
+            frames = frames[order]
+            values = values[order]
+            last = np.append(frames[1:] != frames[:-1], True)
+            frames = frames[last]
+            values = values[last]
+
+            write_fcurve(
+                self.action, data_path, index, frames, values, group,
+                self.interpolation, self.handle_type
+            )
+            total += len(frames)
+
+        self.channels = {}
+        return total
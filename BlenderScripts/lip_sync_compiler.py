@@ -0,0 +1,159 @@
+import bpy
+import os
+import sys
+import time
+import types
+import multiprocessing
+from itertools import islice
+from pathlib import Path
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from keyframe_writer import KeyframeWriter
+from viseme_curves import read_timeline, compile_line
+from audio_visemes import analyze_file
+
+"""
+リップシンクコンパイラ
+音素タイムラインファイル（line_id,time,vowel,intensity）またはWAVファイルのフォルダから
+セリフごとに mouth_a/i/u/e/o のアクションを生成する
+使用方法: LipSyncCompiler().compile_file("voice_timeline.csv", face_mesh)
+          LipSyncCompiler().compile_audio_directory("Voices/", face_mesh)
+"""
+
+class LipSyncCompiler:
+    def __init__(self, fps=30, coarticulation=0.12, workers=None, batch_size=64):
+        self.fps = fps
+        self.coarticulation = coarticulation  # 前後の母音を混ぜる幅（秒）
+        self.workers = workers or max(os.cpu_count() - 1, 1)
+        self.batch_size = batch_size          # 一度にメモリに載せるセリフ数
+        self.action_prefix = "LipSync"
+        self.errors = []                      # 解析できなかったファイル [(名前, エラー)]
+
+    def write_line(self, shape_keys, line_id, curves):
+        """1セリフ分のアクションを作成（スロットには割り当てない）"""
+        action = bpy.data.actions.new(name=f"{self.action_prefix}_{line_id}")
+        action.id_root = 'KEY'
+        action.use_fake_user = True  # 未割り当てでも保存されるように
+
+        writer = KeyframeWriter(action)
+        for shape_name, (frames, values) in curves.items():
+            if shape_name in shape_keys.key_blocks:
+                writer.add_shape_key_curve(shape_name, frames, values)
+        writer.write()
+        return action
+
+    def create_pool(self):
+        """ワーカープロセスを作成（ワーカーはbpyを使わずカーブ計算のみ行う）"""
+        if self.workers <= 1:
+            return None
+        # Blenderのプロセス（スレッド・GPU・Pythonの状態）はforkせず、新しいPythonを起動する
+        # spawnは起動時に __main__ のスクリプトを読み直すため、作成中だけ空のモジュールに置き換え、
+        # ワーカーはタスクの関数があるbpyを使わないモジュール（viseme_curves・audio_visemes）だけを読み込む
+        context = multiprocessing.get_context("spawn")
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            return context.Pool(self.workers)
+        finally:
+            sys.modules["__main__"] = main
+
+    def run_batches(self, tasks, worker, shape_keys):
+        """タスクをバッチごとにワーカーで計算し、結果をアクションとして書き込む"""
+        # 戻り値: (処理数, キャッシュ使用数)
+        pool = self.create_pool()
+        self.errors = []
+        line_count = 0
+        cached_count = 0
+        try:
+            while True:
+                # バッチ単位で読み込むので、入力の長さに関わらずメモリ使用量は一定
+                batch = list(islice(tasks, self.batch_size))
+                if not batch:
+                    break
+
+                if pool:
+                    results = pool.map(worker, batch)
+                else:
+                    results = map(worker, batch)
+
+                for result in results:
+                    line_id, curves = result[0], result[1]
+                    # 解析できなかったファイルは記録して次へ進む
+                    if len(result) > 3 and result[3] is not None:
+                        self.errors.append((line_id, result[3]))
+                        print(f"  {line_id}: 解析できませんでした（{result[3]}）")
+                        continue
+                    if len(result) > 2 and result[2]:
+                        cached_count += 1
+                    self.write_line(shape_keys, line_id, curves)
+                    line_count += 1
+
+                print(f"  {line_count}セリフ処理済み")
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        return line_count, cached_count
+
+    def compile_file(self, path, mesh_obj):
+        """タイムラインファイルを順に処理してアクションを作成"""
+        shape_keys = mesh_obj.data.shape_keys
+        if not shape_keys:
+            print("シェイプキーが見つかりません")
+            return 0
+
+        start = time.perf_counter()
+        tasks = (
+            (line_id, events, self.fps, self.coarticulation)
+            for line_id, events in read_timeline(path)
+        )
+        line_count, _ = self.run_batches(tasks, compile_line, shape_keys)
+
+        elapsed = time.perf_counter() - start
+        print(f"リップシンク生成: {line_count}セリフ / {elapsed:.2f}秒"
+              f"（{line_count / max(elapsed, 1e-9):.1f}セリフ/秒）")
+        return line_count
+
+    def compile_audio_directory(self, directory, mesh_obj, cache_dir=None):
+        """フォルダ内のWAVファイルを解析してアクションを作成"""
+        shape_keys = mesh_obj.data.shape_keys
+        if not shape_keys:
+            print("シェイプキーが見つかりません")
+            return 0
+
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent.parent / "BlenderAssets" / "Cache" / "Visemes"
+        os.makedirs(cache_dir, exist_ok=True)
+
+        start = time.perf_counter()
+        tasks = (
+            (entry.path, self.fps, str(cache_dir))
+            for entry in sorted(os.scandir(directory), key=lambda entry: entry.name)
+            if entry.is_file() and entry.name.lower().endswith(".wav")
+        )
+        clip_count, cached_count = self.run_batches(tasks, analyze_file, shape_keys)
+
+        elapsed = time.perf_counter() - start
+        print(f"音声からのリップシンク生成: {clip_count}クリップ（キャッシュ {cached_count}） / "
+              f"{elapsed:.2f}秒（{clip_count / max(elapsed, 1e-9):.1f}クリップ/秒）")
+        if self.errors:
+            print(f"  解析できなかったファイル: {len(self.errors)}個")
+        return clip_count
+
+# 実行
+if __name__ == "__main__":
+    # blender --background scene.blend --python lip_sync_compiler.py -- timeline.csv
+    # blender --background scene.blend --python lip_sync_compiler.py -- Voices/
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("タイムラインファイルまたはWAVフォルダを指定してください")
+    else:
+        from animation_expressions import ExpressionAnimationCreator
+        face_mesh = ExpressionAnimationCreator().get_face_mesh()
+        if face_mesh and os.path.isdir(argv[0]):
+            LipSyncCompiler().compile_audio_directory(argv[0], face_mesh)
+        elif face_mesh:
+            LipSyncCompiler().compile_file(argv[0], face_mesh)
+        else:
+            print("顔のメッシュが見つかりません")
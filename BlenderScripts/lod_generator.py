@@ -0,0 +1,202 @@
+import bpy
+import numpy as np
+
+"""
+キャラクターのLOD（LOD1〜LOD3）生成モジュール
+作成済みのモデルから三角形数の比率を指定して低ポリゴン版を作り、
+UnityのLODGroupが認識する名前（<名前>_LOD0, _LOD1, ...）で同じ親の下に並べる
+ウェイト・UVの継ぎ目は保持し、シェイプキーは下位のLODでは削除する
+"""
+
+# LODごとの三角形数の比率（LOD0を1.0として）
+DEFAULT_RATIOS = (0.5, 0.25, 0.1)
+
+# LODごとの切り替え画面比率（LOD0, LOD1, ...、最後の値より小さいと非表示）
+DEFAULT_SCREEN_PERCENTAGES = (0.6, 0.3, 0.12, 0.03)
+
+# UVの継ぎ目を保護するための一時的な頂点グループ
+PROTECT_GROUP = "_LOD_Protect"
+
+# LODの段階（0が元のモデル）と元のモデル名を保存するカスタムプロパティ名
+LOD_LEVEL_PROP = "lod_level"
+LOD_SOURCE_PROP = "lod_source"
+
+
+def triangle_count(mesh):
+    """メッシュの三角形数"""
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    return int((loop_totals - 2).sum())
+
+
+def uv_seam_vertices(mesh):
+    """UVの継ぎ目上の頂点（1つの頂点に複数のUV座標があるもの）"""
+    if not mesh.uv_layers:
+        return np.zeros(len(mesh.vertices), dtype=bool)
+
+    loop_count = len(mesh.loops)
+    vertex_indices = np.empty(loop_count, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_indices)
+    uvs = np.empty(loop_count * 2, dtype=np.float32)
+    mesh.uv_layers.active.data.foreach_get("uv", uvs)
+    uvs = np.round(uvs.reshape(-1, 2), 5)
+
+    # 頂点ごとに異なるUV座標の数を数える
+    pairs = np.unique(np.column_stack((vertex_indices, uvs)), axis=0)
+    counts = np.bincount(pairs[:, 0].astype(np.int64), minlength=len(mesh.vertices))
+    seams = counts > 1
+
+    # 明示的に指定された継ぎ目の辺も含める
+    edge_count = len(mesh.edges)
+    if edge_count:
+        use_seam = np.empty(edge_count, dtype=bool)
+        mesh.edges.foreach_get("use_seam", use_seam)
+        edge_vertices = np.empty(edge_count * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edge_vertices)
+        seams[edge_vertices.reshape(-1, 2)[use_seam].ravel()] = True
+    return seams
+
+
+def is_generated_lod(obj):
+    """LODGeneratorが作成した下位のLOD（LOD1以降）か"""
+    return obj.get(LOD_LEVEL_PROP, 0) > 0
+
+
+class LODGenerator:
+    """モデルからのLODチェーン生成"""
+
+    def __init__(self, ratios=DEFAULT_RATIOS, screen_percentages=DEFAULT_SCREEN_PERCENTAGES):
+        if len(screen_percentages) != len(ratios) + 1:
+            raise ValueError("screen_percentages はLOD0を含めて ratios より1つ多く指定してください")
+        self.ratios = tuple(ratios)
+        self.screen_percentages = tuple(screen_percentages)
+        self.results = {}  # モデル名 → [(LOD名, 三角形数), ...]
+
+    def protect_seams(self, obj):
+        """UVの継ぎ目の頂点を減らさないよう、重み0の頂点グループを作る"""
+        mesh = obj.data
+        seams = uv_seam_vertices(mesh)
+        group = obj.vertex_groups.new(name=PROTECT_GROUP)
+        free = np.flatnonzero(~seams).tolist()
+        protected = np.flatnonzero(seams).tolist()
+        if free:
+            group.add(free, 1.0, 'REPLACE')
+        if protected:
+            group.add(protected, 0.0, 'REPLACE')
+        return group
+
+    def create_lod(self, source, level, ratio, base_name):
+        """1段階のLODを作成（モディファイアを評価したメッシュに置き換える）"""
+        lod = source.copy()
+        lod.data = source.data.copy()
+        lod.name = f"{base_name}_LOD{level}"
+        lod.data.name = lod.name
+        lod[LOD_LEVEL_PROP] = level
+        lod[LOD_SOURCE_PROP] = base_name
+        for collection in source.users_collection:
+            collection.objects.link(lod)
+
+        # シェイプキーは下位のLODでは使わない（Decimateも適用できない）
+        if lod.data.shape_keys:
+            lod.shape_key_clear()
+
+        # アーマチュアの変形を含めないよう、評価中は他のモディファイアを無効にする
+        hidden = []
+        for modifier in lod.modifiers:
+            if modifier.show_viewport:
+                modifier.show_viewport = False
+                hidden.append(modifier.name)
+
+        self.protect_seams(lod)
+        decimate = lod.modifiers.new(name="LOD_Decimate", type='DECIMATE')
+        decimate.decimate_type = 'COLLAPSE'
+        decimate.ratio = ratio
+        decimate.vertex_group = PROTECT_GROUP
+        decimate.vertex_group_factor = 1.0
+
+        # 評価結果のメッシュに置き換え（ウェイト・UVなど全データ層を保持）
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        evaluated = lod.evaluated_get(depsgraph)
+        mesh = bpy.data.meshes.new_from_object(evaluated, preserve_all_data_layers=True, depsgraph=depsgraph)
+        old_mesh = lod.data
+        lod.data = mesh
+        mesh.name = lod.name
+        bpy.data.meshes.remove(old_mesh)
+
+        lod.modifiers.remove(decimate)
+        lod.vertex_groups.remove(lod.vertex_groups[PROTECT_GROUP])
+        for name in hidden:
+            lod.modifiers[name].show_viewport = True
+        return lod
+
+    def remove_lods(self, base_name):
+        """以前に作成した下位のLODを削除（作り直す前に名前を空ける）"""
+        for obj in list(bpy.data.objects):
+            if is_generated_lod(obj) and obj.get(LOD_SOURCE_PROP) == base_name:
+                mesh = obj.data
+                bpy.data.objects.remove(obj, do_unlink=True)
+                if mesh.users == 0:
+                    bpy.data.meshes.remove(mesh)
+
+    def group_parent(self, obj, base_name):
+        """LODを並べる親（アーマチュアがあればそれ、無ければ空オブジェクト）"""
+        if obj.parent is not None:
+            return obj.parent
+
+        # 元のモデルは先に _LOD0 に改名してあるので、親は base_name のまま作れる
+        group = bpy.data.objects.new(base_name, None)
+        for collection in obj.users_collection:
+            collection.objects.link(group)
+        matrix = obj.matrix_world.copy()
+        obj.parent = group
+        obj.matrix_world = matrix
+        return group
+
+    def generate(self, obj):
+        """オブジェクトからLOD0〜LODnを作成"""
+        base_name = obj.name[:-5] if obj.name.endswith("_LOD0") else obj.name
+        self.remove_lods(base_name)
+        obj.name = f"{base_name}_LOD0"
+        obj[LOD_LEVEL_PROP] = 0
+        parent = self.group_parent(obj, base_name)
+
+        lods = [obj]
+        for level, ratio in enumerate(self.ratios, start=1):
+            lod = self.create_lod(obj, level, ratio, base_name)
+            lod.parent = parent
+            lod.matrix_world = obj.matrix_world.copy()
+            lods.append(lod)
+
+        self.results[base_name] = [(lod.name, triangle_count(lod.data)) for lod in lods]
+        return lods
+
+    def generate_all(self, objects):
+        """メッシュオブジェクトすべてのLODを作成（作成済みの下位のLODは除き、LOD0からは作り直す）"""
+        targets = [
+            obj for obj in objects
+            if obj.type == 'MESH' and not is_generated_lod(obj)
+        ]
+        for obj in targets:
+            self.generate(obj)
+        return self.results
+
+    def meta_screen_percentages(self, indent="    "):
+        """.fbx.meta の lODScreenPercentages 部分"""
+        lines = [f"{indent}lODScreenPercentages:"]
+        lines.extend(f"{indent}- {value}" for value in self.screen_percentages)
+        return "\n".join(lines)
+
+    def print_report(self):
+        """LODごとの三角形数を表示"""
+        for base_name, lods in self.results.items():
+            base_count = max(lods[0][1], 1)
+            print(f"LOD: {base_name}")
+            for name, count in lods:
+                print(f"  {name}: {count}三角形 ({count / base_count:.0%})")
+
+# 実行
+if __name__ == "__main__":
+    # 選択中のモデルのLODを作成
+    generator = LODGenerator()
+    generator.generate_all(bpy.context.selected_objects)
+    generator.print_report()
@@ -0,0 +1,199 @@
+import bpy
+import json
+import hashlib
+
+"""
+パラメータの内容で一意に決まるマテリアルの共有
+同じ設定のマテリアルはキャラクター・環境・再作成をまたいで1つだけ作り、
+エクスポート前に重複したマテリアルをまとめて件数を報告する
+"""
+
+# マテリアルに保存するキーのカスタムプロパティ名
+MATERIAL_KEY_PROP = "material_key"
+
+# ベイク済みの画像に保存されたキー（texture_baker.py と同じ名前）
+TEXTURE_KEY_PROP = "texture_key"
+
+# パラメータ名 → Principled BSDFの入力名（Blender 4.x）
+BSDF_INPUTS = {
+    "color": "Base Color",
+    "roughness": "Roughness",
+    "metallic": "Metallic",
+    "ior": "IOR",
+    "transmission": "Transmission Weight",
+    "alpha": "Alpha"
+}
+
+# Principled BSDFの既定値（設定が無い項目のキー計算に使う）
+BSDF_DEFAULTS = {
+    "color": (0.8, 0.8, 0.8, 1.0),
+    "roughness": 0.5,
+    "metallic": 0.0,
+    "ior": 1.5,
+    "transmission": 0.0,
+    "alpha": 1.0
+}
+
+
+def normalize_params(params):
+    """既定値を補い、浮動小数の誤差を丸めたパラメータ"""
+    normalized = {}
+    for name, default in BSDF_DEFAULTS.items():
+        value = params.get(name, default)
+        if isinstance(value, (tuple, list)):
+            normalized[name] = [round(float(v), 4) for v in value]
+        else:
+            normalized[name] = round(float(value), 4)
+    return normalized
+
+
+def material_key(params, image_key=None):
+    """マテリアルのパラメータ（と貼る画像）から内容のハッシュを計算"""
+    normalized = normalize_params(params)
+    if image_key is not None:
+        normalized["image"] = image_key
+    payload = json.dumps(normalized, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_params(mat):
+    """既存マテリアルのパラメータを読み取る（単純なPrincipled BSDF以外はNone）"""
+    if not mat.use_nodes or mat.node_tree is None:
+        return {"color": tuple(mat.diffuse_color)}
+
+    nodes = mat.node_tree.nodes
+    bsdf = nodes.get("Principled BSDF")
+    if bsdf is None or len(nodes) != 2:
+        return None
+
+    # 入力にノードが接続されている場合は値だけでは比較できない
+    params = {}
+    for name, input_name in BSDF_INPUTS.items():
+        socket = bsdf.inputs.get(input_name)
+        if socket is None:
+            continue
+        if socket.is_linked:
+            return None
+        value = socket.default_value
+        params[name] = tuple(value) if name == "color" else value
+    return params
+
+
+class MaterialPool:
+    """内容アドレスによるマテリアルの登録・再利用"""
+
+    def __init__(self):
+        self.materials = {}   # キー → マテリアル
+        self.requests = 0
+        self.reused = 0
+        self.scan()
+
+    def scan(self):
+        """セッション内の既存マテリアル（以前の作成で登録済みのもの）を読み込む"""
+        for mat in bpy.data.materials:
+            key = mat.get(MATERIAL_KEY_PROP)
+            if key and key not in self.materials:
+                self.materials[key] = mat
+
+    def lookup(self, key):
+        """登録済みのマテリアル（削除済みならNone）"""
+        mat = self.materials.get(key)
+        if mat is None:
+            return None
+        try:
+            mat.name
+        except ReferenceError:
+            del self.materials[key]
+            return None
+        return mat
+
+    def get(self, name, color=BSDF_DEFAULTS["color"], image=None, **params):
+        """パラメータに一致するマテリアルを返す（無ければ作成）"""
+        # params: roughness, metallic, ior, transmission, alpha
+        # image: Base Color に貼る画像（ベイク済みのテクスチャなど）
+        params["color"] = tuple(color)
+        image_key = None
+        if image is not None:
+            image_key = image.get(TEXTURE_KEY_PROP) or image.name
+        key = material_key(params, image_key)
+        self.requests += 1
+
+        mat = self.lookup(key)
+        if mat is None:
+            # 別のプールやファイルの読み込みで追加されたマテリアルも探す
+            self.scan()
+            mat = self.lookup(key)
+        if mat is not None:
+            self.reused += 1
+            return mat
+
+        # 同名の別マテリアルがある場合は ".001" ではなくキーを付けて区別する
+        if name in bpy.data.materials:
+            name = f"{name}_{key[:6]}"
+
+        mat = bpy.data.materials.new(name=name)
+        mat.use_nodes = True
+        bsdf = mat.node_tree.nodes["Principled BSDF"]
+        for param, value in params.items():
+            bsdf.inputs[BSDF_INPUTS[param]].default_value = value
+        if image is not None:
+            texture = mat.node_tree.nodes.new("ShaderNodeTexImage")
+            texture.image = image
+            mat.node_tree.links.new(texture.outputs["Color"], bsdf.inputs["Base Color"])
+        mat.diffuse_color = params["color"]
+        mat[MATERIAL_KEY_PROP] = key
+
+        self.materials[key] = mat
+        return mat
+
+    def key_of(self, mat):
+        """マテリアルのキー（プールを通さず作られたものは内容から計算）"""
+        key = mat.get(MATERIAL_KEY_PROP)
+        if key:
+            return key
+        params = read_params(mat)
+        if params is None:
+            # 比較できないマテリアルは名前で区別する
+            return f"name:{mat.name}"
+        return material_key(params)
+
+    def deduplicate(self, objects):
+        """オブジェクトのマテリアルスロットで内容が同じものを1つにまとめる"""
+        # 戻り値: (まとめる前の種類数, まとめた後の種類数)
+        canonical = {}
+        before = set()
+        for obj in objects:
+            if obj.type != 'MESH':
+                continue
+            for slot in obj.material_slots:
+                mat = slot.material
+                if mat is None:
+                    continue
+                before.add(mat.name)
+                key = self.key_of(mat)
+                # プールに登録済みのものを優先して残す
+                kept = canonical.setdefault(key, self.lookup(key) or mat)
+                if kept != mat:
+                    slot.material = kept
+
+        return len(before), len({mat.name for mat in canonical.values()})
+
+    def print_report(self, objects=None):
+        """マテリアルの作成・再利用状況を表示"""
+        print(f"マテリアルプール: {len(self.materials)}種類 / 要求 {self.requests}回 / 再利用 {self.reused}回")
+        if objects is not None:
+            before, after = self.deduplicate(objects)
+            print(f"  エクスポート対象のマテリアル: {before}個 → 重複をまとめて {after}個")
+            return after
+        return len(self.materials)
+
+
+_pool = None
+
+
+def material_pool():
+    """セッションで共有するマテリアルプール"""
+    global _pool
+    if _pool is None:
+        _pool = MaterialPool()
+    return _pool
@@ -0,0 +1,290 @@
+import bpy
+import bmesh
+import math
+import numpy as np
+from mathutils import Matrix, Vector, Euler
+from deform_kernels import read_coords, write_coords, apply_ops
+from session_manager import clear_scene_data
+
+"""
+オペレーターを使わないメッシュ構築モジュール
+プリミティブ作成・変形・配置をすべて1つのbmesh上で行い、
+パーツごとのマテリアル番号を保ったまま最後に1回だけメッシュへ書き込む
+頂点変形（deform_kernels）は書き込み後にパーツのローカル座標で一括適用する
+"""
+
+# パーツ番号を保存する面の属性名（パーツ名の一覧はメッシュの "part_names" に保存）
+PART_ATTRIBUTE = "part"
+# 頂点の作成順を記録する作業用のレイヤー（メッシュには書き込まない）
+ORDER_LAYER = "_order"
+
+
+def add_vertex_groups(obj):
+    """メッシュに記録された頂点グループ名をオブジェクトに追加（ウェイトはメッシュ側にある）"""
+    for name in obj.data.get("vertex_groups", []):
+        if name not in obj.vertex_groups:
+            obj.vertex_groups.new(name=name)
+
+
+def clear_scene():
+    """シーンのオブジェクトと、それにより使われなくなったデータを削除（オペレーターを使わない）"""
+    return clear_scene_data()
+
+
+class MeshBuilder:
+    """単一bmeshへのパーツ追加"""
+
+    def __init__(self):
+        self.bm = bmesh.new()
+        self.uv_layer = self.bm.loops.layers.uv.verify()
+
+        # パーツごとの集計 {パーツ名: {"verts", "faces", "material"}}
+        self.parts = {}
+        self.part_layer = self.bm.faces.layers.int.new(PART_ATTRIBUTE)
+        self.part_names = []
+
+        # 頂点の作成順の番号（bmeshは解放した領域を再利用するため、頂点の並びは作成順にならない）
+        self.order_layer = self.bm.verts.layers.int.new(ORDER_LAYER)
+        self.vertex_count = 0
+
+        # 頂点グループ（名前の順番がグループ番号）
+        # 頂点があるbmeshにレイヤーを追加すると既存のBMVertの参照が無効になるため、最初に作成する
+        self.vertex_groups = []
+        self.deform_layer = self.bm.verts.layers.deform.verify()
+
+        # 書き込み後に適用する変形 [{"verts", "ops", "matrix"}]
+        self.deformations = []
+
+    def finish_part(self, verts, name, material, smooth):
+        """パーツの面にマテリアル番号とスムーズシェーディングを設定"""
+        faces = {face for vert in verts for face in vert.link_faces}
+        part_index = -1
+        if name:
+            if name not in self.part_names:
+                self.part_names.append(name)
+            part_index = self.part_names.index(name)
+        for face in faces:
+            face.material_index = material
+            face.smooth = smooth
+            face[self.part_layer] = part_index
+        for vert in verts:
+            vert[self.order_layer] = self.vertex_count
+            self.vertex_count += 1
+
+        if name:
+            part = self.parts.setdefault(name, {"verts": 0, "faces": 0, "material": material})
+            part["verts"] += len(verts)
+            part["faces"] += len(faces)
+        return verts
+
+    # ---- プリミティブ（原点に作成し、頂点リストを返す） ----
+
+    def add_uv_sphere(self, segments=32, ring_count=16, radius=1.0, name=None, material=0, smooth=True):
+        """UV球"""
+        result = bmesh.ops.create_uvsphere(
+            self.bm, u_segments=segments, v_segments=ring_count, radius=radius, calc_uvs=True
+        )
+        return self.finish_part(result["verts"], name, material, smooth)
+
+    def add_ico_sphere(self, subdivisions=2, radius=1.0, name=None, material=0, smooth=True):
+        """ICO球"""
+        result = bmesh.ops.create_icosphere(
+            self.bm, subdivisions=subdivisions, radius=radius, calc_uvs=True
+        )
+        return self.finish_part(result["verts"], name, material, smooth)
+
+    def add_cone(self, vertices=32, radius1=1.0, radius2=0.0, depth=2.0, name=None, material=0, smooth=True):
+        """円錐（radius2を指定すると円錐台）"""
+        result = bmesh.ops.create_cone(
+            self.bm, cap_ends=True, cap_tris=False, segments=vertices,
+            radius1=radius1, radius2=radius2, depth=depth, calc_uvs=True
+        )
+        return self.finish_part(result["verts"], name, material, smooth)
+
+    def add_cylinder(self, vertices=32, radius=1.0, depth=2.0, name=None, material=0, smooth=True):
+        """円柱"""
+        return self.add_cone(vertices, radius, radius, depth, name, material, smooth)
+
+    def add_cube(self, size=2.0, name=None, material=0, smooth=True):
+        """立方体"""
+        result = bmesh.ops.create_cube(self.bm, size=size, calc_uvs=True)
+        return self.finish_part(result["verts"], name, material, smooth)
+
+    def add_torus(self, major_radius=1.0, minor_radius=0.25, major_segments=48, minor_segments=12,
+                  name=None, material=0, smooth=True):
+        """トーラス（bmesh.opsに無いため頂点から作成）"""
+        rings = []
+        for i in range(major_segments):
+            angle = 2 * math.pi * i / major_segments
+            ring = []
+            for j in range(minor_segments):
+                minor_angle = 2 * math.pi * j / minor_segments
+                distance = major_radius + minor_radius * math.cos(minor_angle)
+                ring.append(self.bm.verts.new((
+                    distance * math.cos(angle),
+                    distance * math.sin(angle),
+                    minor_radius * math.sin(minor_angle)
+                )))
+            rings.append(ring)
+
+        for i in range(major_segments):
+            next_i = (i + 1) % major_segments
+            for j in range(minor_segments):
+                next_j = (j + 1) % minor_segments
+                face = self.bm.faces.new((rings[i][j], rings[next_i][j], rings[next_i][next_j], rings[i][next_j]))
+                # 継ぎ目で折り返さないよう、インデックスからUVを設定
+                uvs = [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)]
+                for loop, (u, v) in zip(face.loops, uvs):
+                    loop[self.uv_layer].uv = (u / major_segments, v / minor_segments)
+
+        verts = [vert for ring in rings for vert in ring]
+        return self.finish_part(verts, name, material, smooth)
+
+    # ---- 変形（オペレーターの編集モードでの変形に相当） ----
+
+    def deform(self, verts, ops):
+        """パーツの現在のローカル座標に対する変形カーネルを登録"""
+        # verts は add_* が返したリスト。書き込み後の頂点番号（作成順）の範囲 (start, count) を記録する
+        # （BMVertは書き込み時まで参照しない。verts は移動・回転の記録の照合だけに使う）
+        indices = [vert[self.order_layer] for vert in verts]
+        start, count = min(indices), len(indices)
+        if max(indices) - start + 1 != count:
+            raise RuntimeError("変形するパーツの頂点番号が連続していません（頂点の結合・削除の後に登録されました）")
+        self.deformations.append({"verts": verts, "start": start, "count": count, "ops": ops, "matrix": Matrix.Identity(4)})
+        return verts
+
+    def track_transform(self, verts, matrix):
+        """登録済みの変形に、その後の移動・回転を記録"""
+        for deformation in self.deformations:
+            if deformation["verts"] is verts:
+                deformation["matrix"] = matrix @ deformation["matrix"]
+
+    def resize(self, verts, scale):
+        """原点を中心に拡大縮小（transform.resize 相当）"""
+        bmesh.ops.scale(self.bm, vec=Vector(scale), verts=verts)
+        self.track_transform(verts, Matrix.Diagonal(Vector(scale)).to_4x4())
+        return verts
+
+    def rotate(self, verts, angle, axis):
+        """原点を中心に回転（transform.rotate 相当、オペレーターと同じく符号は逆向き）"""
+        matrix = Matrix.Rotation(-angle, 4, axis)
+        bmesh.ops.rotate(self.bm, cent=(0, 0, 0), matrix=matrix.to_3x3(), verts=verts)
+        self.track_transform(verts, matrix)
+        return verts
+
+    def place(self, verts, location=(0, 0, 0), rotation=(0, 0, 0)):
+        """オブジェクトの位置・回転を頂点に適用（プリミティブ追加時の location/rotation 相当）"""
+        matrix = Matrix.Translation(location) @ Euler(rotation).to_matrix().to_4x4()
+        bmesh.ops.transform(self.bm, matrix=matrix, verts=verts)
+        self.track_transform(verts, matrix)
+        return verts
+
+    def merge_by_distance(self, verts, distance=0.0001):
+        """重複頂点の結合（mesh.remove_doubles 相当）"""
+        # 結合すると登録済みの変形の頂点番号の範囲がずれるため、変形を登録した後は使えない
+        if self.deformations:
+            raise RuntimeError("変形を登録した後は頂点を結合できません（結合は deform の前に行ってください）")
+        bmesh.ops.remove_doubles(self.bm, verts=verts, dist=distance)
+        self.sort_verts()
+        for index, vert in enumerate(self.bm.verts):
+            vert[self.order_layer] = index
+        self.vertex_count = len(self.bm.verts)
+
+    def sort_verts(self):
+        """頂点を作成順に並べ替える（書き込み後の頂点番号が作成順になる）"""
+        self.bm.verts.sort(key=lambda vert: vert[self.order_layer])
+
+    # ---- 頂点グループ ----
+
+    def set_weights(self, verts, group, weights):
+        """頂点グループのウェイトを設定（オブジェクト作成時にグループを追加）"""
+        deform_layer = self.deform_layer
+        if group not in self.vertex_groups:
+            self.vertex_groups.append(group)
+        index = self.vertex_groups.index(group)
+        for vert, weight in zip(verts, weights):
+            vert[deform_layer][index] = weight
+        return verts
+
+    def fill_weights(self, group, weight):
+        """グループのウェイトが未設定の頂点すべてに値を設定"""
+        deform_layer = self.deform_layer
+        if group not in self.vertex_groups:
+            self.vertex_groups.append(group)
+        index = self.vertex_groups.index(group)
+        for vert in self.bm.verts:
+            if index not in vert[deform_layer]:
+                vert[deform_layer][index] = weight
+
+    # ---- 書き込み ----
+
+    def apply_deformations(self, mesh):
+        """登録した変形を頂点座標の一括取得・設定で適用"""
+        co = read_coords(mesh)
+        for deformation in self.deformations:
+            start = deformation["start"]
+            end = start + deformation["count"]
+            matrix = np.array(deformation["matrix"])
+
+            # パーツのローカル座標に戻して変形し、元の位置へ戻す
+            world = np.hstack((co[start:end], np.ones((end - start, 1))))
+            local = (world @ np.linalg.inv(matrix).T)[:, :3]
+            apply_ops(local, deformation["ops"])
+            co[start:end] = (np.hstack((local, np.ones((end - start, 1)))) @ matrix.T)[:, :3]
+        write_coords(mesh, co)
+        self.deformations = []
+
+    @staticmethod
+    def center_of_mass(mesh):
+        """面積で重み付けした表面の重心（ORIGIN_CENTER_OF_MASS 相当）"""
+        count = len(mesh.polygons)
+        areas = np.empty(count)
+        centers = np.empty(count * 3)
+        mesh.polygons.foreach_get("area", areas)
+        mesh.polygons.foreach_get("center", centers)
+        if areas.sum() <= 0:
+            return Vector((0, 0, 0))
+        return Vector((centers.reshape(-1, 3) * areas[:, None]).sum(axis=0) / areas.sum())
+
+    def to_mesh(self, name, origin=None):
+        """メッシュへ1回だけ書き込み、(メッシュ, 原点) を返す（オブジェクトは作らない）"""
+        # origin: 原点の位置（'CENTER_OF_MASS' で表面の重心）
+        mesh = bpy.data.meshes.new(name)
+        self.sort_verts()
+        self.bm.verts.layers.int.remove(self.order_layer)
+        self.bm.to_mesh(mesh)
+        self.bm.free()
+        self.bm = None
+        mesh["part_names"] = self.part_names
+        mesh["vertex_groups"] = self.vertex_groups
+
+        if self.deformations:
+            self.apply_deformations(mesh)
+
+        if origin == 'CENTER_OF_MASS':
+            origin = self.center_of_mass(mesh)
+        if origin is not None:
+            co = read_coords(mesh)
+            write_coords(mesh, co - np.asarray(origin))
+        return mesh, origin
+
+    def to_object(self, name, origin=None):
+        """メッシュへ1回だけ書き込み、オブジェクトとしてシーンに追加"""
+        mesh, origin = self.to_mesh(name, origin)
+        obj = bpy.data.objects.new(name, mesh)
+        add_vertex_groups(obj)
+        if origin is not None:
+            obj.location = origin
+        bpy.context.scene.collection.objects.link(obj)
+
+        # 以降の処理（マテリアル設定など）のためにアクティブにする
+        for other in bpy.context.view_layer.objects:
+            other.select_set(False)
+        obj.select_set(True)
+        bpy.context.view_layer.objects.active = obj
+        return obj
+
+    def print_parts(self):
+        """パーツごとの頂点数・面数を表示"""
+        for name, part in self.parts.items():
+            print(f"  {name}: {part['verts']}頂点 / {part['faces']}面 (マテリアル{part['material']})")
@@ -0,0 +1,332 @@
+import bpy
+import sys
+import math
+import time
+import numpy as np
+import os
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mesh_builder import MeshBuilder, add_vertex_groups
+from material_pool import material_pool
+from character_base import AnimeCharacterCreator, SKIN, HAIR, CLOTH
+from hair_generator import PIN_GROUP
+from budget_report import BudgetAnalyzer
+
+"""
+モブキャラクター（クラスメイト・背景の生徒）の大量生成スクリプト
+ベースモデル（AnimeCharacterCreator）の体型・髪型・色・アクセサリーをランダムに変えて作成する
+形状が同じNPCはメッシュを共有し、色はパレットのマテリアルをオブジェクト側のスロットで割り当てる
+"""
+
+# アクセサリーのマテリアルスロット（ベースモデルのスロットの後ろに追加）
+ACCESSORY = 3
+SLOT_COUNT = 4
+
+# 形状のバリエーション（離散値にしてメッシュを共有しやすくする）
+BUILD_LEVELS = [0.9, 1.0, 1.12]        # 体格（胴体の太さ）
+HEAD_LEVELS = [0.95, 1.0, 1.05]        # 頭の大きさ
+HAIR_STYLES = ["short", "long", "ponytail", "twin_tails"]
+ACCESSORIES = [None, "glasses", "ribbon", "cap"]
+
+# 身長はオブジェクトのスケールで変えるため連続値でよい
+HEIGHT_RANGE = (0.92, 1.06)
+
+# 色のパレット
+SKIN_PALETTE = [
+    (1.0, 0.85, 0.75, 1.0),
+    (1.0, 0.8, 0.7, 1.0),
+    (0.95, 0.75, 0.6, 1.0),
+    (0.85, 0.65, 0.5, 1.0)
+]
+HAIR_PALETTE = [
+    (0.05, 0.05, 0.08, 1.0),   # 黒
+    (0.3, 0.18, 0.1, 1.0),     # こげ茶
+    (0.6, 0.4, 0.25, 1.0),     # 茶
+    (0.9, 0.75, 0.45, 1.0),    # 金
+    (0.15, 0.15, 0.3, 1.0),    # 紺
+    (0.7, 0.3, 0.25, 1.0)      # 赤茶
+]
+CLOTH_PALETTE = [
+    (0.1, 0.1, 0.3, 1.0),      # 紺の制服
+    (0.2, 0.3, 0.8, 1.0),      # 青
+    (0.15, 0.15, 0.15, 1.0),   # 学ラン
+    (0.9, 0.9, 0.9, 1.0)       # 体操服
+]
+ACCESSORY_PALETTE = [
+    (0.1, 0.1, 0.1, 1.0),
+    (0.9, 0.2, 0.3, 1.0),
+    (0.95, 0.95, 0.95, 1.0)
+]
+
+PALETTES = {
+    "Skin": SKIN_PALETTE,
+    "Hair": HAIR_PALETTE,
+    "Cloth": CLOTH_PALETTE,
+    "Accessory": ACCESSORY_PALETTE
+}
+
+# スロット番号 → パレット名
+SLOT_PALETTES = {SKIN: "Skin", HAIR: "Hair", CLOTH: "Cloth", ACCESSORY: "Accessory"}
+
+
+class NPCCreator(AnimeCharacterCreator):
+    """形状パラメータを指定したベースモデルの作成（メッシュのみ）"""
+
+    def __init__(self, shape):
+        # ベースのコンストラクタはシーンを消去するため呼ばない
+        self.shape = shape
+        self.builder = None
+        self.hair_vertex_budget = 240
+
+    def create_head(self):
+        """頭部（大きさを変更）"""
+        size = self.shape["head"]
+        head = self.builder.add_uv_sphere(segments=16, ring_count=8, radius=size, name="Head", material=SKIN)
+        self.builder.resize(head, (0.9, 0.8, 1.0))
+        self.builder.deform(head, [
+            {"kernel": "scale", "where": [["z", "<", -0.3 * size]], "value": [1, 1, 0.5]}
+        ])
+        return self.builder.place(head, location=(0, 0, 1.6))
+
+    def create_body(self):
+        """胴体（体格を変更）"""
+        build = self.shape["build"]
+        body = self.builder.add_cylinder(vertices=8, radius=0.4, depth=1.2, name="Body", material=CLOTH)
+        self.builder.resize(body, (0.8 * build, 0.6 * build, 1.0))
+        return self.builder.place(body, location=(0, 0, 0.6))
+
+    def create_hair(self):
+        """髪型ごとのパーツを追加"""
+        builder = self.builder
+        hair = super().create_hair()
+        style = self.shape["hair"]
+
+        if style == "long":
+            back = builder.add_cube(size=1.0, name="Hair_Back", material=HAIR)
+            builder.resize(back, (0.9, 0.25, 1.1))
+            hair += builder.place(back, location=(0, -0.75, 1.3))
+        elif style == "ponytail":
+            tail = builder.add_cone(vertices=8, radius1=0.2, radius2=0.05, depth=0.8,
+                                    name="Ponytail", material=HAIR)
+            hair += builder.place(tail, location=(0, -1.1, 1.5), rotation=(math.radians(-30), 0, 0))
+        elif style == "twin_tails":
+            for side, x_pos in [("L", -0.9), ("R", 0.9)]:
+                tail = builder.add_cylinder(vertices=8, radius=0.15, depth=0.8,
+                                            name=f"TwinTail_{side}", material=HAIR)
+                hair += builder.place(tail, location=(x_pos, -0.2, 1.4),
+                                      rotation=(0, math.radians(20 if side == "L" else -20), 0))
+        return hair
+
+    def create_eyes(self):
+        """目（npc予算の目の三角形数に収まる分割数）"""
+        eyes = []
+        for side, x_pos in [("L", -0.25), ("R", 0.25)]:
+            eye = self.builder.add_uv_sphere(segments=8, ring_count=6, radius=0.15,
+                                             name=f"Eye_{side}", material=HAIR)
+            self.builder.resize(eye, (1.0, 0.3, 1.2))
+            eyes.extend(self.builder.place(eye, location=(x_pos, 0.7, 1.6)))
+        return eyes
+
+    def create_accessory(self):
+        """アクセサリーを追加"""
+        builder = self.builder
+        accessory = self.shape["accessory"]
+
+        if accessory == "glasses":
+            glasses = builder.add_torus(major_radius=0.22, minor_radius=0.015, major_segments=16,
+                                        minor_segments=4, name="Glasses", material=ACCESSORY)
+            builder.resize(glasses, (1.5, 0.1, 0.7))
+            return builder.place(glasses, location=(0, 0.78, 1.62))
+        if accessory == "ribbon":
+            ribbon = builder.add_cube(size=0.3, name="Ribbon", material=ACCESSORY)
+            builder.resize(ribbon, (1.2, 0.3, 0.5))
+            return builder.place(ribbon, location=(0.4, 0.2, 2.55), rotation=(0, 0, math.radians(20)))
+        if accessory == "cap":
+            cap = builder.add_uv_sphere(segments=12, ring_count=6, radius=1.15, name="Cap", material=ACCESSORY)
+            builder.resize(cap, (1.0, 1.0, 0.45))
+            builder.deform(cap, [{"kernel": "scale", "where": [["z", "<", 0]], "value": [1, 1, 0.1]}])
+            return builder.place(cap, location=(0, 0.05, 2.1))
+        return []
+
+    def build_mesh(self, name):
+        """形状パラメータからメッシュを作成"""
+        self.builder = MeshBuilder()
+        self.create_head()
+        self.create_body()
+        self.create_arms()
+        self.create_legs()
+        self.create_hair()
+        self.create_eyes()
+        self.create_accessory()
+        self.builder.fill_weights(PIN_GROUP, 1.0)
+
+        mesh, _ = self.builder.to_mesh(name)
+
+        # マテリアルはオブジェクト側で設定するため、メッシュには空のスロットだけ作る
+        for _ in range(SLOT_COUNT):
+            mesh.materials.append(None)
+        return mesh
+
+
+class NPCVariationGenerator:
+    """シード付きのNPCバリエーション生成"""
+
+    def __init__(self, count=200, seed=0, spacing=1.5, columns=20):
+        self.count = count
+        self.seed = seed
+        self.spacing = spacing
+        self.columns = columns
+
+        # 共有するデータブロック
+        self.meshes = {}       # 形状のキー → メッシュ
+        self.materials = {}    # (パレット名, 色番号) → マテリアル
+
+        self.build_times = []  # NPCごとの作成時間（秒）
+        self.mesh_builds = 0
+
+        # 作成したNPCごとに予算（"npc"）を検査し、超過があれば生成の最後に中断
+        self.enforce_budget = True
+        self.analyzer = BudgetAnalyzer()
+
+    def sample_variants(self):
+        """全NPCのパラメータを一括で決める（同じシードなら同じ結果）"""
+        rng = np.random.default_rng(self.seed)
+        n = self.count
+        builds = rng.integers(0, len(BUILD_LEVELS), n)
+        heads = rng.integers(0, len(HEAD_LEVELS), n)
+        hairs = rng.integers(0, len(HAIR_STYLES), n)
+        accessories = rng.choice(len(ACCESSORIES), n, p=[0.55, 0.2, 0.15, 0.1])
+        heights = rng.uniform(*HEIGHT_RANGE, n)
+        colors = {
+            palette: rng.integers(0, len(PALETTES[palette]), n)
+            for palette in PALETTES
+        }
+
+        variants = []
+        for i in range(n):
+            variants.append({
+                "name": f"NPC_{i:03d}",
+                "height": float(heights[i]),
+                "shape": {
+                    "build": BUILD_LEVELS[builds[i]],
+                    "head": HEAD_LEVELS[heads[i]],
+                    "hair": HAIR_STYLES[hairs[i]],
+                    "accessory": ACCESSORIES[accessories[i]]
+                },
+                "colors": {palette: int(indices[i]) for palette, indices in colors.items()}
+            })
+        return variants
+
+    @staticmethod
+    def shape_key(shape):
+        """形状パラメータのキー（同じキーのNPCはメッシュを共有）"""
+        return tuple(sorted(shape.items(), key=lambda item: item[0]))
+
+    def get_mesh(self, shape):
+        """形状に対応するメッシュ（無ければ作成）"""
+        key = self.shape_key(shape)
+        if key not in self.meshes:
+            name = f"NPC_Mesh_{len(self.meshes):02d}"
+            self.meshes[key] = NPCCreator(shape).build_mesh(name)
+            self.mesh_builds += 1
+        return self.meshes[key]
+
+    def get_material(self, palette, index):
+        """パレットの色に対応するマテリアル（無ければ作成）"""
+        key = (palette, index)
+        if key not in self.materials:
+            self.materials[key] = material_pool().get(f"NPC_{palette}_{index:02d}", PALETTES[palette][index])
+        return self.materials[key]
+
+    def create_collection(self):
+        """NPC用のコレクション"""
+        collection = bpy.data.collections.get("NPCs")
+        if collection is None:
+            collection = bpy.data.collections.new("NPCs")
+            bpy.context.scene.collection.children.link(collection)
+        return collection
+
+    def create_npc(self, variant, index, collection):
+        """1体のNPCオブジェクトを作成"""
+        obj = bpy.data.objects.new(variant["name"], self.get_mesh(variant["shape"]))
+        add_vertex_groups(obj)
+        collection.objects.link(obj)
+
+        # 色はオブジェクト側のスロットに設定（メッシュを共有したまま色を変える）
+        for slot_index, slot in enumerate(obj.material_slots):
+            palette = SLOT_PALETTES[slot_index]
+            slot.link = 'OBJECT'
+            slot.material = self.get_material(palette, variant["colors"][palette])
+
+        # 身長はスケールで変更し、足元を地面に合わせる
+        height = variant["height"]
+        row, column = divmod(index, self.columns)
+        obj.scale = (height, height, height)
+        obj.location = (column * self.spacing, -row * self.spacing, 1.35 * height)
+        obj["npc_shape"] = str(dict(variant["shape"]))
+        return obj
+
+    def generate(self):
+        """全NPCを作成"""
+        print(f"Generating {self.count} NPCs (seed={self.seed})...")
+        start = time.perf_counter()
+        collection = self.create_collection()
+
+        npcs = []
+        for index, variant in enumerate(self.sample_variants()):
+            npc_start = time.perf_counter()
+            npc = self.create_npc(variant, index, collection)
+            self.build_times.append(time.perf_counter() - npc_start)
+            npcs.append(npc)
+
+            # 予算の検査（超過したものだけ詳細を表示）
+            report = self.analyzer.analyze(npc, "npc")
+            if not report["passed"]:
+                self.analyzer.print_report(report)
+
+        self.total_time = time.perf_counter() - start
+        self.print_report()
+        print(f"Budget report: {self.analyzer.write('npcs_budget.json')}")
+
+        # 予算超過があればバッチを失敗させる（RuntimeError）
+        if self.enforce_budget:
+            self.analyzer.enforce()
+        return npcs
+
+    def report(self):
+        """作成結果の集計（機械可読）"""
+        times = np.array(self.build_times) * 1000
+        return {
+            "npcs": len(self.build_times),
+            "unique_meshes": len(self.meshes),
+            "unique_materials": len(self.materials),
+            "total_seconds": round(self.total_time, 3),
+            "build_ms": {
+                "mean": round(float(times.mean()), 3) if len(times) else 0.0,
+                "median": round(float(np.median(times)), 3) if len(times) else 0.0,
+                "max": round(float(times.max()), 3) if len(times) else 0.0
+            },
+            "per_npc_ms": [round(float(value), 3) for value in times]
+        }
+
+    def print_report(self):
+        """作成時間と共有状況を表示"""
+        report = self.report()
+        build_ms = report["build_ms"]
+        print(f"NPC: {report['npcs']}体 / {report['total_seconds']:.2f}秒")
+        print(f"  1体あたり: 平均 {build_ms['mean']:.2f}ms / 中央値 {build_ms['median']:.2f}ms / "
+              f"最大 {build_ms['max']:.2f}ms（メッシュ作成を含む場合）")
+        print(f"  ユニークなメッシュ: {report['unique_meshes']}個（{report['npcs']}体で共有）")
+        print(f"  ユニークなマテリアル: {report['unique_materials']}個")
+        failed = sum(1 for budget in self.analyzer.reports if not budget["passed"])
+        print(f"  予算 [npc]: {len(self.analyzer.reports) - failed}体OK / {failed}体超過")
+
+# 実行
+if __name__ == "__main__":
+    # blender --background --python npc_generator.py -- [体数] [シード]
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    count = int(args[0]) if len(args) > 0 else 200
+    seed = int(args[1]) if len(args) > 1 else 0
+
+    generator = NPCVariationGenerator(count=count, seed=seed)
+    generator.generate()
@@ -0,0 +1,178 @@
+import bpy
+import json
+import math
+import hashlib
+import numpy as np
+from pathlib import Path
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from material_pool import material_pool, read_params
+from texture_baker import TEXTURE_DIR
+from environment_materials import SURFACE_PROP, NON_ATLAS_SURFACES
+
+"""
+単色の小物のパレットアトラス
+単色マテリアル（画像の無いPrincipled BSDF）の色を1枚のパレット画像に並べ、
+各面のUVをその色のマス目の中心に付け替えて、粗さ・金属度が同じものを1つのマテリアルにまとめる
+床・壁のような大きな面は対象外（後からテクスチャを貼れるようUVを残す）
+ガラスのような透過する表面も、不透明なパレットのマテリアルにならないよう対象外
+"""
+
+# パレットの1色あたりのピクセル数（ミップマップでにじまない大きさ）
+SWATCH_SIZE = 8
+
+# 対象にする小物の最大寸法（m）
+MAX_PROP_SIZE = 2.5
+
+
+def linear_to_srgb(values):
+    """リニアの色をsRGBの画素値に変換"""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1 / 2.4) - 0.055)
+
+
+def flat_params(mat):
+    """パレットにまとめられる単色マテリアルのパラメータ（対象外はNone）"""
+    if mat is None or mat.get(SURFACE_PROP) in NON_ATLAS_SURFACES:
+        return None
+    params = read_params(mat)
+    if params is None or "color" not in params:
+        return None
+    if params.get("transmission", 0.0) > 0.0 or params.get("alpha", 1.0) < 1.0:
+        return None
+    return params
+
+
+class PaletteAtlas:
+    """単色の小物のパレット画像へのまとめ"""
+
+    def __init__(self, max_prop_size=MAX_PROP_SIZE, cache_dir=TEXTURE_DIR):
+        self.max_prop_size = max_prop_size
+        self.cache_dir = Path(cache_dir)
+        self.colors = []     # パレットの色（リニア）
+        self.meshes = []
+        self.before = 0
+        self.after = 0
+
+    def targets(self, objects):
+        """パレットにまとめるメッシュ（同じメッシュを共有するオブジェクトは1回だけ）"""
+        meshes = {}
+        for obj in objects:
+            if obj.type != 'MESH' or obj.modifiers or max(obj.dimensions) > self.max_prop_size:
+                continue
+            mesh = obj.data
+            if not mesh.materials or mesh.name in meshes:
+                continue
+            if all(flat_params(mat) is not None for mat in mesh.materials):
+                meshes[mesh.name] = mesh
+        return list(meshes.values())
+
+    def color_index(self, color):
+        """パレット内の色の番号（無ければ追加）"""
+        color = tuple(round(float(c), 4) for c in color[:3])
+        if color not in self.colors:
+            self.colors.append(color)
+        return self.colors.index(color)
+
+    def columns(self):
+        """パレットの列数（2の累乗）"""
+        return 2 ** max(1, math.ceil(math.log2(math.sqrt(max(len(self.colors), 1)))))
+
+    def swatch_uv(self, index):
+        """色のマス目の中心のUV"""
+        columns = self.columns()
+        return ((index % columns + 0.5) / columns, (index // columns + 0.5) / columns)
+
+    def palette_image(self):
+        """パレット画像（同じ色の組み合わせなら保存済みの画像を使う）"""
+        key = hashlib.sha256(json.dumps(self.colors).encode("utf-8")).hexdigest()[:16]
+        path = self.cache_dir / f"palette_{key}.png"
+        if path.exists():
+            return bpy.data.images.load(str(path), check_existing=True)
+
+        columns = self.columns()
+        size = columns * SWATCH_SIZE
+        pixels = np.ones((columns, columns, 4), dtype=np.float32)
+        for index, color in enumerate(self.colors):
+            pixels[index // columns, index % columns, :3] = linear_to_srgb(np.array(color))
+        pixels = pixels.repeat(SWATCH_SIZE, axis=0).repeat(SWATCH_SIZE, axis=1)
+
+        image = bpy.data.images.new(f"Palette_{key}", width=size, height=size, alpha=False)
+        image.pixels.foreach_set(pixels.ravel())
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        image.filepath_raw = str(path)
+        image.file_format = 'PNG'
+        image.save()
+        return image
+
+    def remap(self, mesh, slot_colors, slot_targets):
+        """面のUVを色のマス目に付け替え、スロットをまとめたマテリアルに置き換える"""
+        count = len(mesh.polygons)
+        loop_totals = np.empty(count, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        materials = np.empty(count, dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", materials)
+        materials = np.clip(materials, 0, len(slot_colors) - 1)
+
+        # ループごとの色のUV
+        swatches = np.array([self.swatch_uv(index) for index in slot_colors], dtype=np.float32)
+        if not mesh.uv_layers:
+            mesh.uv_layers.new()
+        uvs = swatches[np.repeat(materials, loop_totals)]
+        mesh.uv_layers.active.data.foreach_set("uv", uvs.ravel())
+
+        # スロット → まとめたマテリアルの番号
+        merged = []
+        for mat in slot_targets:
+            if mat not in merged:
+                merged.append(mat)
+        slot_map = np.array([merged.index(mat) for mat in slot_targets], dtype=np.int32)
+        mesh.polygons.foreach_set("material_index", slot_map[materials])
+
+        mesh.materials.clear()
+        for mat in merged:
+            mesh.materials.append(mat)
+
+    def apply(self, objects):
+        """単色の小物をパレットにまとめる（戻り値: まとめたメッシュ数）"""
+        self.meshes = self.targets(objects)
+        if not self.meshes:
+            return 0
+
+        # 先に全色を集めてパレットを作る
+        plans = []
+        for mesh in self.meshes:
+            params = [flat_params(mat) for mat in mesh.materials]
+            plans.append((mesh, params, [self.color_index(p["color"]) for p in params]))
+        self.before = len({mat.name for mesh in self.meshes for mat in mesh.materials})
+
+        image = self.palette_image()
+        pool = material_pool()
+        for mesh, params, slot_colors in plans:
+            # 粗さ・金属度が同じものは1つのマテリアル
+            slot_targets = [
+                pool.get(
+                    "Env_Palette", image=image,
+                    roughness=round(p.get("roughness", 0.5), 1),
+                    metallic=round(p.get("metallic", 0.0), 1)
+                )
+                for p in params
+            ]
+            self.remap(mesh, slot_colors, slot_targets)
+
+        self.after = len({mat.name for mesh in self.meshes for mat in mesh.materials})
+        return len(self.meshes)
+
+    def print_report(self):
+        """まとめた結果を表示"""
+        print(f"パレットアトラス: {len(self.meshes)}メッシュ / {len(self.colors)}色")
+        print(f"  マテリアル: {self.before}個 → {self.after}個")
+
+# 実行
+if __name__ == "__main__":
+    # 選択中の小物をパレットにまとめる
+    atlas = PaletteAtlas()
+    atlas.apply(bpy.context.selected_objects)
+    atlas.print_report()
@@ -2,6 +2,11 @@ import bpy
 import bmesh
 from mathutils import Vector, Matrix
 import math
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hair_generator import PIN_GROUP
 
 """
 キャラクター用物理シミュレーション設定スクリプト
@@ -51,6 +56,10 @@ class PhysicsSimulationSetup:
         # 重力の影響
         cloth_settings.effector_weights.gravity = 0.5  # 髪は軽いので重力を弱める
         
+        # 髪用の頂点グループ作成（生成時に固定用のウェイトがあればそれを使う）
+        if PIN_GROUP not in hair_object.vertex_groups:
+            self.create_hair_vertex_groups(hair_object)
+        
         # ピン設定（髪の根元を固定）
         self.setup_hair_pinning(hair_object)
         
@@ -59,9 +68,6 @@ class PhysicsSimulationSetup:
         cloth_modifier.collision_settings.distance_min = 0.001
         cloth_modifier.collision_settings.self_distance_min = 0.002
         
-        # 髪用の頂点グループ作成
-        self.create_hair_vertex_groups(hair_object)
-        
     def create_hair_vertex_groups(self, hair_object):
         """髪の頂点グループを作成"""
         bpy.context.view_layer.objects.active = hair_object
@@ -100,10 +106,12 @@ class PhysicsSimulationSetup:
         
     def setup_hair_pinning(self, hair_object):
         """髪のピン設定"""
-        if "Hair_Root" in hair_object.vertex_groups:
+        # 根元→毛先のウェイト（hair_generator）を優先し、無ければ高さで分けたグループを使う
+        pin_group = PIN_GROUP if PIN_GROUP in hair_object.vertex_groups else "Hair_Root"
+        if pin_group in hair_object.vertex_groups:
             cloth_modifier = hair_object.modifiers.get("Cloth")
             if cloth_modifier:
-                cloth_modifier.settings.vertex_group_mass = "Hair_Root"
+                cloth_modifier.settings.vertex_group_mass = pin_group
                 cloth_modifier.settings.pin_stiffness = 1.0
                 
     def setup_cloth_physics(self, cloth_object):
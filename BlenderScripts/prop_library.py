@@ -0,0 +1,86 @@
+import bpy
+import json
+import hashlib
+from mesh_builder import MeshBuilder
+
+"""
+環境の小物（机・椅子・テーブル・ベンチ・木など）の形状共有
+小物の種類とパラメータごとに形状を1回だけ作り、配置はメッシュを共有する
+リンク複製で行う（FBXでも1つのメッシュとして書き出され、Unityでプレハブにしやすい）
+"""
+
+# メッシュに保存するキーのカスタムプロパティ名
+PROP_KEY_PROP = "prop_key"
+
+
+def prop_key(kind, params):
+    """小物の種類とパラメータからキーを計算"""
+    payload = json.dumps({"kind": kind, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PropLibrary:
+    """小物のメッシュの作成・共有と配置"""
+
+    def __init__(self):
+        self.meshes = {}     # キー → メッシュ
+        self.instances = {}  # 種類 → 配置数
+        self.created = 0
+        self.scan()
+
+    def scan(self):
+        """セッション内の既存の小物メッシュを読み込む"""
+        for mesh in bpy.data.meshes:
+            key = mesh.get(PROP_KEY_PROP)
+            if key and key not in self.meshes:
+                self.meshes[key] = mesh
+
+    def lookup(self, key):
+        """登録済みのメッシュ（削除済みならNone）"""
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            return None
+        try:
+            mesh.name
+        except ReferenceError:
+            del self.meshes[key]
+            return None
+        return mesh
+
+    def mesh(self, kind, build, materials=(), **params):
+        """種類とパラメータに対応するメッシュ（無ければ build(builder, **params) で作成）"""
+        key = prop_key(kind, params)
+        mesh = self.lookup(key)
+        if mesh is not None:
+            return mesh
+
+        builder = MeshBuilder()
+        build(builder, **params)
+
+        # パラメータ違いの同じ種類は ".001" ではなくキーを付けて区別する
+        name = kind if kind not in bpy.data.meshes else f"{kind}_{key[:6]}"
+        mesh, _ = builder.to_mesh(name)
+        for mat in materials:
+            mesh.materials.append(mat)
+        mesh[PROP_KEY_PROP] = key
+
+        self.meshes[key] = mesh
+        self.created += 1
+        return mesh
+
+    def place(self, kind, build, name, location, rotation=(0, 0, 0), materials=(), **params):
+        """メッシュを共有するオブジェクトとして小物を配置"""
+        obj = bpy.data.objects.new(name, self.mesh(kind, build, materials, **params))
+        obj.location = location
+        obj.rotation_euler = rotation
+        bpy.context.scene.collection.objects.link(obj)
+
+        self.instances[kind] = self.instances.get(kind, 0) + 1
+        return obj
+
+    def print_report(self):
+        """種類ごとの配置数と、共有しているメッシュ数を表示"""
+        placed = sum(self.instances.values())
+        print(f"小物: {placed}個を配置 / メッシュ作成 {self.created}個")
+        for kind, count in sorted(self.instances.items()):
+            print(f"  {kind}: {count}個")
@@ -0,0 +1,248 @@
+import bpy
+import math
+import numpy as np
+
+"""
+Geometry Nodesによる植生・小物の散布
+密度マップ（頂点属性）・除外範囲（小道や小物の周り）・シード付きの乱数で
+地面の上に点を分布させ、形状を共有するインスタンスとして配置する
+インスタンスは数千個でもデータブロックを増やさず、エクスポート時だけ実体化する
+"""
+
+# 散布用のノードグループ名（すべての散布で共有）
+NODE_GROUP = "Scatter"
+
+# 密度を保存する頂点属性名
+DENSITY_ATTRIBUTE = "density"
+
+# 散布のモディファイア名
+MODIFIER = "Scatter"
+
+
+def input_socket(sockets, name):
+    """有効なソケットを名前で取得（データ型ごとに同名のソケットがあるノード用）"""
+    for socket in sockets:
+        if socket.name == name and socket.enabled:
+            return socket
+    raise KeyError(name)
+
+
+def segment_distance(points, start, end):
+    """点群から線分までのXY平面上の距離"""
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    direction = end - start
+    length = max(float(direction @ direction), 1e-12)
+    t = np.clip((points - start) @ direction / length, 0.0, 1.0)
+    closest = start + t[:, None] * direction
+    return np.linalg.norm(points - closest, axis=1)
+
+
+def offset_seed(nodes, links, seed_socket, offset):
+    """シードに値を足したソケット（乱数ごとに別の系列にする）"""
+    add = nodes.new("ShaderNodeMath")
+    add.operation = 'ADD'
+    links.new(seed_socket, add.inputs[0])
+    add.inputs[1].default_value = offset
+    return add.outputs["Value"]
+
+
+def build_node_group():
+    """散布のノードグループ（点の分布 → インスタンス配置 → 必要なら実体化）"""
+    group = bpy.data.node_groups.new(NODE_GROUP, 'GeometryNodeTree')
+    interface = group.interface
+    interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    interface.new_socket("Instances", in_out='INPUT', socket_type='NodeSocketCollection')
+    interface.new_socket("Density", in_out='INPUT', socket_type='NodeSocketFloat')
+    interface.new_socket("Distance Min", in_out='INPUT', socket_type='NodeSocketFloat')
+    interface.new_socket("Seed", in_out='INPUT', socket_type='NodeSocketInt')
+    interface.new_socket("Scale Min", in_out='INPUT', socket_type='NodeSocketFloat')
+    interface.new_socket("Scale Max", in_out='INPUT', socket_type='NodeSocketFloat')
+    interface.new_socket("Realize", in_out='INPUT', socket_type='NodeSocketBool')
+    interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = group.nodes
+    links = group.links
+    group_input = nodes.new("NodeGroupInput")
+    group_output = nodes.new("NodeGroupOutput")
+
+    # 密度マップ（頂点属性）に比例して分布（Poissonで最小間隔を保つ）
+    density = nodes.new("GeometryNodeInputNamedAttribute")
+    density.data_type = 'FLOAT'
+    density.inputs["Name"].default_value = DENSITY_ATTRIBUTE
+
+    distribute = nodes.new("GeometryNodeDistributePointsOnFaces")
+    distribute.distribute_method = 'POISSON'
+    links.new(group_input.outputs["Geometry"], distribute.inputs["Mesh"])
+    links.new(group_input.outputs["Distance Min"], distribute.inputs["Distance Min"])
+    links.new(group_input.outputs["Density"], distribute.inputs["Density Max"])
+    links.new(density.outputs["Attribute"], distribute.inputs["Density Factor"])
+    links.new(group_input.outputs["Seed"], distribute.inputs["Seed"])
+
+    # 形状はコレクションの子オブジェクトから選ぶ
+    collection = nodes.new("GeometryNodeCollectionInfo")
+    collection.transform_space = 'ORIGINAL'
+    collection.inputs["Separate Children"].default_value = True
+    collection.inputs["Reset Children"].default_value = True
+    links.new(group_input.outputs["Instances"], collection.inputs["Collection"])
+
+    # 形状の種類・Z軸の回転・大きさはシード付きの乱数
+    # 同じシードでは3つが同じ値の系列になる（大きい木ほど回転も大きい）ため、シードをずらす
+    pick = nodes.new("FunctionNodeRandomValue")
+    pick.data_type = 'INT'
+    input_socket(pick.inputs, "Max").default_value = 1000
+    links.new(group_input.outputs["Seed"], input_socket(pick.inputs, "Seed"))
+
+    angle = nodes.new("FunctionNodeRandomValue")
+    angle.data_type = 'FLOAT'
+    input_socket(angle.inputs, "Max").default_value = 2 * math.pi
+    links.new(offset_seed(nodes, links, group_input.outputs["Seed"], 1), input_socket(angle.inputs, "Seed"))
+    rotation = nodes.new("ShaderNodeCombineXYZ")
+    links.new(input_socket(angle.outputs, "Value"), rotation.inputs["Z"])
+
+    scale = nodes.new("FunctionNodeRandomValue")
+    scale.data_type = 'FLOAT'
+    links.new(group_input.outputs["Scale Min"], input_socket(scale.inputs, "Min"))
+    links.new(group_input.outputs["Scale Max"], input_socket(scale.inputs, "Max"))
+    links.new(offset_seed(nodes, links, group_input.outputs["Seed"], 2), input_socket(scale.inputs, "Seed"))
+
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    instance.inputs["Pick Instance"].default_value = True
+    links.new(distribute.outputs["Points"], instance.inputs["Points"])
+    links.new(collection.outputs["Instances"], instance.inputs["Instance"])
+    links.new(input_socket(pick.outputs, "Value"), instance.inputs["Instance Index"])
+    links.new(rotation.outputs["Vector"], instance.inputs["Rotation"])
+    links.new(input_socket(scale.outputs, "Value"), instance.inputs["Scale"])
+
+    # エクスポート時だけ実体化（通常はインスタンスのまま）
+    realize = nodes.new("GeometryNodeRealizeInstances")
+    links.new(instance.outputs["Instances"], realize.inputs["Geometry"])
+    switch = nodes.new("GeometryNodeSwitch")
+    switch.input_type = 'GEOMETRY'
+    links.new(group_input.outputs["Realize"], switch.inputs["Switch"])
+    links.new(instance.outputs["Instances"], switch.inputs["False"])
+    links.new(realize.outputs["Geometry"], switch.inputs["True"])
+    links.new(switch.outputs["Output"], group_output.inputs["Geometry"])
+    return group
+
+
+def scatter_node_group():
+    """散布のノードグループ（無ければ作成）"""
+    group = bpy.data.node_groups.get(NODE_GROUP)
+    if group is None or group.bl_idname != 'GeometryNodeTree':
+        group = build_node_group()
+    return group
+
+
+def set_input(modifier, name, value):
+    """Geometry Nodesモディファイアの入力を名前で設定"""
+    for item in modifier.node_group.interface.items_tree:
+        if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name:
+            modifier[item.identifier] = value
+            return
+    raise KeyError(name)
+
+
+def set_realize(objects, realize):
+    """散布オブジェクトのインスタンスを実体化する/しない（エクスポートの前後に切り替える）"""
+    changed = []
+    for obj in objects:
+        modifier = obj.modifiers.get(MODIFIER)
+        if modifier is not None and modifier.type == 'NODES':
+            set_input(modifier, "Realize", realize)
+            obj.update_tag()
+            changed.append(obj)
+    return changed
+
+
+class ScatterSystem:
+    """密度マップと除外範囲を持つ散布範囲"""
+
+    def __init__(self, size=20.0, resolution=40, seed=0, center=(0.0, 0.0)):
+        self.size = size
+        self.resolution = resolution
+        self.seed = seed
+        self.center = center
+        self.paths = []    # [(点のリスト, 半径)]
+        self.circles = []  # [(中心, 半径)]
+
+    def exclude_path(self, points, width, margin=0.5):
+        """小道（折れ線）の周りを除外"""
+        self.paths.append(([tuple(point[:2]) for point in points], width / 2 + margin))
+
+    def exclude_circle(self, center, radius):
+        """円形の範囲を除外（ベンチ・街灯などの周り）"""
+        self.circles.append((tuple(center[:2]), radius))
+
+    def grid(self):
+        """散布範囲の格子（頂点座標・面）"""
+        count = self.resolution + 1
+        axis = np.linspace(-self.size / 2, self.size / 2, count)
+        x, y = np.meshgrid(axis + self.center[0], axis + self.center[1])
+        co = np.column_stack((x.ravel(), y.ravel(), np.zeros(count * count)))
+
+        rows = np.arange(self.resolution)
+        i, j = np.meshgrid(rows, rows, indexing="ij")
+        first = (i * count + j).ravel()
+        faces = np.column_stack((first, first + 1, first + count + 1, first + count))
+        return co, faces
+
+    def density_map(self, co):
+        """頂点ごとの密度（0〜1、除外範囲は0で境界に向けてなだらかに上げる）"""
+        points = co[:, :2]
+
+        # 低周波の波を重ねて木立ちのまとまりを作る（シードで決まる）
+        rng = np.random.default_rng(self.seed)
+        variation = np.zeros(len(points))
+        for _ in range(4):
+            direction = rng.normal(size=2)
+            direction /= np.linalg.norm(direction)
+            frequency = rng.uniform(0.15, 0.4)
+            phase = rng.uniform(0, 2 * math.pi)
+            variation += np.cos(points @ direction * frequency * 2 * math.pi + phase)
+        density = np.clip(0.6 + variation / 8, 0.0, 1.0)
+
+        # 除外範囲からの距離（1mかけて密度を戻す）
+        for path, radius in self.paths:
+            distance = np.full(len(points), np.inf)
+            for start, end in zip(path, path[1:]):
+                distance = np.minimum(distance, segment_distance(points, start, end))
+            density *= np.clip(distance - radius, 0.0, 1.0)
+        for center, radius in self.circles:
+            distance = np.linalg.norm(points - np.asarray(center), axis=1)
+            density *= np.clip(distance - radius, 0.0, 1.0)
+        return density
+
+    def prototypes(self, name, meshes):
+        """インスタンスの形状を子に持つコレクション（シーンにはリンクしない）"""
+        collection = bpy.data.collections.get(name)
+        if collection is None:
+            collection = bpy.data.collections.new(name)
+        for obj in list(collection.objects):
+            collection.objects.unlink(obj)
+        for index, mesh in enumerate(meshes):
+            obj = bpy.data.objects.new(f"{name}_{index}", mesh)
+            collection.objects.link(obj)
+        return collection
+
+    def scatter(self, name, meshes, density=0.05, distance_min=2.0, scale=(0.8, 1.2), seed=None):
+        """散布オブジェクトを作成（density: 1平方メートルあたりの最大数）"""
+        co, faces = self.grid()
+        mesh = bpy.data.meshes.new(name)
+        mesh.from_pydata(co.tolist(), [], faces.tolist())
+        attribute = mesh.attributes.new(DENSITY_ATTRIBUTE, 'FLOAT', 'POINT')
+        attribute.data.foreach_set("value", self.density_map(co).astype(np.float32))
+
+        obj = bpy.data.objects.new(name, mesh)
+        bpy.context.scene.collection.objects.link(obj)
+
+        modifier = obj.modifiers.new(MODIFIER, 'NODES')
+        modifier.node_group = scatter_node_group()
+        set_input(modifier, "Instances", self.prototypes(f"{name}_Prototypes", meshes))
+        set_input(modifier, "Density", density)
+        set_input(modifier, "Distance Min", distance_min)
+        set_input(modifier, "Seed", self.seed if seed is None else seed)
+        set_input(modifier, "Scale Min", scale[0])
+        set_input(modifier, "Scale Max", scale[1])
+        set_input(modifier, "Realize", False)
+        return obj
@@ -0,0 +1,190 @@
+import bpy
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+"""
+バッチ実行中のデータブロック管理
+作成ステップごとに増えたデータブロックを記録し、ステップの間に
+そのステップで作られて使われなかったデータ（孤立したメッシュ・マテリアル・アクション・画像など）を
+オペレーターを使わずに削除する。以前のステップのデータ（未割り当てのアクション・画像など）は残す
+ステップごとのデータブロック数とメモリ使用量（RSS）を表示する
+"""
+
+# 管理対象のデータブロックの種類（bpy.data の属性名）
+DATABLOCK_TYPES = [
+    "objects",
+    "meshes",
+    "materials",
+    "actions",
+    "images",
+    "textures",
+    "node_groups",
+    "armatures",
+    "curves",
+    "lights",
+    "cameras",
+    "collections",
+    "shape_keys"
+]
+
+# 利用者が0でも削除しない種類（シェイプキーはメッシュと一緒に削除される）
+KEEP_TYPES = {"shape_keys"}
+
+# 利用者が0でも削除しない画像（レンダー結果など）
+KEEP_IMAGE_TYPES = {'RENDER_RESULT', 'COMPOSITING'}
+
+
+def rss_mb():
+    """現在のプロセスのメモリ使用量（MB、取得できなければNone）"""
+    # Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # macOS などは最大値で代用
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def datablock_counts():
+    """種類ごとのデータブロック数"""
+    return {name: len(getattr(bpy.data, name)) for name in DATABLOCK_TYPES}
+
+
+def datablock_pointers():
+    """種類ごとのデータブロックの識別子（作成されたものの判定用）"""
+    return {
+        name: {block.as_pointer() for block in getattr(bpy.data, name)}
+        for name in DATABLOCK_TYPES
+    }
+
+
+def in_use_pointers():
+    """種類ごとの利用者のいるデータブロックの識別子"""
+    return {
+        name: {block.as_pointer() for block in getattr(bpy.data, name) if block.users > 0}
+        for name in DATABLOCK_TYPES
+    }
+
+
+def purge_orphans(candidates=None):
+    """利用者のいないデータブロックを削除（削除されて新たに孤立したものも繰り返し削除）"""
+    # candidates: {種類: 識別子の集合}、指定した場合はその中のデータブロックだけを削除する
+    # 戻り値: {種類: 削除数}
+    removed = {}
+    while True:
+        orphans = []
+        for name in DATABLOCK_TYPES:
+            if name in KEEP_TYPES:
+                continue
+            for block in getattr(bpy.data, name):
+                if name == "images" and block.type in KEEP_IMAGE_TYPES:
+                    continue
+                if candidates is not None and block.as_pointer() not in candidates.get(name, ()):
+                    continue
+                if block.users == 0 and not block.use_fake_user:
+                    orphans.append(block)
+                    removed[name] = removed.get(name, 0) + 1
+        if not orphans:
+            return removed
+        bpy.data.batch_remove(orphans)
+
+
+def clear_scene_data(purge_all=False):
+    """シーンのオブジェクトを削除し、それにより使われなくなったデータも解放"""
+    # purge_all: 以前から孤立していたデータ（未割り当てのアクション・キャッシュ画像など）も削除する
+    candidates = None if purge_all else in_use_pointers()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    # 削除したオブジェクトがビューレイヤーに None として残らないよう更新
+    bpy.context.view_layer.update()
+    return purge_orphans(candidates)
+
+
+class BuildSession:
+    """作成ステップごとのデータブロックの追跡と解放"""
+
+    def __init__(self, disable_undo=False, purge=True):
+        self.disable_undo = disable_undo
+        self.purge = purge
+        self.steps = []
+        self.saved_undo = None
+
+    def __enter__(self):
+        # バッチ実行ではアンドゥの記録は不要（メモリと時間の節約）
+        if self.disable_undo:
+            edit = bpy.context.preferences.edit
+            self.saved_undo = edit.use_global_undo
+            edit.use_global_undo = False
+        self.record("start")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.saved_undo is not None:
+            bpy.context.preferences.edit.use_global_undo = self.saved_undo
+        self.print_report()
+        return False
+
+    def record(self, name, created=None, purged=None, elapsed=0.0):
+        """ステップの結果を記録"""
+        self.steps.append({
+            "step": name,
+            "seconds": round(elapsed, 3),
+            "created": created or {},
+            "purged": purged or {},
+            "counts": datablock_counts(),
+            "rss_mb": rss_mb()
+        })
+        return self.steps[-1]
+
+    @contextmanager
+    def step(self, name):
+        """1つの作成ステップ（終了時に作成数を記録し、このステップで作られて孤立したデータを削除）"""
+        before = datablock_pointers()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            after = datablock_pointers()
+            pointers = {kind: after[kind] - before[kind] for kind in DATABLOCK_TYPES}
+            created = {kind: len(new) for kind, new in pointers.items() if new}
+            purged = purge_orphans(pointers) if self.purge else {}
+            step = self.record(name, created, purged, time.perf_counter() - start)
+            self.print_step(step)
+
+    def print_step(self, step):
+        """1ステップの結果を表示"""
+        rss = f"{step['rss_mb']:.1f}MB" if step["rss_mb"] is not None else "不明"
+        created = ", ".join(f"{kind} +{count}" for kind, count in step["created"].items()) or "なし"
+        purged = ", ".join(f"{kind} -{count}" for kind, count in step["purged"].items()) or "なし"
+        print(f"[{step['step']}] {step['seconds']:.2f}秒 / RSS {rss}")
+        print(f"  作成: {created}")
+        print(f"  削除（孤立データ）: {purged}")
+
+    def print_report(self):
+        """全ステップのデータブロック数とRSSの推移を表示"""
+        print("データブロック数とメモリの推移:")
+        kinds = [kind for kind in DATABLOCK_TYPES if any(step["counts"][kind] for step in self.steps)]
+        print("  " + " / ".join(["step", "RSS(MB)"] + kinds))
+        for step in self.steps:
+            rss = f"{step['rss_mb']:.1f}" if step["rss_mb"] is not None else "-"
+            values = [str(step["counts"][kind]) for kind in kinds]
+            print("  " + " / ".join([step["step"], rss] + values))
+
+# 実行
+if __name__ == "__main__":
+    # 現在のファイルの孤立データをすべて削除
+    before = rss_mb()
+    removed = purge_orphans()
+    print(f"削除: {removed or 'なし'}")
+    print(f"RSS: {before} → {rss_mb()} MB (pid {os.getpid()})")
@@ -0,0 +1,241 @@
+import bpy
+import time
+import numpy as np
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mesh_builder import PART_ATTRIBUTE
+
+"""
+シェイプキー生成モジュール
+ベース形状の頂点座標を一度だけ読み込み、顔パーツ（口・目・眉・頬）の領域マスクと
+減衰から各シェイプキーの変位を一括計算して書き込む
+変位が全て0になるキーは作成しない（既存のものは削除する）
+"""
+
+# 顔パーツの領域（頭部のバウンディングボックスで正規化した座標、+Yが正面）
+# (中心, 半径) の楕円体。中心のXが0以外のものは左右対称に自動で複製
+FACE_REGIONS = {
+    "mouth": [((0.0, 1.0, -0.45), (0.35, 0.5, 0.18))],
+    "mouth_corners": [((0.3, 1.0, -0.45), (0.12, 0.5, 0.12))],
+    "eyes": [((0.28, 1.0, 0.05), (0.18, 0.5, 0.14))],
+    "brows": [((0.28, 1.0, 0.3), (0.2, 0.5, 0.1))],
+    "brows_inner": [((0.14, 1.0, 0.28), (0.1, 0.5, 0.1))],
+    "brows_outer": [((0.42, 1.0, 0.3), (0.1, 0.5, 0.1))],
+    "cheeks": [((0.45, 1.0, -0.2), (0.2, 0.5, 0.18))],
+    "nose": [((0.0, 1.0, -0.2), (0.1, 0.5, 0.12))]
+}
+
+# 上下に分割した領域（元の領域, 分割する高さ, 1=上側 / -1=下側）
+REGION_SPLITS = {
+    "mouth_upper": ("mouth", -0.45, 1),
+    "mouth_lower": ("mouth", -0.45, -1),
+    "eyes_upper": ("eyes", 0.05, 1),
+    "eyes_lower": ("eyes", 0.05, -1)
+}
+
+# シェイプキーごとの変位 [(領域, 正規化座標での移動量)]
+# Xの移動量は外向きを正とする（左右で符号を反転）
+# 空のものはテクスチャや別オブジェクトで表現するため、頭部メッシュは変形しない
+SHAPE_KEY_RECIPES = {
+    # 口
+    "smile": [("mouth_corners", (0.04, -0.01, 0.06)), ("cheeks", (0.0, 0.01, 0.02))],
+    "mouth_open": [("mouth_lower", (0.0, 0.0, -0.12))],
+    "mouth_sad": [("mouth_corners", (0.0, 0.0, -0.05))],
+    "mouth_frown": [("mouth_corners", (-0.02, 0.0, -0.04)), ("mouth_upper", (0.0, 0.0, -0.01))],
+    "mouth_o": [("mouth_corners", (-0.04, 0.02, 0.0)), ("mouth_lower", (0.0, 0.0, -0.1)),
+                ("mouth", (0.0, 0.02, 0.0))],
+    "mouth_a": [("mouth_lower", (0.0, 0.0, -0.14)), ("mouth_upper", (0.0, 0.0, 0.02))],
+    "mouth_i": [("mouth_corners", (0.05, 0.0, 0.01)), ("mouth_lower", (0.0, 0.0, -0.03))],
+    "mouth_u": [("mouth_corners", (-0.06, 0.03, 0.0)), ("mouth", (0.0, 0.04, 0.0))],
+    "mouth_e": [("mouth_corners", (0.03, 0.0, 0.0)), ("mouth_lower", (0.0, 0.0, -0.07))],
+
+    # 目
+    "eyes_happy": [("eyes_lower", (0.0, 0.0, 0.04)), ("eyes_upper", (0.0, 0.0, -0.02))],
+    "eyes_down": [("eyes_upper", (0.0, 0.0, -0.05))],
+    "eyes_wide": [("eyes_upper", (0.0, 0.0, 0.04)), ("eyes_lower", (0.0, 0.0, -0.02))],
+    "eyes_sad": [("eyes_upper", (0.0, 0.0, -0.03)), ("brows_outer", (0.0, 0.0, -0.01))],
+    "eyes_angry": [("eyes_upper", (0.0, 0.0, -0.04)), ("brows_inner", (0.0, 0.0, -0.01))],
+    "eyes_heart": [],
+    "eyes_closed": [("eyes_upper", (0.0, 0.0, -0.1)), ("eyes_lower", (0.0, 0.0, 0.02))],
+    "blink": [("eyes_upper", (0.0, 0.0, -0.1)), ("eyes_lower", (0.0, 0.0, 0.02))],
+    "pupils_small": [],
+    "pupils_large": [],
+
+    # 眉
+    "brow_happy": [("brows", (0.0, 0.0, 0.03))],
+    "brow_worried": [("brows_inner", (0.0, 0.0, 0.05))],
+    "brow_up": [("brows", (0.0, 0.0, 0.07))],
+    "brow_sad": [("brows_inner", (0.0, 0.0, 0.04)), ("brows_outer", (0.0, 0.0, -0.02))],
+    "brow_angry": [("brows_inner", (-0.02, 0.0, -0.05)), ("brows_outer", (0.0, 0.0, 0.02))],
+    "brow_neutral": [],
+
+    # その他
+    "cheek_raise": [("cheeks", (0.0, 0.01, 0.04))],
+    "blush": [],
+    "tears": [],
+    "nose_wrinkle": [("nose", (0.0, 0.0, 0.02))],
+    "sparkle": [],
+    "sweat": []
+}
+
+# これ以下の変位は0とみなす
+ZERO_EPSILON = 1e-6
+
+# 結合済みメッシュで顔の領域の基準にするパーツ名
+HEAD_PART = "Head"
+
+
+def head_bounds(mesh, part=HEAD_PART):
+    """結合済みメッシュの頭部パーツの中心・半径と頂点のマスク（パーツ情報が無ければNone）"""
+    attribute = mesh.attributes.get(PART_ATTRIBUTE)
+    part_names = list(mesh.get("part_names", []))
+    if attribute is None or part not in part_names:
+        return None, None, None
+
+    count = len(mesh.polygons)
+    parts = np.empty(count, dtype=np.int32)
+    attribute.data.foreach_get("value", parts)
+    loop_totals = np.empty(count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_indices)
+
+    # 頭部の面の頂点
+    head_loops = np.repeat(parts == part_names.index(part), loop_totals)
+    mask = np.zeros(len(mesh.vertices), dtype=bool)
+    mask[vertex_indices[head_loops]] = True
+    if not mask.any():
+        return None, None, None
+
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)[mask]
+    low, high = co.min(axis=0), co.max(axis=0)
+    return (low + high) / 2, (high - low) / 2, mask
+
+
+class ShapeKeyBuilder:
+    """領域マスクによるシェイプキーの一括生成"""
+
+    def __init__(self, mesh_obj, center=None, size=None, mask=None):
+        self.mesh_obj = mesh_obj
+
+        # ベース形状を一括で読み込み
+        mesh = mesh_obj.data
+        basis = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        if mesh.shape_keys:
+            mesh.shape_keys.reference_key.data.foreach_get("co", basis)
+        else:
+            mesh.vertices.foreach_get("co", basis)
+        self.basis = basis.reshape(-1, 3)
+
+        # 頭部の範囲（結合済みメッシュの場合は頭部の中心と半径を指定）
+        if center is None or size is None:
+            low = self.basis.min(axis=0) if len(self.basis) else np.zeros(3)
+            high = self.basis.max(axis=0) if len(self.basis) else np.zeros(3)
+            center = (low + high) / 2 if center is None else center
+            size = (high - low) / 2 if size is None else size
+        self.size = np.maximum(np.asarray(size, dtype=np.float32), 1e-6)
+        self.local = (self.basis - np.asarray(center, dtype=np.float32)) / self.size
+
+        # 変形する頂点（結合済みメッシュでは頭部のみ、髪や体は動かさない）
+        self.mask = np.ones(len(self.basis), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+        self.regions = {}
+        self.report = {}
+
+    def falloff(self, center, radius):
+        """楕円体内で滑らかに減衰する重み"""
+        distance = np.sum(((self.local - center) / radius) ** 2, axis=1)
+        return np.clip(1.0 - distance, 0.0, 1.0) ** 2 * self.mask
+
+    def region(self, name):
+        """領域の重み（頂点ごと、計算結果はキャッシュ）"""
+        if name in self.regions:
+            return self.regions[name]
+
+        if name in REGION_SPLITS:
+            parent, height, side = REGION_SPLITS[name]
+            split = np.clip(0.5 + side * (self.local[:, 2] - height) / 0.04, 0.0, 1.0)
+            weight = self.region(parent) * split
+        else:
+            weight = np.zeros(len(self.local), dtype=np.float32)
+            for center, radius in FACE_REGIONS[name]:
+                center = np.array(center, dtype=np.float32)
+                radius = np.array(radius, dtype=np.float32)
+                weight = np.maximum(weight, self.falloff(center, radius))
+                if center[0] != 0:
+                    center[0] = -center[0]
+                    weight = np.maximum(weight, self.falloff(center, radius))
+
+        self.regions[name] = weight
+        return weight
+
+    def compute_delta(self, recipe):
+        """1つのシェイプキーの変位（頂点数×3）"""
+        delta = np.zeros_like(self.basis)
+        outward = np.where(self.local[:, 0] < 0, -1.0, 1.0)
+        for region_name, offset in recipe:
+            offset = np.array(offset, dtype=np.float32) * self.size
+            weight = self.region(region_name)
+            delta[:, 0] += weight * offset[0] * outward
+            delta[:, 1] += weight * offset[1]
+            delta[:, 2] += weight * offset[2]
+        return delta
+
+    def build(self, recipes=None):
+        """シェイプキーを一括生成し、作成したキー名のリストを返す"""
+        recipes = SHAPE_KEY_RECIPES if recipes is None else recipes
+        start = time.perf_counter()
+
+        if not self.mesh_obj.data.shape_keys:
+            self.mesh_obj.shape_key_add(name="Basis")
+        key_blocks = self.mesh_obj.data.shape_keys.key_blocks
+
+        created = []
+        dropped = []
+        for key_name, recipe in recipes.items():
+            delta = self.compute_delta(recipe)
+
+            # 変位がないキーはデータを持たせない
+            if not len(delta) or np.abs(delta).max() <= ZERO_EPSILON:
+                if key_name in key_blocks:
+                    self.mesh_obj.shape_key_remove(key_blocks[key_name])
+                dropped.append(key_name)
+                continue
+
+            shape_key = key_blocks.get(key_name)
+            if not shape_key:
+                shape_key = self.mesh_obj.shape_key_add(name=key_name, from_mix=False)
+            shape_key.data.foreach_set("co", (self.basis + delta).ravel())
+            shape_key.value = 0
+            created.append(key_name)
+
+        self.mesh_obj.data.update()
+
+        self.report = {
+            "vertices": len(self.basis),
+            "created": created,
+            "dropped": dropped,
+            "time": time.perf_counter() - start
+        }
+        return created
+
+    def print_report(self):
+        """生成結果を表示"""
+        report = self.report
+        print(f"シェイプキー生成: {len(report['created'])}個作成 / "
+              f"{len(report['dropped'])}個省略（変位なし） / "
+              f"{report['vertices']}頂点 / {report['time'] * 1000:.1f}ms")
+
+# 実行
+if __name__ == "__main__":
+    obj = bpy.context.active_object
+    if obj and obj.type == 'MESH':
+        builder = ShapeKeyBuilder(obj, *head_bounds(obj.data))
+        builder.build()
+        builder.print_report()
+    else:
+        print("メッシュオブジェクトを選択してください")
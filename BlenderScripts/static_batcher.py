@@ -0,0 +1,204 @@
+import bpy
+import bmesh
+import json
+import math
+from pathlib import Path
+from mathutils import Matrix, Vector
+import os
+import sys
+# --python で実行したときに同じフォルダのモジュールを読み込めるようにする
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from budget_report import REPORT_DIR
+from prop_library import PROP_KEY_PROP
+
+"""
+環境の静的メッシュの結合（スタティックバッチ）
+動かない環境のジオメトリをマテリアルと空間セル（XY平面の格子）ごとに1つのメッシュにまとめ、
+Unityでのオブジェクト数・ドローコール数を減らす
+ドア・照明・アニメーションのあるオブジェクトは結合せずにそのまま残す
+形状を共有する小物（prop_library.py）も既定では結合せず、共有メッシュのまま書き出す
+（結合するとドローコールは減るが、FBXが大きくなりUnityでプレハブとして扱えなくなる）
+元のオブジェクトは変更せず、結合したオブジェクトはエクスポート後に削除する
+"""
+
+# 結合しないオブジェクトの名前の先頭（操作・点灯するもの）
+INTERACTIVE_PREFIXES = ("Door", "BathroomDoor", "MoodLight", "BedsideLamp", "StreetLight")
+
+# 結合しないことを指定するカスタムプロパティ名
+INTERACTIVE_PROP = "interactive"
+
+# 結合したオブジェクトに付けるカスタムプロパティ名
+BATCH_PROP = "static_batch"
+
+
+def is_interactive(obj):
+    """結合せずに残すオブジェクトか"""
+    if obj.type != 'MESH':
+        return True
+    if obj.get(INTERACTIVE_PROP):
+        return True
+    if obj.animation_data is not None and obj.animation_data.action is not None:
+        return True
+    if obj.parent is not None and obj.parent.type == 'ARMATURE':
+        return True
+    return obj.name.startswith(INTERACTIVE_PREFIXES)
+
+
+def is_shared(obj):
+    """メッシュを他のオブジェクトと共有している小物か"""
+    return obj.type == 'MESH' and (obj.data.get(PROP_KEY_PROP) is not None or obj.data.users > 1)
+
+
+def draw_calls(obj):
+    """オブジェクトのドローコール数（使用しているマテリアルの数、最低1）"""
+    if obj.type != 'MESH':
+        return 0
+    mesh = obj.data
+    if obj.modifiers:
+        # 散布などモディファイアで作られた形状を含める
+        mesh = obj.evaluated_get(bpy.context.evaluated_depsgraph_get()).data
+    used = {polygon.material_index for polygon in mesh.polygons}
+    return max(len(used), 1)
+
+
+class StaticBatcher:
+    """マテリアル・空間セルごとの静的メッシュの結合"""
+
+    def __init__(self, cell_size=5.0, report_dir=REPORT_DIR, merge_shared=False):
+        self.cell_size = cell_size
+        self.merge_shared = merge_shared  # 形状を共有する小物も結合する
+        self.report_dir = Path(report_dir)
+        self.merged = []
+        self.report = {}
+
+    def cell_of(self, obj):
+        """オブジェクトのバウンディングボックスの中心が入るセル"""
+        corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+        center = sum(corners, Vector()) / len(corners)
+        return (math.floor(center.x / self.cell_size), math.floor(center.y / self.cell_size))
+
+    def cell_origin(self, cell):
+        """セルの中心（結合したオブジェクトの原点）"""
+        return Vector(((cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size, 0.0))
+
+    def group(self, objects):
+        """(マテリアル, セル) → [(オブジェクト, マテリアル番号)] と、結合しないオブジェクト"""
+        groups = {}
+        kept = []
+        for obj in objects:
+            # モディファイアの結果（散布など）は評価後の形状をそのまま書き出す
+            if is_interactive(obj) or obj.modifiers or (is_shared(obj) and not self.merge_shared):
+                kept.append(obj)
+                continue
+            cell = self.cell_of(obj)
+            indices = sorted({polygon.material_index for polygon in obj.data.polygons})
+            for index in indices:
+                slot = obj.material_slots[index] if index < len(obj.material_slots) else None
+                mat = slot.material if slot is not None else None
+                groups.setdefault((mat, cell), []).append((obj, index))
+        return groups, kept
+
+    def append(self, bm, obj, material_index, origin, buffer):
+        """オブジェクトの1マテリアル分の面をセルの座標系でbmeshに追加"""
+        # 別のbmeshで変換・選別してから追加する（同じbmesh内で面を削除すると、次に読み込んだ要素が
+        # 空いた位置に入り、番号の範囲で新しい要素を取り出せなくなるため）
+        part = bmesh.new()
+        part.from_mesh(obj.data)
+
+        matrix = Matrix.Translation(-origin) @ obj.matrix_world
+        bmesh.ops.transform(part, matrix=matrix, verts=part.verts)
+
+        others = [face for face in part.faces if face.material_index != material_index]
+        if others:
+            bmesh.ops.delete(part, geom=others, context='FACES')
+
+        # 負のスケールで反転した面を戻す
+        if matrix.determinant() < 0:
+            bmesh.ops.reverse_faces(part, faces=part.faces[:])
+        for face in part.faces:
+            face.material_index = 0
+
+        # 一時メッシュ経由で結合先のbmeshの末尾に追加
+        part.to_mesh(buffer)
+        part.free()
+        bm.from_mesh(buffer)
+
+    def merge_group(self, mat, cell, members):
+        """1グループを1つのオブジェクトに結合"""
+        origin = self.cell_origin(cell)
+        bm = bmesh.new()
+        buffer = bpy.data.meshes.new("_StaticBatch")
+        for obj, index in members:
+            self.append(bm, obj, index, origin, buffer)
+        bpy.data.meshes.remove(buffer)
+
+        label = mat.name if mat is not None else "NoMaterial"
+        name = f"Static_{label}_{cell[0]}_{cell[1]}"
+        mesh = bpy.data.meshes.new(name)
+        bm.to_mesh(mesh)
+        bm.free()
+        if mat is not None:
+            mesh.materials.append(mat)
+
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = origin
+        obj[BATCH_PROP] = True
+        bpy.context.scene.collection.objects.link(obj)
+        return obj
+
+    def merge(self, objects):
+        """静的なオブジェクトを結合し、エクスポートするオブジェクトの一覧を返す"""
+        objects = list(objects)
+        groups, kept = self.group(objects)
+        self.merged = [self.merge_group(mat, cell, members) for (mat, cell), members in groups.items()]
+        result = kept + self.merged
+
+        self.report = {
+            "cell_size": self.cell_size,
+            "merge_shared": self.merge_shared,
+            "before": {
+                "objects": len(objects),
+                "draw_calls": sum(draw_calls(obj) for obj in objects)
+            },
+            "after": {
+                "objects": len(result),
+                "draw_calls": sum(draw_calls(obj) for obj in result)
+            },
+            "merged": {obj.name: len(members) for obj, members in zip(self.merged, groups.values())},
+            "kept": sorted(obj.name for obj in kept)
+        }
+        return result
+
+    def cleanup(self):
+        """結合したオブジェクトとメッシュを削除（元のシーンに戻す）"""
+        for obj in self.merged:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+        self.merged = []
+
+    def write(self, filename="static_batching.json"):
+        """結合の前後の集計をJSONで書き出す"""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / filename
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report, f, ensure_ascii=False, indent=2)
+        return path
+
+    def print_report(self):
+        """結合の前後のオブジェクト数・ドローコール数を表示"""
+        before, after = self.report["before"], self.report["after"]
+        shared = "共有メッシュも結合" if self.merge_shared else "共有メッシュは結合しない"
+        print(f"スタティックバッチ（セル {self.cell_size}m、{shared}）:")
+        print(f"  オブジェクト: {before['objects']} → {after['objects']}")
+        print(f"  ドローコール: {before['draw_calls']} → {after['draw_calls']}")
+        if self.report["kept"]:
+            print(f"  結合しないオブジェクト: {', '.join(self.report['kept'])}")
+
+# 実行
+if __name__ == "__main__":
+    # 現在のシーンで結合した場合の集計を表示（シーンは元に戻す）
+    batcher = StaticBatcher()
+    batcher.merge(bpy.context.scene.objects)
+    batcher.print_report()
+    batcher.cleanup()
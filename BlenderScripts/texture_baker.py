@@ -0,0 +1,293 @@
+import bpy
+import json
+import math
+import hashlib
+from pathlib import Path
+
+"""
+プロシージャルテクスチャのベイク
+瞳・頬の赤み・制服のストライプなどの細部をシェーダーノードで作り、
+CyclesのCPUで画像にベイクしてUnityでも使える単純なマテリアルに貼る
+ベイク結果はノード構成と解像度のハッシュでキャッシュし、変更が無ければ再ベイクしない
+"""
+
+TEXTURE_DIR = Path(__file__).parent.parent / "BlenderAssets" / "Cache" / "Textures"
+
+# 画像に保存するキーのカスタムプロパティ名
+TEXTURE_KEY_PROP = "texture_key"
+
+# レシピごとの既定の解像度
+DEFAULT_RESOLUTIONS = {
+    "iris": 256,
+    "blush": 512,
+    "stripes": 512
+}
+
+# ベイク用の一時オブジェクト・マテリアルの名前
+BAKE_OBJECT = "_TextureBake"
+
+
+def spot(name, center, radius):
+    """UV上の楕円の中心で1、半径の位置で0になる値（Spherical Gradient）"""
+    scale = (1.0 / radius[0], 1.0 / radius[1], 1.0)
+    return [
+        {
+            "name": f"{name}_mapping", "type": "ShaderNodeMapping",
+            "inputs": {
+                "Location": (-center[0] * scale[0], -center[1] * scale[1], 0.0),
+                "Scale": scale
+            }
+        },
+        {"name": name, "type": "ShaderNodeTexGradient", "props": {"gradient_type": 'SPHERICAL'}}
+    ], [
+        ["uv", "UV", f"{name}_mapping", "Vector"],
+        [f"{name}_mapping", "Vector", name, "Vector"]
+    ]
+
+
+def iris_graph(color, center=(0.25, 0.5), radius=(0.14, 0.3)):
+    """瞳（白目・虹彩・瞳孔）"""
+    # UV球の +Y 側（正面）の中心に虹彩を置く
+    dark = [c * 0.35 for c in color[:3]] + [1.0]
+    nodes, links = spot("iris", center, radius)
+    nodes = [{"name": "uv", "type": "ShaderNodeTexCoord"}] + nodes + [{
+        "name": "output", "type": "ShaderNodeValToRGB",
+        "ramp": [
+            [0.0, (0.95, 0.95, 0.97, 1.0)],
+            [0.05, dark],
+            [0.25, list(color)],
+            [0.6, dark],
+            [0.68, (0.02, 0.02, 0.03, 1.0)]
+        ]
+    }]
+    links.append(["iris", "Fac", "output", "Fac"])
+    return {"nodes": nodes, "links": links}
+
+
+def blush_graph(color, center=(0.25, 0.42), offset=0.085, radius=(0.04, 0.05)):
+    """肌（頬の赤み）"""
+    blush = [color[0], color[1] * 0.65, color[2] * 0.65, 1.0]
+    left, left_links = spot("cheek_l", (center[0] - offset, center[1]), radius)
+    right, right_links = spot("cheek_r", (center[0] + offset, center[1]), radius)
+    nodes = [{"name": "uv", "type": "ShaderNodeTexCoord"}] + left + right + [
+        {"name": "cheeks", "type": "ShaderNodeMath", "props": {"operation": 'MAXIMUM'}},
+        {
+            "name": "output", "type": "ShaderNodeValToRGB",
+            "ramp": [[0.0, list(color)], [0.7, blush]]
+        }
+    ]
+    links = left_links + right_links + [
+        ["cheek_l", "Fac", "cheeks", 0],
+        ["cheek_r", "Fac", "cheeks", 1],
+        ["cheeks", "Value", "output", "Fac"]
+    ]
+    return {"nodes": nodes, "links": links}
+
+
+def stripes_graph(color, count=6, width=0.15):
+    """制服（横のストライプ）"""
+    # 明るい布には暗い線、暗い布には白い線
+    luminance = 0.2126 * color[0] + 0.7152 * color[1] + 0.0722 * color[2]
+    stripe = [c * 0.3 for c in color[:3]] + [1.0] if luminance > 0.5 else [0.95, 0.95, 0.95, 1.0]
+    nodes = [
+        {"name": "uv", "type": "ShaderNodeTexCoord"},
+        {
+            # Wave Texture の縞の周期は 2π / (20 × Scale)
+            "name": "wave", "type": "ShaderNodeTexWave",
+            "props": {"wave_type": 'BANDS', "bands_direction": 'Y'},
+            "inputs": {"Scale": count * 2 * math.pi / 20, "Distortion": 0.0}
+        },
+        {
+            "name": "output", "type": "ShaderNodeValToRGB",
+            "props": {"color_ramp.interpolation": 'CONSTANT'},
+            "ramp": [[0.0, list(color)], [1.0 - width, stripe]]
+        }
+    ]
+    links = [
+        ["uv", "UV", "wave", "Vector"],
+        ["wave", "Fac", "output", "Fac"]
+    ]
+    return {"nodes": nodes, "links": links}
+
+
+# レシピ名 → ノード構成を作る関数（引数はマテリアルの色）
+TEXTURE_RECIPES = {
+    "iris": iris_graph,
+    "blush": blush_graph,
+    "stripes": stripes_graph
+}
+
+
+def texture_key(graph, resolution):
+    """ノード構成と解像度からキャッシュキーを計算"""
+    def normalize(value):
+        if isinstance(value, float):
+            return round(value, 5)
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        return value
+
+    payload = json.dumps({"graph": normalize(graph), "resolution": resolution}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def set_property(node, path, value):
+    """"color_ramp.interpolation" のようなドット区切りのプロパティを設定"""
+    *parents, name = path.split(".")
+    for parent in parents:
+        node = getattr(node, parent)
+    setattr(node, name, value)
+
+
+def build_graph(node_tree, graph):
+    """ノード構成をノードツリーに作成し、"output" ノードを返す"""
+    nodes = {}
+    for spec in graph["nodes"]:
+        node = node_tree.nodes.new(spec["type"])
+        node.name = spec["name"]
+        for path, value in spec.get("props", {}).items():
+            set_property(node, path, value)
+        for socket, value in spec.get("inputs", {}).items():
+            node.inputs[socket].default_value = value
+        if "ramp" in spec:
+            # 既定の2点を両端に使い、間の点を追加
+            stops = spec["ramp"]
+            elements = node.color_ramp.elements
+            elements[0].position, elements[0].color = stops[0][0], stops[0][1]
+            elements[-1].position, elements[-1].color = stops[-1][0], stops[-1][1]
+            for position, color in stops[1:-1]:
+                elements.new(position).color = color
+        nodes[spec["name"]] = node
+
+    for from_node, from_socket, to_node, to_socket in graph["links"]:
+        node_tree.links.new(nodes[from_node].outputs[from_socket], nodes[to_node].inputs[to_socket])
+    return nodes["output"]
+
+
+class TextureBaker:
+    """プロシージャルテクスチャのベイクとキャッシュ"""
+
+    def __init__(self, cache_dir=TEXTURE_DIR, samples=4, margin=4):
+        self.cache_dir = Path(cache_dir)
+        self.samples = samples
+        self.margin = margin
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def texture_path(self, recipe, key):
+        """キーに対応する画像ファイル"""
+        return self.cache_dir / f"{recipe}_{key}.png"
+
+    def find_loaded(self, key):
+        """セッション内で読み込み済みの画像を探す"""
+        for image in bpy.data.images:
+            if image.get(TEXTURE_KEY_PROP) == key:
+                return image
+        return None
+
+    def get(self, name, recipe, color, resolution=None):
+        """レシピと色に対応するテクスチャ画像（キャッシュに無ければベイク）"""
+        # name: ベイクした画像の名前（キャッシュのキーには含めない）
+        if recipe not in TEXTURE_RECIPES:
+            raise ValueError(f"未知のテクスチャレシピです: {recipe}")
+        resolution = int(resolution or DEFAULT_RESOLUTIONS[recipe])
+        graph = TEXTURE_RECIPES[recipe](list(color))
+        key = texture_key(graph, resolution)
+
+        image = self.find_loaded(key)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        # 名前が違っても同じ内容なら同じファイルを使う
+        path = self.texture_path(recipe, key)
+        if path.exists():
+            self.hits += 1
+            image = bpy.data.images.load(str(path), check_existing=True)
+        else:
+            self.misses += 1
+            image = self.bake(name, graph, resolution, path)
+        image[TEXTURE_KEY_PROP] = key
+        return image
+
+    def bake_object(self, graph, image):
+        """0〜1のUVを持つ平面と、ノード構成を発光で出力するマテリアル"""
+        mesh = bpy.data.meshes.new(BAKE_OBJECT)
+        mesh.from_pydata([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [], [(0, 1, 2, 3)])
+        uv_layer = mesh.uv_layers.new()
+        for loop, vertex in zip(uv_layer.data, mesh.loops):
+            loop.uv = mesh.vertices[vertex.vertex_index].co.xy
+
+        mat = bpy.data.materials.new(BAKE_OBJECT)
+        mat.use_nodes = True
+        tree = mat.node_tree
+        tree.nodes.clear()
+        emission = tree.nodes.new("ShaderNodeEmission")
+        output = tree.nodes.new("ShaderNodeOutputMaterial")
+        tree.links.new(build_graph(tree, graph).outputs["Color"], emission.inputs["Color"])
+        tree.links.new(emission.outputs["Emission"], output.inputs["Surface"])
+
+        # ベイク先はアクティブな画像ノード
+        target = tree.nodes.new("ShaderNodeTexImage")
+        target.image = image
+        tree.nodes.active = target
+        mesh.materials.append(mat)
+
+        obj = bpy.data.objects.new(BAKE_OBJECT, mesh)
+        bpy.context.scene.collection.objects.link(obj)
+        return obj
+
+    def bake(self, name, graph, resolution, path):
+        """ノード構成を画像にベイクしてPNGで保存"""
+        print(f"Baking texture {name} ({resolution}px)...")
+        context = bpy.context
+        scene = context.scene
+        view_layer = context.view_layer
+
+        # レンダー設定・選択状態を保存
+        saved_render = (scene.render.engine, scene.cycles.device, scene.cycles.samples)
+        saved_selection = [obj for obj in view_layer.objects if obj.select_get()]
+        saved_active = view_layer.objects.active
+
+        image = bpy.data.images.new(f"{name}_Baked", width=resolution, height=resolution, alpha=False)
+        obj = self.bake_object(graph, image)
+        try:
+            scene.render.engine = 'CYCLES'
+            scene.cycles.device = 'CPU'
+            scene.cycles.samples = self.samples
+
+            for selected in saved_selection:
+                selected.select_set(False)
+            obj.select_set(True)
+            view_layer.objects.active = obj
+            bpy.ops.object.bake(type='EMIT', margin=self.margin, use_clear=True)
+
+            image.filepath_raw = str(path)
+            image.file_format = 'PNG'
+            image.save()
+        finally:
+            mesh, mat = obj.data, obj.data.materials[0]
+            bpy.data.objects.remove(obj, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+            bpy.data.materials.remove(mat)
+
+            scene.render.engine, scene.cycles.device, scene.cycles.samples = saved_render
+            for selected in saved_selection:
+                selected.select_set(True)
+            view_layer.objects.active = saved_active
+        return image
+
+    def print_stats(self):
+        """キャッシュのヒット率を表示"""
+        print(f"テクスチャキャッシュ: ヒット {self.hits} / ベイク {self.misses}")
+
+# 実行
+if __name__ == "__main__":
+    # 全レシピを既定の色でベイク（2回目以降はキャッシュから読み込む）
+    baker = TextureBaker()
+    for recipe in TEXTURE_RECIPES:
+        baker.get(f"Sample_{recipe}", recipe, (0.8, 0.4, 0.3, 1.0))
+    baker.print_stats()
@@ -0,0 +1,101 @@
+import csv
+import math
+import numpy as np
+
+"""
+口形（母音）カーブ計算モジュール
+音素タイムラインから mouth_a/i/u/e/o のカーブを計算する
+bpyに依存しないため、ワーカープロセスからも読み込める
+"""
+
+VOWELS = ["a", "i", "u", "e", "o"]
+
+# 口を閉じる記号（無音・撥音など）
+CLOSED_MARKS = {"", "-", "n", "sil", "pau"}
+
+
+def shape_name(vowel):
+    """母音に対応するシェイプキー名"""
+    return f"mouth_{vowel}"
+
+
+def read_timeline(path):
+    """タイムラインファイルをセリフ単位で読み込む（1セリフ分だけ保持）"""
+    # 形式: line_id,time,vowel,intensity（同じline_idの行は連続していること）
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        current_id = None
+        events = []
+
+        for row in reader:
+            if not row or row[0].startswith("#") or row[0] == "line_id":
+                continue
+            line_id = row[0].strip()
+            time = float(row[1])
+            vowel = row[2].strip().lower() if len(row) > 2 else ""
+            intensity = float(row[3]) if len(row) > 3 and row[3].strip() else 1.0
+
+            if line_id != current_id:
+                if events:
+                    yield current_id, events
+                current_id = line_id
+                events = []
+            events.append((time, vowel, intensity))
+
+        if events:
+            yield current_id, events
+
+
+def smoothing_kernel(fps, coarticulation):
+    """前後の音素を混ぜるための窓関数（合計1）"""
+    width = max(int(round(coarticulation * fps)), 1)
+    if width == 1:
+        return np.ones(1)
+    kernel = np.hanning(width * 2 + 1)
+    return kernel / kernel.sum()
+
+
+def compile_events(events, fps=30, coarticulation=0.12, hold=0.2):
+    """音素イベント列を母音ごとの毎フレーム値に変換"""
+    # 戻り値: {シェイプキー名: (frames, values)}（値が全て0のチャンネルは含まない）
+    events = sorted(events, key=lambda event: event[0])
+    end_time = events[-1][0] + hold
+    kernel = smoothing_kernel(fps, coarticulation)
+    pad = len(kernel) // 2
+    frame_count = int(math.ceil(end_time * fps)) + 1
+
+    # 各イベントの区間に目標値を置く
+    targets = np.zeros((frame_count + pad * 2, len(VOWELS)))
+    for i, (time, vowel, intensity) in enumerate(events):
+        if vowel in CLOSED_MARKS or vowel not in VOWELS:
+            continue
+        next_time = events[i + 1][0] if i + 1 < len(events) else end_time
+        first = int(round(time * fps))
+        last = max(int(round(next_time * fps)), first + 1)
+        targets[pad + first:pad + last, VOWELS.index(vowel)] = min(max(intensity, 0.0), 1.0)
+
+    # 調音結合: 前後の母音へ滑らかに移行
+    smoothed = np.empty_like(targets)
+    for channel in range(len(VOWELS)):
+        smoothed[:, channel] = np.convolve(targets[:, channel], kernel, mode="same")
+    smoothed = smoothed[pad:pad + frame_count]
+
+    # 複数の口形の合計が1を超えないように正規化
+    total = smoothed.sum(axis=1)
+    over = total > 1.0
+    smoothed[over] /= total[over, None]
+
+    frames = np.arange(1, frame_count + 1)
+    curves = {}
+    for channel, vowel in enumerate(VOWELS):
+        values = smoothed[:, channel]
+        if values.max() <= 1e-4:
+            continue
+        curves[shape_name(vowel)] = (frames, values)
+    return curves
+
+
+def compile_line(task):
+    """ワーカー用: (line_id, events, fps, coarticulation) を計算"""
+    line_id, events, fps, coarticulation = task
+    return line_id, compile_events(events, fps, coarticulation)